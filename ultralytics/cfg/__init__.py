@@ -166,6 +166,11 @@ CFG_FRACTION_KEYS = {  # fractional float arguments with 0.0<=values<=1.0
     "hsv_h",
     "hsv_s",
     "hsv_v",
+    "spectral_gain",
+    "spectral_bias",
+    "band_gain",
+    "spectral_gamma",
+    "sar_gain",
     "translate",
     "scale",
     "perspective",
@@ -178,6 +183,7 @@ CFG_FRACTION_KEYS = {  # fractional float arguments with 0.0<=values<=1.0
     "conf",
     "iou",
     "fraction",
+    "verify_fraction",
 }
 CFG_INT_KEYS = {  # integer-only arguments
     "epochs",
@@ -227,6 +233,8 @@ CFG_BOOL_KEYS = {  # boolean-only arguments
     "nms",
     "profile",
     "multi_scale",
+    "compile",
+    "branch_parallel",
 }
 
 
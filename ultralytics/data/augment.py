@@ -10,7 +10,7 @@ import numpy as np
 import torch
 from PIL import Image
 
-from ultralytics.data.utils import polygons2masks, polygons2masks_overlap
+from ultralytics.data.utils import channel_order, polygons2masks, polygons2masks_overlap
 from ultralytics.utils import LOGGER, colorstr
 from ultralytics.utils.checks import check_version
 from ultralytics.utils.instance import Instances
@@ -21,6 +21,8 @@ from ultralytics.utils.torch_utils import TORCHVISION_0_10, TORCHVISION_0_11, TO
 DEFAULT_MEAN = (0.0, 0.0, 0.0)
 DEFAULT_STD = (1.0, 1.0, 1.0)
 DEFAULT_CROP_FRACTION = 1.0
+PAD_VALUE = 114  # mosaic, warp and letterbox padding value
+BORDER_VALUE = (PAD_VALUE,) * 4  # cv2 border Scalar, OpenCV repeats it every 4 channels for C > 4 images
 
 
 class BaseTransform:
@@ -487,6 +489,103 @@ class BaseMixTransform:
         return labels
 
 
+class MosaicTiles:
+    """
+    Lazily assembled mosaic image, kept as a list of placed tiles until it is rendered or warped.
+
+    Each tile is (img, dx, dy, x1, y1, x2, y2): pixel (u, v) of 'img' lands at mosaic pixel (u + dx, v + dy) and the
+    tile owns the mosaic region [x1, x2) x [y1, y2). Owned regions are disjoint, everything else is padding. Rendering
+    writes each output pixel once, and `warp` maps the tiles straight to the RandomPerspective output so the full-size
+    mosaic canvas is never materialized. All operations handle any number of channels in one call.
+
+    Attributes:
+        shape (Tuple[int, int, int]): Mosaic image shape (h, w, c).
+        dtype (np.dtype): Image dtype.
+        tiles (List[Tuple]): Placed tiles with non-empty owned regions.
+
+    Examples:
+        >>> tiles = MosaicTiles((1280, 1280, 7), [(img, 0, 0, 0, 0, 640, 640)])
+        >>> canvas = tiles.render()  # (1280, 1280, 7), padding outside the tile
+        >>> warped = tiles.warp(M, dsize=(640, 640))
+    """
+
+    def __init__(self, shape, tiles):
+        """Initialize with the mosaic 'shape' (h, w, c) and (img, dx, dy, x1, y1, x2, y2) 'tiles'."""
+        self.shape = tuple(shape)
+        self.tiles = [t for t in tiles if t[5] > t[3] and t[6] > t[4]]
+        self.dtype = tiles[0][0].dtype if tiles else np.dtype(np.uint8)
+
+    def __array__(self, dtype=None, copy=None):
+        """Render to a numpy array, so that any transform unaware of lazy mosaics still gets the image."""
+        im = self.render()
+        return im if dtype is None else im.astype(dtype, copy=False)
+
+    def render(self, out=None):
+        """
+        Render the mosaic into 'out', filling only the regions not covered by tiles with padding.
+
+        Args:
+            out (np.ndarray, optional): Preallocated (h, w, c) buffer to write into, allocated if None.
+
+        Returns:
+            (np.ndarray): The rendered mosaic, 'out' if given.
+        """
+        if out is None:
+            out = np.empty(self.shape, dtype=self.dtype)
+        h, w = self.shape[:2]
+        rects = sorted(t[3:] for t in self.tiles)  # by x1
+        ys = sorted({0, h}.union(*((y1, y2) for _, y1, _, y2 in rects)))
+        for ya, yb in zip(ys[:-1], ys[1:]):  # horizontal bands with a fixed set of tiles
+            x = 0
+            for x1, y1, x2, y2 in rects:
+                if y1 <= ya and yb <= y2:
+                    if x1 > x:
+                        out[ya:yb, x:x1] = PAD_VALUE
+                    x = max(x, x2)
+            if x < w:
+                out[ya:yb, x:] = PAD_VALUE
+        for im, dx, dy, x1, y1, x2, y2 in self.tiles:
+            out[y1:y2, x1:x2] = im[y1 - dy : y2 - dy, x1 - dx : x2 - dx]
+        return out
+
+    def warp(self, M, dsize, perspective=False):
+        """
+        Warp the mosaic with 3x3 matrix 'M' without assembling it, equivalent to warping the rendered mosaic.
+
+        Each tile is warped from its own owned region into the bounding box of its footprint and copied under a
+        nearest-neighbour ownership mask, so the output is written once per pixel and tile seams get no padding gaps.
+        Bilinear taps at a seam replicate the tile edge instead of blending with the neighbouring tile.
+
+        Args:
+            M (np.ndarray): 3x3 transform from mosaic to output pixels.
+            dsize (Tuple[int, int]): Output size (w, h).
+            perspective (bool): Use a perspective instead of an affine warp.
+
+        Returns:
+            (np.ndarray): Warped (h, w, c) image.
+        """
+        w, h = dsize
+        out = np.full((h, w, self.shape[2]), PAD_VALUE, dtype=self.dtype)
+        warp = cv2.warpPerspective if perspective else cv2.warpAffine
+        for im, dx, dy, x1, y1, x2, y2 in self.tiles:
+            # Footprint bounding box of the owned region in the output
+            xy = np.array([[x1, y1, 1], [x2, y1, 1], [x2, y2, 1], [x1, y2, 1]], dtype=np.float64) - [0.5, 0.5, 0]
+            xy = xy @ M.T
+            xy = xy[:, :2] / xy[:, 2:3]
+            c0, r0 = (int(v) for v in np.floor(xy.min(0)).clip(0, (w, h)))
+            c1, r1 = (int(v) for v in np.ceil(xy.max(0) + 1).clip(0, (w, h)))
+            if c0 >= c1 or r0 >= r1:
+                continue
+            # Owned region pixels -> bounding box pixels
+            Mt = np.array([[1, 0, -c0], [0, 1, -r0], [0, 0, 1]]) @ M @ np.array([[1, 0, x1], [0, 1, y1], [0, 0, 1]])
+            Mt = Mt.astype(np.float32) if perspective else Mt[:2].astype(np.float32)
+            src = im[y1 - dy : y2 - dy, x1 - dx : x2 - dx]
+            patch = warp(src, Mt, (c1 - c0, r1 - r0), borderMode=cv2.BORDER_REPLICATE)
+            mask = warp(np.ones(src.shape[:2], dtype=np.uint8), Mt, (c1 - c0, r1 - r0), flags=cv2.INTER_NEAREST)
+            np.copyto(out[r0:r1, c0:c1], patch.reshape(r1 - r0, c1 - c0, -1), where=mask[..., None].view(bool))
+        return out
+
+
 class Mosaic(BaseMixTransform):
     """
     Mosaic augmentation for image datasets.
@@ -500,6 +599,8 @@ class Mosaic(BaseMixTransform):
         p (float): Probability of applying the mosaic augmentation. Must be in the range 0-1.
         n (int): The grid size, either 4 (for 2x2) or 9 (for 3x3).
         border (Tuple[int, int]): Border size for width and height.
+        fuse (bool): Return a lazy MosaicTiles image that RandomPerspective warps without assembling the mosaic.
+        canvas (np.ndarray | None): Reused mosaic buffer when not fused, overwritten by the next mosaic.
 
     Methods:
         get_indexes: Returns a list of random indexes from the dataset.
@@ -517,7 +618,7 @@ class Mosaic(BaseMixTransform):
         >>> augmented_labels = mosaic_aug(original_labels)
     """
 
-    def __init__(self, dataset, imgsz=640, p=1.0, n=4):
+    def __init__(self, dataset, imgsz=640, p=1.0, n=4, fuse=False):
         """
         Initializes the Mosaic augmentation object.
 
@@ -529,6 +630,7 @@ class Mosaic(BaseMixTransform):
             imgsz (int): Image size (height and width) after mosaic pipeline of a single image.
             p (float): Probability of applying the mosaic augmentation. Must be in the range 0-1.
             n (int): The grid size, either 4 (for 2x2) or 9 (for 3x3).
+            fuse (bool): Return lazy MosaicTiles images, only valid if the next transform is RandomPerspective.
 
         Examples:
             >>> from ultralytics.data.augment import Mosaic
@@ -541,6 +643,14 @@ class Mosaic(BaseMixTransform):
         self.imgsz = imgsz
         self.border = (-imgsz // 2, -imgsz // 2)  # width, height
         self.n = n
+        self.fuse = fuse
+        self.canvas = None
+
+    def __getstate__(self):
+        """Drop the reused canvas when pickled into dataloader workers, each worker allocates its own."""
+        state = self.__dict__.copy()
+        state["canvas"] = None
+        return state
 
     def get_indexes(self, buffer=True):
         """
@@ -623,7 +733,7 @@ class Mosaic(BaseMixTransform):
             >>> print(result["img"].shape)
             (640, 640, 3)
         """
-        mosaic_labels = []
+        mosaic_labels, tiles = [], []
         s = self.imgsz
         for i in range(3):
             labels_patch = labels if i == 0 else labels["mix_labels"][i - 1]
@@ -633,7 +743,6 @@ class Mosaic(BaseMixTransform):
 
             # Place img in img3
             if i == 0:  # center
-                img3 = np.full((s * 3, s * 3, img.shape[2]), 114, dtype=np.uint8)  # base image with 3 tiles
                 h0, w0 = h, w
                 c = s, s, s + w, s + h  # xmin, ymin, xmax, ymax (base) coordinates
             elif i == 1:  # right
@@ -644,7 +753,7 @@ class Mosaic(BaseMixTransform):
             padw, padh = c[:2]
             x1, y1, x2, y2 = (max(x, 0) for x in c)  # allocate coordinates
 
-            img3[y1:y2, x1:x2] = img[y1 - padh :, x1 - padw :]  # img3[ymin:ymax, xmin:xmax]
+            tiles.append((img, padw, padh, x1, y1, *c[2:]))  # img3[ymin:ymax, xmin:xmax]
             # hp, wp = h, w  # height, width previous for next iteration
 
             # Labels assuming imgsz*2 mosaic size
@@ -652,7 +761,7 @@ class Mosaic(BaseMixTransform):
             mosaic_labels.append(labels_patch)
         final_labels = self._cat_labels(mosaic_labels)
 
-        final_labels["img"] = img3[-self.border[0] : self.border[0], -self.border[1] : self.border[1]]
+        final_labels["img"] = self._mosaic_image(tiles, s * 3, self.border)
         return final_labels
 
     def _mosaic4(self, labels):
@@ -679,7 +788,7 @@ class Mosaic(BaseMixTransform):
             >>> result = mosaic._mosaic4(labels)
             >>> assert result["img"].shape == (1280, 1280, 3)
         """
-        mosaic_labels = []
+        mosaic_labels, tiles = [], []
         s = self.imgsz
         yc, xc = (int(random.uniform(-x, 2 * s + x)) for x in self.border)  # mosaic center x, y
         for i in range(4):
@@ -690,7 +799,6 @@ class Mosaic(BaseMixTransform):
 
             # Place img in img4
             if i == 0:  # top left
-                img4 = np.full((s * 2, s * 2, img.shape[2]), 114, dtype=np.uint8)  # base image with 4 tiles
                 x1a, y1a, x2a, y2a = max(xc - w, 0), max(yc - h, 0), xc, yc  # xmin, ymin, xmax, ymax (large image)
                 x1b, y1b, x2b, y2b = w - (x2a - x1a), h - (y2a - y1a), w, h  # xmin, ymin, xmax, ymax (small image)
             elif i == 1:  # top right
@@ -703,14 +811,14 @@ class Mosaic(BaseMixTransform):
                 x1a, y1a, x2a, y2a = xc, yc, min(xc + w, s * 2), min(s * 2, yc + h)
                 x1b, y1b, x2b, y2b = 0, 0, min(w, x2a - x1a), min(y2a - y1a, h)
 
-            img4[y1a:y2a, x1a:x2a] = img[y1b:y2b, x1b:x2b]  # img4[ymin:ymax, xmin:xmax]
             padw = x1a - x1b
             padh = y1a - y1b
+            tiles.append((img, padw, padh, x1a, y1a, x2a, y2a))  # img4[ymin:ymax, xmin:xmax]
 
             labels_patch = self._update_labels(labels_patch, padw, padh)
             mosaic_labels.append(labels_patch)
         final_labels = self._cat_labels(mosaic_labels)
-        final_labels["img"] = img4
+        final_labels["img"] = self._mosaic_image(tiles, s * 2)
         return final_labels
 
     def _mosaic9(self, labels):
@@ -739,7 +847,7 @@ class Mosaic(BaseMixTransform):
             >>> mosaic_result = mosaic._mosaic9(input_labels)
             >>> mosaic_image = mosaic_result["img"]
         """
-        mosaic_labels = []
+        mosaic_labels, tiles = [], []
         s = self.imgsz
         hp, wp = -1, -1  # height, width previous
         for i in range(9):
@@ -750,7 +858,6 @@ class Mosaic(BaseMixTransform):
 
             # Place img in img9
             if i == 0:  # center
-                img9 = np.full((s * 3, s * 3, img.shape[2]), 114, dtype=np.uint8)  # base image with 4 tiles
                 h0, w0 = h, w
                 c = s, s, s + w, s + h  # xmin, ymin, xmax, ymax (base) coordinates
             elif i == 1:  # top
@@ -774,7 +881,7 @@ class Mosaic(BaseMixTransform):
             x1, y1, x2, y2 = (max(x, 0) for x in c)  # allocate coordinates
 
             # Image
-            img9[y1:y2, x1:x2] = img[y1 - padh :, x1 - padw :]  # img9[ymin:ymax, xmin:xmax]
+            tiles.append((img, padw, padh, x1, y1, *c[2:]))  # img9[ymin:ymax, xmin:xmax]
             hp, wp = h, w  # height, width previous for next iteration
 
             # Labels assuming imgsz*2 mosaic size
@@ -782,9 +889,37 @@ class Mosaic(BaseMixTransform):
             mosaic_labels.append(labels_patch)
         final_labels = self._cat_labels(mosaic_labels)
 
-        final_labels["img"] = img9[-self.border[0] : self.border[0], -self.border[1] : self.border[1]]
+        final_labels["img"] = self._mosaic_image(tiles, s * 3, self.border)
         return final_labels
 
+    def _mosaic_image(self, tiles, size, border=(0, 0)):
+        """
+        Builds the mosaic image from tiles placed on a (size, size) grid, cropped by a negative 'border'.
+
+        Tiles outside the crop are dropped before any pixel is copied. When fused the lazy MosaicTiles is returned,
+        otherwise the tiles are rendered into the reused `canvas`, filling only the uncovered regions.
+
+        Args:
+            tiles (List[Tuple]): (img, dx, dy, x1, y1, x2, y2) tiles in grid coordinates, see MosaicTiles.
+            size (int): Grid size, 2 * imgsz for 2x2 and 3 * imgsz for 1x3 and 3x3 mosaics.
+            border (Tuple[int, int]): Crop border (y, x) of the grid, matching `_update_labels` padding.
+
+        Returns:
+            (np.ndarray | MosaicTiles): The (size + 2 * border) mosaic image.
+        """
+        oy, ox = -border[0], -border[1]
+        h, w = size + 2 * border[0], size + 2 * border[1]
+        placed = [
+            (im, dx - ox, dy - oy, max(x1 - ox, 0), max(y1 - oy, 0), min(x2 - ox, w), min(y2 - oy, h))
+            for im, dx, dy, x1, y1, x2, y2 in tiles
+        ]
+        mosaic = MosaicTiles((h, w, tiles[0][0].shape[2]), placed)
+        if self.fuse:
+            return mosaic
+        if self.canvas is None or self.canvas.shape != mosaic.shape or self.canvas.dtype != mosaic.dtype:
+            self.canvas = np.empty(mosaic.shape, dtype=mosaic.dtype)
+        return mosaic.render(self.canvas)
+
     @staticmethod
     def _update_labels(labels, padw, padh):
         """
@@ -1023,7 +1158,7 @@ class RandomPerspective:
         applied in a specific order to maintain consistency.
 
         Args:
-            img (np.ndarray): Input image to be transformed.
+            img (np.ndarray | MosaicTiles): Input image to be transformed, lazy mosaics are warped without assembly.
             border (Tuple[int, int]): Border dimensions for the transformed image.
 
         Returns:
@@ -1070,11 +1205,13 @@ class RandomPerspective:
         # Combined rotation matrix
         M = T @ S @ R @ P @ C  # order of operations (right to left) is IMPORTANT
         # Affine image
-        if (border[0] != 0) or (border[1] != 0) or (M != np.eye(3)).any():  # image changed
+        if isinstance(img, MosaicTiles):  # warp the mosaic tiles straight into the output
+            img = img.warp(M, self.size, self.perspective)
+        elif (border[0] != 0) or (border[1] != 0) or (M != np.eye(3)).any():  # image changed
             if self.perspective:
-                img = cv2.warpPerspective(img, M, dsize=self.size, borderValue=(114, 114, 114))
+                img = cv2.warpPerspective(img, M, dsize=self.size, borderValue=BORDER_VALUE)
             else:  # affine
-                img = cv2.warpAffine(img, M[:2], dsize=self.size, borderValue=(114, 114, 114))
+                img = cv2.warpAffine(img, M[:2], dsize=self.size, borderValue=BORDER_VALUE)
         return img, M, s
 
     def apply_bboxes(self, bboxes, M):
@@ -1365,9 +1502,11 @@ class RandomHSV:
             >>> augmented_img = labels["img"]
         """
         img = labels["img"]
+        if img.shape[-1] != 3:
+            return labels  # HSV is only defined for 3-band colour images, see RandomSpectral for N-band images
         if self.hgain or self.sgain or self.vgain:
             r = np.random.uniform(-1, 1, 3) * [self.hgain, self.sgain, self.vgain] + 1  # random gains
-            # hue, sat, val = cv2.split(cv2.cvtColor(img, cv2.COLOR_BGR2HSV))
+            hue, sat, val = cv2.split(cv2.cvtColor(img, cv2.COLOR_BGR2HSV))
             dtype = img.dtype  # uint8
 
             x = np.arange(0, 256, dtype=r.dtype)
@@ -1375,32 +1514,88 @@ class RandomHSV:
             lut_sat = np.clip(x * r[1], 0, 255).astype(dtype)
             lut_val = np.clip(x * r[2], 0, 255).astype(dtype)
 
-            '''图像增强'''
-            if img.shape[-1] == 7:
-                img1 = img[..., :4]
-                img2 = img[..., 4:]
+            im_hsv = cv2.merge((cv2.LUT(hue, lut_hue), cv2.LUT(sat, lut_sat), cv2.LUT(val, lut_val)))
+            cv2.cvtColor(im_hsv, cv2.COLOR_HSV2BGR, dst=img)  # no return needed
+        return labels
 
-                hue1, sat1, val1 = cv2.split(cv2.cvtColor(img1, cv2.COLOR_BGR2HSV))
-                hue2, sat2, val2 = cv2.split(cv2.cvtColor(img2, cv2.COLOR_BGR2HSV))
 
-                im1_hsv = cv2.merge((cv2.LUT(hue1, lut_hue), cv2.LUT(sat1, lut_sat), cv2.LUT(val1, lut_val)))
-                cv2.cvtColor(im1_hsv, cv2.COLOR_HSV2BGR)  # no return needed
+class RandomSpectral:
+    """
+    Randomly adjusts per-band gain, bias and gamma of multi-band (optical + SAR) images.
 
-                im2_hsv = cv2.merge((cv2.LUT(hue2, lut_hue), cv2.LUT(sat2, lut_sat), cv2.LUT(val2, lut_val)))
-                cv2.cvtColor(im2_hsv, cv2.COLOR_HSV2BGR)  # no return needed
+    All bands are updated with a single in-place lookup-table gather over the whole HWC array. Optical bands share a
+    global brightness gain with an additional per-band jitter, gamma and bias, while SAR bands get their own gain and
+    gamma policy since hue and saturation are meaningless for them. 3-band colour images are left to RandomHSV.
 
-                np.concatenate((img1, img2), axis=-1)
+    Attributes:
+        gain (float): Maximum variation of the global optical gain.
+        band_gain (float): Maximum variation of the relative per-band optical gain.
+        bias (float): Maximum optical bias as a fraction of the full range.
+        gamma (float): Maximum variation of the per-band optical gamma.
+        sar_gain (float): Maximum variation of the per-band SAR gain.
+        sar_gamma (float): Maximum variation of the per-band SAR gamma.
+        optical (int): Number of leading optical bands, the remaining bands are SAR.
 
-            else:
-                hue, sat, val = cv2.split(cv2.cvtColor(img, cv2.COLOR_BGR2HSV))
+    Methods:
+        __call__: Applies the random photometric augmentation to the image in place.
 
-                x = np.arange(0, 256, dtype=r.dtype)
-                lut_hue = ((x * r[0]) % 180).astype(dtype)
-                lut_sat = np.clip(x * r[1], 0, 255).astype(dtype)
-                lut_val = np.clip(x * r[2], 0, 255).astype(dtype)
+    Examples:
+        >>> import numpy as np
+        >>> from ultralytics.data.augment import RandomSpectral
+        >>> augmenter = RandomSpectral(gain=0.4, band_gain=0.1, gamma=0.2, sar_gain=0.2)
+        >>> labels = {"img": np.random.randint(0, 255, (100, 100, 7), dtype=np.uint8)}
+        >>> labels = augmenter(labels)
+    """
+
+    def __init__(self, gain=0.0, band_gain=0.0, bias=0.0, gamma=0.0, sar_gain=0.0, sar_gamma=0.0, optical=4) -> None:
+        """
+        Initializes the RandomSpectral object with optical and SAR photometric augmentation limits.
 
-                im_hsv = cv2.merge((cv2.LUT(hue, lut_hue), cv2.LUT(sat, lut_sat), cv2.LUT(val, lut_val)))
-                cv2.cvtColor(im_hsv, cv2.COLOR_HSV2BGR, dst=img)  # no return needed
+        Args:
+            gain (float): Maximum variation of the global optical gain, i.e. 0.4 samples gains in [0.6, 1.4].
+            band_gain (float): Maximum variation of the relative per-band optical gain.
+            bias (float): Maximum optical bias as a fraction of the full range.
+            gamma (float): Maximum variation of the per-band optical gamma.
+            sar_gain (float): Maximum variation of the per-band SAR gain.
+            sar_gamma (float): Maximum variation of the per-band SAR gamma.
+            optical (int): Number of leading optical bands, the remaining bands are treated as SAR.
+        """
+        self.gain = gain
+        self.band_gain = band_gain
+        self.bias = bias
+        self.gamma = gamma
+        self.sar_gain = sar_gain
+        self.sar_gamma = sar_gamma
+        self.optical = optical
+
+    def __call__(self, labels):
+        """
+        Applies the random per-band gain, bias and gamma to the image in 'labels' in place.
+
+        Args:
+            labels (Dict): A dictionary with an 'img' key holding an HWC uint8 image.
+
+        Returns:
+            (Dict): The same dictionary with the augmented image.
+        """
+        img = labels["img"]
+        c = img.shape[-1]
+        if c == 3 or not (self.gain or self.band_gain or self.bias or self.gamma or self.sar_gain or self.sar_gamma):
+            return labels
+        no = min(self.optical, c)  # number of optical bands
+        u = np.random.uniform(-1, 1, (4, c)).astype(np.float32)
+        opt = np.arange(c) < no
+        gain = np.where(opt, (1 + u[0, 0] * self.gain) * (1 + u[1] * self.band_gain), 1 + u[1] * self.sar_gain)
+        gamma = np.exp(u[2] * np.where(opt, self.gamma, self.sar_gamma))  # symmetric in log space
+        bias = np.where(opt, u[3] * self.bias, 0.0)
+
+        x = np.arange(256, dtype=np.float32) / 255
+        lut = (x[:, None] ** gamma * gain + bias) * 255  # (256, c)
+        lut = np.clip(lut, 0, 255).round().astype(np.uint8).reshape(1, 256, c)
+        if img.flags.c_contiguous and img.flags.writeable:
+            cv2.LUT(img, lut, dst=img)  # single gather over all bands, in place
+        else:
+            labels["img"] = cv2.LUT(np.ascontiguousarray(img), lut)
         return labels
 
 
@@ -1611,7 +1806,7 @@ class LetterBox:
         top, bottom = int(round(dh - 0.1)) if self.center else 0, int(round(dh + 0.1))
         left, right = int(round(dw - 0.1)) if self.center else 0, int(round(dw + 0.1))
         img = cv2.copyMakeBorder(
-            img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114)
+            img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=BORDER_VALUE
         )  # add border
         if labels.get("ratio_pad"):
             labels["ratio_pad"] = (labels["ratio_pad"], (left, top))  # for evaluation
@@ -1964,10 +2159,14 @@ class Format:
         mask_overlap (bool): Whether to overlap masks.
         batch_idx (bool): Whether to keep batch indexes.
         bgr (float): The probability to return BGR images.
+        bands (List[str] | None): Band layout of the images, see `channel_order`.
+        defer_channels (bool): Whether to leave the channel flip to the batch collate copy.
 
     Methods:
         __call__: Formats labels dictionary with image, classes, bounding boxes, and optionally masks and keypoints.
         _format_img: Converts image from Numpy array to PyTorch tensor.
+        _view_img: Returns a zero-copy image tensor view and its deferred channel order.
+        _channel_order: Returns the cached channel order of the BGR to RGB flip.
         _format_segments: Converts polygon points to bitmap masks.
 
     Examples:
@@ -1989,6 +2188,8 @@ class Format:
         mask_overlap=True,
         batch_idx=True,
         bgr=0.0,
+        bands=None,
+        defer_channels=False,
     ):
         """
         Initializes the Format class with given parameters for image and instance annotation formatting.
@@ -2006,6 +2207,10 @@ class Format:
             mask_overlap (bool): If True, allows mask overlap.
             batch_idx (bool): If True, keeps batch indexes.
             bgr (float): Probability of returning BGR images instead of RGB.
+            bands (List[str] | None): Band layout of the images, e.g. ['B', 'G', 'R', 'NIR', 'SAR', 'SAR', 'SAR'], so
+                that the BGR to RGB flip swaps only the blue and red bands. All channels are reversed if None.
+            defer_channels (bool): If True, 'img' is a zero-copy (C, H, W) view of the HWC image and the channel order
+                is returned as 'channels' (None if unchanged), applied by `YOLODataset.collate_fn` while batching.
 
         Attributes:
             bbox_format (str): Format for bounding boxes.
@@ -2017,6 +2222,8 @@ class Format:
             mask_overlap (bool): Whether masks can overlap.
             batch_idx (bool): Whether to keep batch indexes.
             bgr (float): The probability to return BGR images.
+            bands (List[str] | None): Band layout of the images.
+            defer_channels (bool): Whether to leave the channel flip to the batch collate copy.
 
         Examples:
             >>> format = Format(bbox_format="xyxy", return_mask=True, return_keypoint=False)
@@ -2032,6 +2239,9 @@ class Format:
         self.mask_overlap = mask_overlap
         self.batch_idx = batch_idx  # keep the batch indexes
         self.bgr = bgr
+        self.bands = bands
+        self.defer_channels = defer_channels
+        self.orders = {}  # channel count -> channel order tensor, None if identity
 
     def __call__(self, labels):
         """
@@ -2079,7 +2289,10 @@ class Format:
                     1 if self.mask_overlap else nl, img.shape[0] // self.mask_ratio, img.shape[1] // self.mask_ratio
                 )
             labels["masks"] = masks
-        labels["img"] = self._format_img(img)
+        if self.defer_channels:
+            labels["img"], labels["channels"] = self._view_img(img)
+        else:
+            labels["img"] = self._format_img(img)
         labels["cls"] = torch.from_numpy(cls) if nl else torch.zeros(nl)
         labels["bboxes"] = torch.from_numpy(instances.bboxes) if nl else torch.zeros((nl, 4))
         if self.return_keypoint:
@@ -2106,10 +2319,9 @@ class Format:
 
         This function performs the following operations:
         1. Ensures the image has 3 dimensions (adds a channel dimension if needed).
-        2. Transposes the image from HWC to CHW format.
-        3. Optionally flips the color channels from RGB to BGR.
-        4. Converts the image to a contiguous array.
-        5. Converts the Numpy array to a PyTorch tensor.
+        2. Wraps the image as a PyTorch tensor and views it in CHW format.
+        3. Optionally flips the color channels from BGR to RGB following the band layout.
+        4. Copies the image once into a contiguous tensor, gathering the flipped channel order during the transpose.
 
         Args:
             img (np.ndarray): Input image as a Numpy array with shape (H, W, C) or (H, W).
@@ -2126,10 +2338,35 @@ class Format:
         """
         if len(img.shape) < 3:
             img = np.expand_dims(img, -1)
-        img = img.transpose(2, 0, 1)
-        img = np.ascontiguousarray(img[::-1] if random.uniform(0, 1) > self.bgr else img)
-        img = torch.from_numpy(img)
-        return img
+        img = torch.from_numpy(np.ascontiguousarray(img)).permute(2, 0, 1)
+        order = self._channel_order(img.shape[0]) if random.uniform(0, 1) > self.bgr else None
+        return img.contiguous() if order is None else img.index_select(0, order)
+
+    def _view_img(self, img):
+        """
+        Wraps an image as a (C, H, W) tensor view of its HWC memory, deferring the transpose and channel flip.
+
+        The single copy into the batch tensor in `YOLODataset.collate_fn` applies both, instead of one contiguous copy
+        here and another when stacking the batch.
+
+        Args:
+            img (np.ndarray): Input image as a Numpy array with shape (H, W, C) or (H, W).
+
+        Returns:
+            (Tuple[torch.Tensor, torch.Tensor | None]): The (C, H, W) view and the channel order to gather, None if
+                the channels are kept as is.
+        """
+        if len(img.shape) < 3:
+            img = np.expand_dims(img, -1)
+        img = torch.from_numpy(np.ascontiguousarray(img)).permute(2, 0, 1)
+        return img, self._channel_order(img.shape[0]) if random.uniform(0, 1) > self.bgr else None
+
+    def _channel_order(self, n):
+        """Return the precomputed BGR to RGB channel order tensor for n-channel images, None if it is the identity."""
+        if n not in self.orders:
+            order = channel_order(self.bands, n)
+            self.orders[n] = None if (order == np.arange(n)).all() else torch.from_numpy(order)
+        return self.orders[n]
 
     def _format_segments(self, instances, cls, w, h):
         """
@@ -2324,7 +2561,8 @@ def v8_transforms(dataset, imgsz, hyp, stretch=False):
         >>> transforms = v8_transforms(dataset, imgsz=640, hyp=hyp)
         >>> augmented_data = transforms(dataset[0])
     """
-    mosaic = Mosaic(dataset, imgsz=imgsz, p=hyp.mosaic)
+    flip_paste = hyp.copy_paste and hyp.copy_paste_mode == "flip"  # pastes into the mosaic before the affine warp
+    mosaic = Mosaic(dataset, imgsz=imgsz, p=hyp.mosaic, fuse=not flip_paste)
     affine = RandomPerspective(
         degrees=hyp.degrees,
         translate=hyp.translate,
@@ -2341,12 +2579,14 @@ def v8_transforms(dataset, imgsz, hyp, stretch=False):
         pre_transform.append(
             CopyPaste(
                 dataset,
-                pre_transform=Compose([Mosaic(dataset, imgsz=imgsz, p=hyp.mosaic), affine]),
+                pre_transform=Compose([Mosaic(dataset, imgsz=imgsz, p=hyp.mosaic, fuse=True), affine]),
                 p=hyp.copy_paste,
                 mode=hyp.copy_paste_mode,
             )
         )
     flip_idx = dataset.data.get("flip_idx", [])  # for keypoints augmentation
+    bands = [str(b).upper() for b in dataset.data.get("bands") or []]
+    optical = next((i for i, b in enumerate(bands) if b.startswith("SAR")), len(bands)) if bands else 4
     if dataset.use_keypoints:
         kpt_shape = dataset.data.get("kpt_shape", None)
         if len(flip_idx) == 0 and hyp.fliplr > 0.0:
@@ -2361,6 +2601,15 @@ def v8_transforms(dataset, imgsz, hyp, stretch=False):
             MixUp(dataset, pre_transform=pre_transform, p=hyp.mixup),
             Albumentations(p=1.0),
             RandomHSV(hgain=hyp.hsv_h, sgain=hyp.hsv_s, vgain=hyp.hsv_v),
+            RandomSpectral(
+                gain=hyp.spectral_gain,
+                band_gain=hyp.band_gain,
+                bias=hyp.spectral_bias,
+                gamma=hyp.spectral_gamma,
+                sar_gain=hyp.sar_gain,
+                sar_gamma=hyp.spectral_gamma,
+                optical=optical,
+            ),
             RandomFlip(direction="vertical", p=hyp.flipud),
             RandomFlip(direction="horizontal", p=hyp.fliplr, flip_idx=flip_idx),
         ]
@@ -4,6 +4,7 @@ import glob
 import math
 import os
 import random
+import time
 from copy import deepcopy
 from multiprocessing.pool import ThreadPool
 from pathlib import Path
@@ -14,7 +15,22 @@ import numpy as np
 import psutil
 from torch.utils.data import Dataset
 
-from ultralytics.data.utils import FORMATS_HELP_MSG, HELP_URL, IMG_FORMATS, read_image
+from ultralytics.data.label_store import LabelStore
+from ultralytics.data.shard import TileShard, shard_paths
+from ultralytics.data.utils import (
+    BAND_STATS_VERSION,
+    FORMATS_HELP_MSG,
+    HELP_URL,
+    IMG_FORMATS,
+    band_lut_hash,
+    band_stats_lut,
+    compute_band_stats,
+    get_hash,
+    img2label_paths,
+    load_dataset_cache_file,
+    read_image,
+    save_dataset_cache_file,
+)
 from ultralytics.utils import DEFAULT_CFG, LOCAL_RANK, LOGGER, NUM_THREADS, TQDM
 
 
@@ -39,10 +55,13 @@ class BaseDataset(Dataset):
 
     Attributes:
         im_files (list): List of image file paths.
-        labels (list): List of label data dictionaries.
+        labels (LabelStore | list): Columnar label store (YOLODataset) or list of label data dictionaries.
         ni (int): Number of images in the dataset.
         ims (list): List of loaded images.
         npy_files (list): List of numpy file paths.
+        band_lut (np.ndarray, optional): Per-band uint8 lookup table from persistent band statistics.
+        band_stats_file (Path, optional): '*.bandstats' sidecar `band_lut` was built from.
+        shard (TileShard, optional): Memory-mapped tile shard packed next to the image directory.
         transforms (callable): Image transformation function.
     """
 
@@ -70,6 +89,7 @@ class BaseDataset(Dataset):
         self.single_cls = single_cls
         self.prefix = prefix
         self.fraction = fraction
+        self.verify_fraction = getattr(hyp, "verify_fraction", 0.0)  # images fully decoded when caching labels
         self.im_files = self.get_img_files(self.img_path)
         self.labels = self.get_labels()
         self.update_labels(include_class=classes)  # single_cls and include_class
@@ -86,9 +106,17 @@ class BaseDataset(Dataset):
         self.buffer = []  # buffer size = batch size
         self.max_buffer_length = min((self.ni, self.batch_size * 8, 1000)) if self.augment else 0
 
+        # Persistent per-band statistics for uint16->uint8 conversion (options are band_stats = False, True, path)
+        self.band_stats_file = None
+        self.band_lut = self.get_band_lut(getattr(hyp, "band_stats", False))
+
+        # Packed multi-band tiles ('<images>.shard.npy', see data/shard.py), only if packed with the same band stretch
+        self.shard = self.get_shard()
+
         # Cache images (options are cache = True, False, None, "ram", "disk")
         self.ims, self.im_hw0, self.im_hw = [None] * self.ni, [None] * self.ni, [None] * self.ni
-        self.npy_files = [Path(f).with_suffix(".npy") for f in self.im_files]
+        self.read_time = 0.0  # cumulative seconds reading and resizing uncached images in this process
+        self.npy_files = self.disk_cache_files()
         self.cache = cache.lower() if isinstance(cache, str) else "ram" if cache is True else None
         if self.cache == "ram" and self.check_cache_ram():
             if hyp.deterministic:
@@ -131,6 +159,10 @@ class BaseDataset(Dataset):
 
     def update_labels(self, include_class: Optional[list]):
         """Update labels to include only these classes (optional)."""
+        if isinstance(self.labels, LabelStore):  # columnar labels, filtered without materializing label dicts
+            if include_class is not None or self.single_cls:
+                self.labels = self.labels.filter_instances(include_class, self.single_cls)
+            return
         include_class_array = np.array(include_class).reshape(1, -1)
         for i in range(len(self.labels)):
             if include_class is not None:
@@ -148,50 +180,129 @@ class BaseDataset(Dataset):
             if self.single_cls:
                 self.labels[i]["cls"][:, 0] = 0
 
+    def get_band_lut(self, band_stats):
+        """
+        Load or compute once the dataset band statistics and return their per-band uint8 lookup table.
+
+        Args:
+            band_stats (bool | str): False to disable, True to use a '*.bandstats' sidecar next to the labels '*.cache',
+                or a path to a sidecar shared between splits (computed from this dataset if it does not exist).
+
+        Returns:
+            (np.ndarray | None): Lookup table of shape (n_bands, n_bins), or None if disabled or not applicable.
+        """
+        if not band_stats:
+            return None
+        shared = isinstance(band_stats, (str, Path))
+        label_dir = Path(img2label_paths(self.im_files[:1])[0]).parent
+        path = Path(band_stats) if shared else label_dir.with_suffix(".bandstats")  # next to the labels *.cache
+        try:
+            stats = load_dataset_cache_file(path)
+            assert stats["version"] == BAND_STATS_VERSION  # matches current version
+            assert shared or stats["hash"] == get_hash(self.im_files)  # identical hash
+        except (FileNotFoundError, AssertionError, AttributeError):
+            stats = compute_band_stats(self.im_files, self.prefix)
+            if stats is None:
+                LOGGER.warning(f"{self.prefix}WARNING ⚠️ band_stats requires uint8/uint16 GeoTIFFs, using min/max")
+                return None
+            stats["hash"] = get_hash(self.im_files)
+            save_dataset_cache_file(self.prefix, path, stats, BAND_STATS_VERSION)
+        self.band_stats_file = path
+        return band_stats_lut(stats)
+
+    def get_shard(self):
+        """Return the TileShard packed next to the image directory, or None if there is none or its stretch differs."""
+        data_file, index_file = shard_paths(Path(self.im_files[0]).parent)
+        if not (data_file.exists() and index_file.exists()):
+            return None
+        try:
+            shard = TileShard(data_file)
+        except Exception as e:
+            LOGGER.warning(f"{self.prefix}WARNING ⚠️ Ignoring tile shard {data_file} due to: {e}")
+            return None
+        if shard.lut_hash != band_lut_hash(self.band_lut):  # tiles would be scaled differently from GeoTIFF reads
+            LOGGER.warning(
+                f"{self.prefix}WARNING ⚠️ Ignoring tile shard {data_file} packed with a different band_stats stretch, "
+                f"re-pack it with pack_paired_shard(..., band_stats=...) matching this dataset"
+            )
+            return None
+        n = sum(os.path.basename(f) in shard for f in self.im_files)
+        LOGGER.info(f"{self.prefix}Using tile shard {data_file} for {n}/{len(self.im_files)} images")
+        return shard
+
+    def read_image_file(self, f):
+        """
+        Decode image file 'f' to an HWC uint8 array, returns None if it can not be read.
+
+        Shard tiles and pre-fused *.npy files hold all dataset bands, while GeoTIFFs are read with the `readTif` default
+        of their first 3 bands, matching what the predictor reads from GeoTIFF sources.
+        """
+        if self.shard is not None and (name := os.path.basename(f)) in self.shard:  # packed multi-band tile
+            return self.shard.load(self.shard.names[name])
+        if f.lower().endswith(".tif"):  # GeoTIFF through GDAL
+            return read_image(f, mode="tif", lut=self.band_lut)[-1]
+        fn = Path(f).with_suffix(".npy")
+        if fn.exists():  # pre-fused multi-band *.npy next to the image
+            return np.load(fn)
+        return cv2.imread(f)  # BGR
+
     def load_image(self, i, rect_mode=True):
         """Loads 1 image from dataset index 'i', returns (im, resized hw)."""
         im, f, fn = self.ims[i], self.im_files[i], self.npy_files[i]
         if im is None:  # not cached in RAM
-            '''如果存在npy文件，则加载npy文件，否则读取图像文件'''
-            if fn.exists():  # load npy
+            t0 = time.perf_counter()
+            '''如果存在磁盘缓存，则直接加载已解码、已缩放的多波段npy文件，否则读取图像文件'''
+            if self.cache == "disk" and rect_mode and fn.exists():  # load resized *.npy
                 try:
-                    if f.lower().endswith(".tif"):  # load tif
-                        im_width, im_height, im_bands, projection, geotrans, im = read_image(f, mode="tif")  # 读取tif文件
-                    else:  # load npy
-                        im = np.load(fn)
+                    im = np.load(fn, mmap_mode="r").copy()  # page-cache backed read, writable for augmentations
+                    h0, w0 = self.labels[i]["shape"]  # orig hw
+                    if self.augment:
+                        self.ims[i], self.im_hw0[i], self.im_hw[i] = im, (h0, w0), im.shape[:2]
+                        self.buffer_image(i)
+                    self.read_time += time.perf_counter() - t0
+                    return im, (h0, w0), im.shape[:2]
                 except Exception as e:
                     LOGGER.warning(f"{self.prefix}WARNING ⚠️ Removing corrupt *.npy image file {fn} due to: {e}")
                     Path(fn).unlink(missing_ok=True)
-                    im = cv2.imread(f)  # BGR
-            else:  # read image
-                # im = cv2.imread(f)  # BGR
-                im_width, im_height, im_bands, projection, geotrans, im = read_image(f, mode="tif")  # 读取tif文件
-
+            im = self.read_image_file(f)
             if im is None:
                 raise FileNotFoundError(f"Image Not Found {f}")
 
             h0, w0 = im.shape[:2]  # orig hw
-            if rect_mode:  # resize long side to imgsz while maintaining aspect ratio
-                r = self.imgsz / max(h0, w0)  # ratio
-                if r != 1:  # if sizes are not equal
-                    w, h = (min(math.ceil(w0 * r), self.imgsz), min(math.ceil(h0 * r), self.imgsz))
-                    im = cv2.resize(im, (w, h), interpolation=cv2.INTER_LINEAR)
-            elif not (h0 == w0 == self.imgsz):  # resize by stretching image to square imgsz
-                im = cv2.resize(im, (self.imgsz, self.imgsz), interpolation=cv2.INTER_LINEAR)
+            im = self.resize_image(im, rect_mode)
+            if not im.flags.writeable:
+                im = im.copy()  # unresized zero-copy shard view, augmentations modify images in place
 
             # Add to buffer if training with augmentations
             if self.augment:
                 self.ims[i], self.im_hw0[i], self.im_hw[i] = im, (h0, w0), im.shape[:2]  # im, hw_original, hw_resized
-                self.buffer.append(i)
-                if 1 < len(self.buffer) >= self.max_buffer_length:  # prevent empty buffer
-                    j = self.buffer.pop(0)
-                    if self.cache != "ram":
-                        self.ims[j], self.im_hw0[j], self.im_hw[j] = None, None, None
+                self.buffer_image(i)
 
+            self.read_time += time.perf_counter() - t0
             return im, (h0, w0), im.shape[:2]
 
         return self.ims[i], self.im_hw0[i], self.im_hw[i]
 
+    def resize_image(self, im, rect_mode=True):
+        """Resize 'im' to imgsz, keeping aspect ratio if 'rect_mode' else stretching to a square."""
+        h0, w0 = im.shape[:2]  # orig hw
+        if rect_mode:  # resize long side to imgsz while maintaining aspect ratio
+            r = self.imgsz / max(h0, w0)  # ratio
+            if r != 1:  # if sizes are not equal
+                w, h = (min(math.ceil(w0 * r), self.imgsz), min(math.ceil(h0 * r), self.imgsz))
+                im = cv2.resize(im, (w, h), interpolation=cv2.INTER_LINEAR)
+        elif not (h0 == w0 == self.imgsz):  # resize by stretching image to square imgsz
+            im = cv2.resize(im, (self.imgsz, self.imgsz), interpolation=cv2.INTER_LINEAR)
+        return im if im.ndim == 3 else im[..., None]  # cv2.resize drops the band axis of single-band images
+
+    def buffer_image(self, i):
+        """Append index 'i' to the mosaic buffer, releasing the oldest buffered image unless caching to RAM."""
+        self.buffer.append(i)
+        if 1 < len(self.buffer) >= self.max_buffer_length:  # prevent empty buffer
+            j = self.buffer.pop(0)
+            if self.cache != "ram":
+                self.ims[j], self.im_hw0[j], self.im_hw[j] = None, None, None
+
     def cache_images(self):
         """Cache images to memory or disk."""
         b, gb = 0, 1 << 30  # bytes of cached images, bytes per gigabytes
@@ -209,28 +320,49 @@ class BaseDataset(Dataset):
             pbar.close()
 
     def cache_images_to_disk(self, i):
-        """Saves an image as an *.npy file for faster loading."""
+        """Saves a decoded, normalized and resized multi-band image as an uncompressed *.npy file for faster loading."""
         f = self.npy_files[i]
         if not f.exists():
-            np.save(f.as_posix(), cv2.imread(self.im_files[i]), allow_pickle=False)
+            im = self.resize_image(self.read_image_file(self.im_files[i]), rect_mode=True)
+            tmp = f.with_suffix(".tmp.npy")
+            np.save(tmp.as_posix(), np.ascontiguousarray(im), allow_pickle=False)
+            tmp.replace(f)  # atomic, a partially written file is never picked up by load_image
+
+    def disk_cache_files(self):
+        """Return *.npy disk cache paths, tagged with imgsz and band LUT so a changed setting never reads stale tiles."""
+        tag = str(self.imgsz)
+        if self.band_lut is not None:
+            tag += f"_{band_lut_hash(self.band_lut)}"
+        return [Path(f).with_suffix(f".{tag}.npy") for f in self.im_files]
+
+    def sample_image_bytes(self, n):
+        """Return the mean decoded and resized image size in bytes over 'n' random images, and the files sampled."""
+        b, files = 0, []
+        for _ in range(n):
+            im_file = random.choice(self.im_files)
+            im = self.read_image_file(im_file)
+            if im is None:
+                continue
+            ratio = self.imgsz / max(im.shape[0], im.shape[1])  # max(h, w)  # ratio
+            b += im.nbytes * ratio**2
+            files.append(im_file)
+        return b / max(len(files), 1), files
 
     def check_cache_disk(self, safety_margin=0.5):
         """Check image caching requirements vs available disk space."""
         import shutil
 
-        b, gb = 0, 1 << 30  # bytes of cached images, bytes per gigabytes
-        n = min(self.ni, 30)  # extrapolate from 30 random images
-        for _ in range(n):
-            im_file = random.choice(self.im_files)
-            im = cv2.imread(im_file)
-            if im is None:
-                continue
-            b += im.nbytes
-            if not os.access(Path(im_file).parent, os.W_OK):
-                self.cache = None
-                LOGGER.info(f"{self.prefix}Skipping caching images to disk, directory not writeable ⚠️")
-                return False
-        disk_required = b * self.ni / n * (1 + safety_margin)  # bytes required to cache dataset to disk
+        gb = 1 << 30  # bytes per gigabytes
+        if self.ni and "shape" not in self.labels[0]:
+            self.cache = None
+            LOGGER.info(f"{self.prefix}Skipping caching images to disk, labels do not record original shapes ⚠️")
+            return False
+        b, files = self.sample_image_bytes(min(self.ni, 30))  # extrapolate from 30 random images
+        if not all(os.access(Path(im_file).parent, os.W_OK) for im_file in files):
+            self.cache = None
+            LOGGER.info(f"{self.prefix}Skipping caching images to disk, directory not writeable ⚠️")
+            return False
+        disk_required = b * self.ni * (1 + safety_margin)  # bytes required to cache dataset to disk
         total, used, free = shutil.disk_usage(Path(self.im_files[0]).parent)
         if disk_required > free:
             self.cache = None
@@ -244,15 +376,9 @@ class BaseDataset(Dataset):
 
     def check_cache_ram(self, safety_margin=0.5):
         """Check image caching requirements vs available memory."""
-        b, gb = 0, 1 << 30  # bytes of cached images, bytes per gigabytes
-        n = min(self.ni, 30)  # extrapolate from 30 random images
-        for _ in range(n):
-            im = cv2.imread(random.choice(self.im_files))  # sample image
-            if im is None:
-                continue
-            ratio = self.imgsz / max(im.shape[0], im.shape[1])  # max(h, w)  # ratio
-            b += im.nbytes * ratio**2
-        mem_required = b * self.ni / n * (1 + safety_margin)  # GB required to cache dataset into RAM
+        gb = 1 << 30  # bytes per gigabytes
+        b, _ = self.sample_image_bytes(min(self.ni, 30))  # extrapolate from 30 random images
+        mem_required = b * self.ni * (1 + safety_margin)  # GB required to cache dataset into RAM
         mem = psutil.virtual_memory()
         if mem_required > mem.available:
             self.cache = None
@@ -269,11 +395,17 @@ class BaseDataset(Dataset):
         bi = np.floor(np.arange(self.ni) / self.batch_size).astype(int)  # batch index
         nb = bi[-1] + 1  # number of batches
 
-        s = np.array([x.pop("shape") for x in self.labels])  # hw
+        if isinstance(self.labels, LabelStore):
+            s = self.labels.shape[self.labels.rows]  # hw, kept for the resized disk cache
+        else:
+            s = np.array([x["shape"] for x in self.labels])
         ar = s[:, 0] / s[:, 1]  # aspect ratio
         irect = ar.argsort()
         self.im_files = [self.im_files[i] for i in irect]
-        self.labels = [self.labels[i] for i in irect]
+        if isinstance(self.labels, LabelStore):
+            self.labels = self.labels.select(irect)
+        else:
+            self.labels = [self.labels[i] for i in irect]
         ar = ar[irect]
 
         # Set training image shapes
@@ -290,12 +422,19 @@ class BaseDataset(Dataset):
         self.batch = bi  # batch index of image
 
     def __getitem__(self, index):
-        """Returns transformed label information for given index."""
-        return self.transforms(self.get_image_and_label(index))
+        """Returns transformed label information for given index, with its (read, augment) seconds under 'times'."""
+        t0, read = time.perf_counter(), self.read_time
+        label = self.transforms(self.get_image_and_label(index))
+        read = self.read_time - read  # includes the extra images loaded by mosaic and mixup
+        label["times"] = read, time.perf_counter() - t0 - read  # summed per batch by collate_fn, see StepTimer
+        return label
 
     def get_image_and_label(self, index):
         """Get and return label information from the dataset."""
-        label = deepcopy(self.labels[index])  # requires deepcopy() https://github.com/ultralytics/ultralytics/pull/1948
+        if isinstance(self.labels, LabelStore):
+            label = self.labels.get(index)  # per-sample dict owning copies of its arrays
+        else:
+            label = deepcopy(self.labels[index])  # requires deepcopy() https://github.com/ultralytics/ultralytics/pull/1948
         label.pop("shape", None)  # shape is for rect, remove it
         label["img"], label["ori_shape"], label["resized_shape"] = self.load_image(index)
         label["ratio_pad"] = (
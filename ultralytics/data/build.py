@@ -55,6 +55,17 @@ class InfiniteDataLoader(dataloader.DataLoader):
                     w.terminate()
             self.iterator._shutdown_workers()  # cleanup
 
+    def queue_depth(self):
+        """Return the number of batches loaded by workers and waiting to be consumed, 0 when loading in-process."""
+        it = self.iterator
+        if not getattr(it, "_num_workers", 0):
+            return 0
+        try:
+            queued = it._data_queue.qsize()
+        except (AttributeError, NotImplementedError):  # multiprocessing.Queue.qsize() is not implemented on macOS
+            queued = 0
+        return queued + sum(len(v) == 2 for v in it._task_info.values())  # + received out of order
+
     def reset(self):
         """
         Reset iterator.
@@ -616,7 +616,9 @@ def yolo_bbox2segment(im_dir, save_dir=None, sam_model="sam_b.pt", device=None):
 
     LOGGER.info("Detection labels detected, generating segment labels by SAM model!")
     sam_model = SAM(sam_model)
-    for label in TQDM(dataset.labels, total=len(dataset.labels), desc="Generating segment labels"):
+    segments = {}  # image index -> SAM segments, labels of the LabelStore are read-only views
+    for j in TQDM(range(len(dataset.labels)), desc="Generating segment labels"):
+        label = dataset.labels.get(j)  # owned copies, scaling boxes must not touch the store
         h, w = label["shape"]
         boxes = label["bboxes"]
         if len(boxes) == 0:  # skip empty labels
@@ -625,16 +627,16 @@ def yolo_bbox2segment(im_dir, save_dir=None, sam_model="sam_b.pt", device=None):
         boxes[:, [1, 3]] *= h
         im = cv2.imread(label["im_file"])
         sam_results = sam_model(im, bboxes=xywh2xyxy(boxes), verbose=False, save=False, device=device)
-        label["segments"] = sam_results[0].masks.xyn
+        segments[j] = sam_results[0].masks.xyn
 
     save_dir = Path(save_dir) if save_dir else Path(im_dir).parent / "labels-segment"
     save_dir.mkdir(parents=True, exist_ok=True)
-    for label in dataset.labels:
+    for j, label in enumerate(dataset.labels):
         texts = []
         lb_name = Path(label["im_file"]).with_suffix(".txt").name
         txt_file = save_dir / lb_name
         cls = label["cls"]
-        for i, s in enumerate(label["segments"]):
+        for i, s in enumerate(segments.get(j, [])):
             if len(s) == 0:
                 continue
             line = (int(cls[i]), *s.reshape(-1))
@@ -1,6 +1,7 @@
 # Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
 
 import json
+import time
 from collections import defaultdict
 from itertools import repeat
 from multiprocessing.pool import ThreadPool
@@ -10,7 +11,7 @@ import cv2
 import numpy as np
 import torch
 from PIL import Image
-from torch.utils.data import ConcatDataset
+from torch.utils.data import ConcatDataset, get_worker_info
 
 from ultralytics.utils import LOCAL_RANK, NUM_THREADS, TQDM, colorstr
 from ultralytics.utils.ops import resample_segments
@@ -27,19 +28,22 @@ from .augment import (
     v8_transforms,
 )
 from .base import BaseDataset
+from .label_store import LabelStore, stat_files
 from .utils import (
     HELP_URL,
     LOGGER,
+    PIN_MEMORY,
     get_hash,
     img2label_paths,
+    imap_scan,
     load_dataset_cache_file,
     save_dataset_cache_file,
     verify_image,
     verify_image_label,
 )
 
-# Ultralytics dataset *.cache version, >= 1.0.0 for YOLOv8
-DATASET_CACHE_VERSION = "1.0.3"
+# Ultralytics dataset *.cache version, >= 1.0.0 for YOLOv8, >= 1.1.0 YOLODataset caches are LabelStore npz files
+DATASET_CACHE_VERSION = "1.1.0"
 
 
 class YOLODataset(BaseDataset):
@@ -63,110 +67,127 @@ class YOLODataset(BaseDataset):
         assert not (self.use_segments and self.use_keypoints), "Can not use both segments and keypoints."
         super().__init__(*args, **kwargs)
 
-    def cache_labels(self, path=Path("./labels.cache")):
+    def cache_labels(self, path=Path("./labels.cache"), cache=None):
         """
         Cache dataset labels, check images and read shapes.
 
+        Only images whose image or label file is new or changed (modification time or size) since 'cache' are verified,
+        all others are carried over from the previous label index.
+
         Args:
             path (Path): Path where to save the cache file. Default is Path("./labels.cache").
+            cache (LabelStore, optional): Previous label index loaded from 'path'.
 
         Returns:
-            (dict): labels.
+            (tuple[LabelStore, int]): Label index of `self.im_files` and the number of verified images.
         """
-        x = {"labels": []}
+        total = len(self.im_files)
+        im_stat, lb_stat = stat_files(self.im_files), stat_files(self.label_files)
+        rows = [None] * total
+        if cache is not None:
+            old = {f: j for j, f in enumerate(cache.im_files)}
+            for i, f in enumerate(self.im_files):
+                j = old.get(f)
+                if j is not None and (cache.im_stat[j] == im_stat[i]).all() and (cache.lb_stat[j] == lb_stat[i]).all():
+                    rows[i] = j
+            if len(cache) == total and rows == list(range(total)):
+                return cache, 0  # unchanged
+        todo = [i for i, r in enumerate(rows) if r is None]
+        rows = [cache.row(r) if r is not None else None for r in rows]
+
         nm, nf, ne, nc, msgs = 0, 0, 0, 0, []  # number missing, found, empty, corrupt, messages
+        for r in rows:
+            if r is not None:
+                nm, nf, ne, nc = np.add((nm, nf, ne, nc), r["status"]).tolist()
         desc = f"{self.prefix}Scanning {path.parent / path.stem}..."
-        total = len(self.im_files)
         nkpt, ndim = self.data.get("kpt_shape", (0, 0))
         if self.use_keypoints and (nkpt <= 0 or ndim not in {2, 3}):
             raise ValueError(
                 "'kpt_shape' in data.yaml missing or incorrect. Should be a list with [number of "
                 "keypoints, number of dims (2 for x,y or 3 for x,y,visible)], i.e. 'kpt_shape: [17, 3]'"
             )
-        with ThreadPool(NUM_THREADS) as pool:
-            results = pool.imap(
-                func=verify_image_label,
-                iterable=zip(
-                    self.im_files,
-                    self.label_files,
-                    repeat(self.prefix),
-                    repeat(self.use_keypoints),
-                    repeat(len(self.data["names"])),
-                    repeat(nkpt),
-                    repeat(ndim),
-                ),
-            )
-            pbar = TQDM(results, desc=desc, total=total)
-            for im_file, lb, shape, segments, keypoint, nm_f, nf_f, ne_f, nc_f, msg in pbar:
+        # Images are scanned from headers only, a sampled 'verify_fraction' is fully decoded to check pixel integrity
+        deep = np.random.default_rng(0).random(total) < getattr(self, "verify_fraction", 0.0)
+        results = imap_scan(
+            verify_image_label,
+            zip(
+                [self.im_files[i] for i in todo],
+                [self.label_files[i] for i in todo],
+                repeat(self.prefix),
+                repeat(self.use_keypoints),
+                repeat(len(self.data["names"])),
+                repeat(nkpt),
+                repeat(ndim),
+                deep[todo].tolist(),
+            ),
+            len(todo),
+        )
+        with TQDM(results, desc=desc, total=len(todo), unit="file") as pbar:  # files/s and ETA
+            for i, (im_file, lb, shape, meta, segments, keypoint, nm_f, nf_f, ne_f, nc_f, msg) in zip(todo, pbar):
                 nm += nm_f
                 nf += nf_f
                 ne += ne_f
                 nc += nc_f
-                if im_file:
-                    x["labels"].append(
-                        {
-                            "im_file": im_file,
-                            "shape": shape,
-                            "cls": lb[:, 0:1],  # n, 1
-                            "bboxes": lb[:, 1:],  # n, 4
-                            "segments": segments,
-                            "keypoints": keypoint,
-                            "normalized": True,
-                            "bbox_format": "xywh",
-                        }
-                    )
+                rows[i] = {
+                    "im_file": self.im_files[i],
+                    "im_stat": im_stat[i],
+                    "lb_stat": lb_stat[i],
+                    "status": (nm_f, nf_f, ne_f, nc_f),
+                    "msg": msg,
+                    "shape": shape,
+                    "cls": lb[:, 0:1] if im_file else None,  # n, 1
+                    "bboxes": lb[:, 1:] if im_file else None,  # n, 4
+                    "segments": segments or [],
+                    "keypoints": keypoint,
+                    "meta": meta,  # bands, dtype, nodata, geotrans
+                }
                 if msg:
                     msgs.append(msg)
                 pbar.desc = f"{desc} {nf} images, {nm + ne} backgrounds, {nc} corrupt"
-            pbar.close()
 
         if msgs:
             LOGGER.info("\n".join(msgs))
         if nf == 0:
             LOGGER.warning(f"{self.prefix}WARNING ⚠️ No labels found in {path}. {HELP_URL}")
-        x["hash"] = get_hash(self.label_files + self.im_files)
-        x["results"] = nf, nm, ne, nc, len(self.im_files)
-        x["msgs"] = msgs  # warnings
-        save_dataset_cache_file(self.prefix, path, x, DATASET_CACHE_VERSION)
-        return x
+        store = LabelStore.from_rows(rows)
+        store.save(path, DATASET_CACHE_VERSION, self.prefix)
+        return store, len(todo)
 
     def get_labels(self):
         """Returns dictionary of labels for YOLO training."""
         self.label_files = img2label_paths(self.im_files)
         cache_path = Path(self.label_files[0]).parent.with_suffix(".cache")
         try:
-            cache, exists = load_dataset_cache_file(cache_path), True  # attempt to load a *.cache file
-            assert cache["version"] == DATASET_CACHE_VERSION  # matches current version
-            assert cache["hash"] == get_hash(self.label_files + self.im_files)  # identical hash
-        except (FileNotFoundError, AssertionError, AttributeError):
-            cache, exists = self.cache_labels(cache_path), False  # run cache ops
+            cache = LabelStore.load(cache_path, DATASET_CACHE_VERSION)  # attempt to load a *.cache label index
+        except (FileNotFoundError, AssertionError, KeyError, ValueError, OSError):
+            cache = None  # missing, legacy pickled or other version
+        store, scanned = self.cache_labels(cache_path, cache)  # re-verify new or changed files only
 
         # Display cache
-        nf, nm, ne, nc, n = cache.pop("results")  # found, missing, empty, corrupt, total
-        if exists and LOCAL_RANK in {-1, 0}:
+        nm, nf, ne, nc = store.status.sum(0).tolist()  # missing, found, empty, corrupt
+        if not scanned and LOCAL_RANK in {-1, 0}:
             d = f"Scanning {cache_path}... {nf} images, {nm + ne} backgrounds, {nc} corrupt"
-            TQDM(None, desc=self.prefix + d, total=n, initial=n)  # display results
-            if cache["msgs"]:
-                LOGGER.info("\n".join(cache["msgs"]))  # display warnings
+            TQDM(None, desc=self.prefix + d, total=len(store), initial=len(store))  # display results
+            if msgs := store.messages:
+                LOGGER.info("\n".join(msgs))  # display warnings
 
         # Read cache
-        [cache.pop(k) for k in ("hash", "version", "msgs")]  # remove items
-        labels = cache["labels"]
-        if not labels:
+        labels = store.select(np.flatnonzero(store.status[:, 3] == 0))  # columnar, raster metadata in store.meta(row)
+        if not len(labels):
             LOGGER.warning(f"WARNING ⚠️ No images found in {cache_path}, training may not work correctly. {HELP_URL}")
-        self.im_files = [lb["im_file"] for lb in labels]  # update im_files
+        self.im_files = [store.im_files[j] for j in labels.rows]  # update im_files, strings shared with the store
 
         # Check if the dataset is all boxes or all segments
-        lengths = ((len(lb["cls"]), len(lb["bboxes"]), len(lb["segments"])) for lb in labels)
-        len_cls, len_boxes, len_segments = (sum(x) for x in zip(*lengths))
+        inst, _ = labels.instances()
+        len_cls = len_boxes = len(inst)
+        len_segments = int((store.seg_offsets[inst + 1] > store.seg_offsets[inst]).sum())
         if len_segments and len_boxes != len_segments:
             LOGGER.warning(
                 f"WARNING ⚠️ Box and segment counts should be equal, but got len(segments) = {len_segments}, "
                 f"len(boxes) = {len_boxes}. To resolve this only boxes will be used and all segments will be removed. "
                 "To avoid this please supply either a detect or segment dataset, not a detect-segment mixed dataset."
             )
-            for lb in labels:
-                lb["segments"] = []
+            labels = labels.filter_instances(segments=False)
         if len_cls == 0:
             LOGGER.warning(f"WARNING ⚠️ No labels found in {cache_path}, training may not work correctly. {HELP_URL}")
         return labels
@@ -190,6 +211,8 @@ class YOLODataset(BaseDataset):
                 mask_ratio=hyp.mask_ratio,
                 mask_overlap=hyp.overlap_mask,
                 bgr=hyp.bgr if self.augment else 0.0,  # only affect training.
+                bands=self.data.get("bands"),  # band layout, e.g. [B, G, R, NIR, SAR, SAR, SAR]
+                defer_channels=True,  # channel flip applied by collate_fn
             )
         )
         return transforms
@@ -230,23 +253,51 @@ class YOLODataset(BaseDataset):
 
     @staticmethod
     def collate_fn(batch):
-        """Collates data samples into batches."""
+        """Collates data samples into batches, copying the uint8 images once into a pinned batch tensor."""
+        t0 = time.perf_counter()
+        times = [b.pop("times", (0.0, 0.0)) for b in batch]  # per-sample (read, augment) seconds
+        channels = [b.pop("channels", None) for b in batch]  # deferred channel orders, see Format._view_img
         new_batch = {}
         keys = batch[0].keys()
         values = list(zip(*[list(b.values()) for b in batch]))
         for i, k in enumerate(keys):
             value = values[i]
             if k == "img":
-                value = torch.stack(value, 0)
+                value = YOLODataset.collate_images(value, channels)
             if k in {"masks", "keypoints", "bboxes", "cls", "segments", "obb"}:
                 value = torch.cat(value, 0)
             new_batch[k] = value
-        new_batch["batch_idx"] = list(new_batch["batch_idx"])
-        for i in range(len(new_batch["batch_idx"])):
-            new_batch["batch_idx"][i] += i  # add target image index for build_targets()
-        new_batch["batch_idx"] = torch.cat(new_batch["batch_idx"], 0)
+        # Target image index for build_targets()
+        counts = torch.tensor([len(x) for x in new_batch.pop("batch_idx")])
+        new_batch["batch_idx"] = torch.arange(len(batch), dtype=torch.float32).repeat_interleave(counts)
+        new_batch["times"] = (*map(sum, zip(*times)), time.perf_counter() - t0)  # read, augment, collate seconds
         return new_batch
 
+    @staticmethod
+    def collate_images(imgs, channels=None):
+        """
+        Copy (C, H, W) image tensors or views into one (B, C, H, W) batch tensor, gathering deferred channel orders.
+
+        The batch is allocated in pinned memory when loading in the main process of a CUDA machine, so the DataLoader
+        does not copy it again to pin it and `.to(device, non_blocking=True)` is a true asynchronous transfer. Pinned
+        blocks are recycled by the PyTorch caching host allocator once their transfer has completed.
+
+        Args:
+            imgs (List[torch.Tensor]): Per-sample image tensors of equal shape.
+            channels (List[torch.Tensor | None], optional): Per-sample channel order, None keeps the channels.
+
+        Returns:
+            (torch.Tensor): The batch tensor.
+        """
+        pin = PIN_MEMORY and torch.cuda.is_available() and get_worker_info() is None
+        out = torch.empty((len(imgs), *imgs[0].shape), dtype=imgs[0].dtype, pin_memory=pin)
+        for im, order, o in zip(imgs, channels or repeat(None), out):
+            if order is None:
+                o.copy_(im)
+            else:
+                torch.index_select(im, 0, order, out=o)
+        return out
+
 
 class YOLOMultiModalDataset(YOLODataset):
     """
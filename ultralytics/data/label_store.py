@@ -0,0 +1,312 @@
+# Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
+
+import os
+from collections import defaultdict
+
+import numpy as np
+
+from ultralytics.utils import LOGGER, is_dir_writeable
+
+
+def pack_strings(strings):
+    """Pack a list of strings into a UTF-8 uint8 blob and (N + 1,) byte offsets."""
+    encoded = [s.encode() for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def unpack_strings(blob, offsets):
+    """Unpack the list of strings packed by `pack_strings`."""
+    b = blob.tobytes()
+    return [b[i:j].decode() for i, j in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+def stat_files(paths):
+    """
+    Return the (mtime_ns, size) of each file, -1 for missing files, listing each parent directory only once.
+
+    Args:
+        paths (list[str]): File paths.
+
+    Returns:
+        (np.ndarray): File stats, shape (N, 2), int64.
+    """
+    stats = np.full((len(paths), 2), -1, dtype=np.int64)
+    by_dir = defaultdict(list)
+    for i, p in enumerate(paths):
+        d, name = os.path.split(p)
+        by_dir[d].append((i, name))
+    for d, items in by_dir.items():
+        try:
+            entries = {e.name: e for e in os.scandir(d or ".")}
+        except OSError:
+            continue  # missing directory, all files missing
+        for i, name in items:
+            if (e := entries.get(name)) is not None:
+                st = e.stat()
+                stats[i] = st.st_mtime_ns, st.st_size
+    return stats
+
+
+class LabelStore:
+    """
+    Columnar label index of a YOLO dataset, saved as one uncompressed '*.cache' npz without pickled objects.
+
+    All images share global `cls`/`bboxes` arrays sliced by per-image `offsets`, image paths are an interned UTF-8
+    table, and per-file stats (mtime, size) allow re-verifying only images and labels that changed. Label dicts are
+    built on demand as views into the global arrays.
+
+    A store may be a selection of rows (see `select`) sharing the columns of its parent; `len`, indexing and iteration
+    then follow the selection, while `row` and `meta` take raw row numbers.
+
+    Attributes:
+        paths (np.ndarray): UTF-8 blob of image file paths, sliced by `path_offsets`.
+        im_stat (np.ndarray): Image file (mtime_ns, size), shape (N, 2).
+        lb_stat (np.ndarray): Label file (mtime_ns, size), -1 if missing, shape (N, 2).
+        status (np.ndarray): Per-image (missing, found, empty, corrupt) label counts, shape (N, 4).
+        shape (np.ndarray): Original image (h, w), shape (N, 2).
+        offsets (np.ndarray): Instance offsets of each image into the instance arrays, shape (N + 1,).
+        cls (np.ndarray): Instance classes, shape (M, 1).
+        bboxes (np.ndarray): Instance normalized xywh boxes, shape (M, 4).
+        seg_offsets (np.ndarray): Point offsets of each instance into `seg_points`, shape (M + 1,).
+        seg_points (np.ndarray): Segment points, shape (P, 2).
+        keypoints (np.ndarray): Instance keypoints, shape (M, nkpt, ndim), or shape (0,) for datasets without keypoints.
+        bands (np.ndarray): Raster band count, -1 if unreadable, shape (N,).
+        nodata (np.ndarray): Raster nodata value, NaN if unset, shape (N,).
+        geotrans (np.ndarray): Raster GeoTransform, shape (N, 6).
+
+    Examples:
+        >>> store = LabelStore.load("datasets/mydata/labels/train.cache", "1.1.0")
+        >>> label = store[0]  # {"im_file", "shape", "cls", "bboxes", "segments", "keypoints", ...}
+        >>> valid = store.select(np.flatnonzero(store.status[:, 3] == 0))  # drop corrupt images
+    """
+
+    def __init__(self, _index=None, _im_files=None, **columns):
+        """Initialize from a dict of column arrays, see `from_rows`."""
+        self.__dict__.update(columns)
+        self._index = _index  # selected raw rows, None for all
+        self._im_files = _im_files
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Build a store from per-image row dicts.
+
+        Args:
+            rows (list[dict]): Rows with 'im_file', 'im_stat', 'lb_stat', 'status', 'msg' and, unless corrupt, 'shape',
+                'cls', 'bboxes', 'segments', 'keypoints' and 'meta' (see `verify_image_label`).
+
+        Returns:
+            (LabelStore): The columnar store.
+        """
+        empty = np.zeros((0, 1), dtype=np.float32)
+        cls_ = [r.get("cls") if r.get("cls") is not None else empty for r in rows]
+        bboxes = [r["bboxes"] if r.get("bboxes") is not None else empty.reshape(0, 4) for r in rows]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(c) for c in cls_])
+
+        # Segments: points of every instance concatenated, instances of images without segments have 0 points
+        seg_counts, seg_points = [], []
+        for r, c in zip(rows, cls_):
+            segments = r.get("segments") or []
+            seg_counts.extend([len(s) for s in segments] if segments else [0] * len(c))
+            seg_points.extend(segments)
+        seg_offsets = np.zeros(len(seg_counts) + 1, dtype=np.int64)
+        seg_offsets[1:] = np.cumsum(seg_counts)
+
+        kpts = [r.get("keypoints") for r in rows]
+        kpt_shape = next((k.shape[1:] for k in kpts if k is not None), None)
+        if kpt_shape is not None:
+            zeros = np.zeros((0, *kpt_shape), dtype=np.float32)
+            keypoints = np.concatenate([k if k is not None else zeros for k in kpts]).astype(np.float32)
+        else:
+            keypoints = np.zeros(0, dtype=np.float32)
+
+        meta = [r.get("meta") or {} for r in rows]
+        paths, path_offsets = pack_strings([r["im_file"] for r in rows])
+        msgs, msg_offsets = pack_strings([r.get("msg", "") for r in rows])
+        dtypes, dtype_offsets = pack_strings([m.get("dtype", "") for m in meta])
+        return cls(
+            paths=paths,
+            path_offsets=path_offsets,
+            msgs=msgs,
+            msg_offsets=msg_offsets,
+            im_stat=np.array([r["im_stat"] for r in rows], dtype=np.int64).reshape(-1, 2),
+            lb_stat=np.array([r["lb_stat"] for r in rows], dtype=np.int64).reshape(-1, 2),
+            status=np.array([r["status"] for r in rows], dtype=np.int8).reshape(-1, 4),
+            shape=np.array([r.get("shape") or (0, 0) for r in rows], dtype=np.int32).reshape(-1, 2),
+            offsets=offsets,
+            cls=np.concatenate(cls_).astype(np.float32) if rows else empty,
+            bboxes=np.concatenate(bboxes).astype(np.float32) if rows else empty.reshape(0, 4),
+            seg_offsets=seg_offsets,
+            seg_points=np.concatenate(seg_points).astype(np.float32) if seg_points else np.zeros((0, 2), np.float32),
+            keypoints=keypoints,
+            bands=np.array([m.get("bands", -1) for m in meta], dtype=np.int16),
+            dtypes=dtypes,
+            dtype_offsets=dtype_offsets,
+            nodata=np.array([np.nan if m.get("nodata") is None else m["nodata"] for m in meta], dtype=np.float64),
+            geotrans=np.array([m.get("geotrans") or (0.0,) * 6 for m in meta], dtype=np.float64).reshape(-1, 6),
+        )
+
+    @classmethod
+    def load(cls, path, version):
+        """Load a store saved by `save`, raising AssertionError if it is not a store of 'version'."""
+        data = np.load(str(path))  # no allow_pickle, legacy pickled *.cache dicts raise ValueError
+        assert hasattr(data, "files") and str(data["version"]) == version, f"{path} is not a {version} label store"
+        columns = {k: data[k] for k in data.files if k != "version"}
+        data.close()
+        return cls(**columns)
+
+    def save(self, path, version, prefix=""):
+        """Atomically save the store to 'path' as an uncompressed npz."""
+        if not is_dir_writeable(path.parent):
+            LOGGER.warning(f"{prefix}WARNING ⚠️ Cache directory {path.parent} is not writeable, cache not saved.")
+            return
+        tmp = path.with_name(f"{path.name}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, version=np.array(version), **self.columns)
+        os.replace(tmp, path)
+        LOGGER.info(f"{prefix}New cache created: {path}")
+
+    @property
+    def columns(self):
+        """Dict of the column arrays."""
+        return {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+
+    @property
+    def rows(self):
+        """Raw row numbers of the selected images."""
+        return np.arange(len(self.status)) if self._index is None else self._index
+
+    def __len__(self):
+        """Return the number of selected images."""
+        return len(self.status) if self._index is None else len(self._index)
+
+    def __iter__(self):
+        """Iterate over the label dicts of the selected images."""
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def im_files(self):
+        """List of image file paths of all raw rows, decoded once on first access."""
+        if self._im_files is None:
+            self._im_files = unpack_strings(self.paths, self.path_offsets)
+        return self._im_files
+
+    @property
+    def counts(self):
+        """Number of instances of each selected image."""
+        rows = self.rows
+        return self.offsets[rows + 1] - self.offsets[rows]
+
+    def instances(self, rows=None):
+        """Return the instance indices of raw 'rows' (default: the selected images) and the raw row of each instance."""
+        rows = self.rows if rows is None else rows
+        starts = self.offsets[rows]
+        counts = self.offsets[rows + 1] - starts
+        return np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum()), np.repeat(rows, counts)
+
+    def select(self, indices):
+        """Return a store of the selected images 'indices' (positions in this store), sharing its columns."""
+        index = self.rows[np.asarray(indices, dtype=np.int64)]
+        return LabelStore(_index=index, _im_files=self._im_files, **self.columns)
+
+    @property
+    def messages(self):
+        """List of non-empty verification warnings."""
+        return [m for m in unpack_strings(self.msgs, self.msg_offsets) if m]
+
+    def __getitem__(self, i):
+        """Return the label dict of selected image 'i', with views into the global instance arrays."""
+        return self._label(i if self._index is None else self._index[i])
+
+    def get(self, i):
+        """Return a label dict of selected image 'i' owning copies of its arrays, safe for in-place augmentation."""
+        label = self[i]
+        label["cls"], label["bboxes"] = label["cls"].copy(), label["bboxes"].copy()
+        label["segments"] = [s.copy() for s in label["segments"]]
+        if label["keypoints"] is not None:
+            label["keypoints"] = label["keypoints"].copy()
+        return label
+
+    def _label(self, i):
+        """Return the label dict of raw row 'i'."""
+        a, b = self.offsets[i], self.offsets[i + 1]
+        segments = []
+        if self.seg_offsets[b] > self.seg_offsets[a]:
+            so = self.seg_offsets
+            segments = [self.seg_points[so[k] : so[k + 1]] for k in range(a, b)]
+        return {
+            "im_file": self.im_files[i],
+            "shape": tuple(self.shape[i].tolist()),
+            "cls": self.cls[a:b],  # n, 1
+            "bboxes": self.bboxes[a:b],  # n, 4
+            "segments": segments,
+            "keypoints": self.keypoints[a:b] if self.keypoints.ndim == 3 else None,
+            "normalized": True,
+            "bbox_format": "xywh",
+        }
+
+    def meta(self, i):
+        """Return the raster metadata dict of raw row 'i', see `read_image_header`."""
+        s = self.dtype_offsets
+        return {
+            "shape": tuple(self.shape[i].tolist()),
+            "bands": int(self.bands[i]),
+            "dtype": self.dtypes[s[i] : s[i + 1]].tobytes().decode(),
+            "nodata": None if np.isnan(self.nodata[i]) else float(self.nodata[i]),
+            "geotrans": tuple(self.geotrans[i].tolist()),
+        }
+
+    def row(self, i):
+        """Return raw row 'i' as a row dict accepted by `from_rows`, used to carry unchanged images over."""
+        label = self._label(i)
+        m = self.msg_offsets
+        label.update(
+            im_stat=self.im_stat[i],
+            lb_stat=self.lb_stat[i],
+            status=self.status[i],
+            msg=self.msgs[m[i] : m[i + 1]].tobytes().decode(),
+            meta=self.meta(i) if self.bands[i] >= 0 else None,
+        )
+        if self.status[i, 3]:  # corrupt
+            label.update(shape=None, cls=None, bboxes=None, segments=[], keypoints=None)
+        return label
+
+    def filter_instances(self, include_class=None, single_cls=False, segments=True):
+        """
+        Return a compacted store of the selected images keeping only instances of 'include_class'.
+
+        Args:
+            include_class (list, optional): Classes to keep, None keeps all.
+            single_cls (bool): Set all classes to 0.
+            segments (bool): Keep segments, False drops them from all instances.
+
+        Returns:
+            (LabelStore): Store with the same selection, whose instance arrays hold only the kept instances.
+        """
+        rows = np.sort(self.rows)  # instances are stored in raw row order
+        inst, rid = self.instances(rows)
+        if include_class is not None:
+            keep = np.isin(self.cls[inst, 0], np.asarray(include_class))
+            inst, rid = inst[keep], rid[keep]
+        offsets = np.zeros_like(self.offsets)
+        offsets[1:] = np.cumsum(np.bincount(rid, minlength=len(self.status)))
+
+        seg_counts = (self.seg_offsets[inst + 1] - self.seg_offsets[inst]) if segments else np.zeros(len(inst), int)
+        seg_starts = self.seg_offsets[inst]
+        points = np.repeat(seg_starts - np.cumsum(seg_counts) + seg_counts, seg_counts) + np.arange(seg_counts.sum())
+        seg_offsets = np.zeros(len(inst) + 1, dtype=np.int64)
+        seg_offsets[1:] = np.cumsum(seg_counts)
+
+        columns = self.columns
+        columns.update(
+            offsets=offsets,
+            cls=np.zeros_like(self.cls[inst]) if single_cls else self.cls[inst],
+            bboxes=self.bboxes[inst],
+            seg_offsets=seg_offsets,
+            seg_points=self.seg_points[points],
+            keypoints=self.keypoints[inst] if self.keypoints.ndim == 3 else self.keypoints,
+        )
+        return LabelStore(_index=self._index, _im_files=self._im_files, **columns)
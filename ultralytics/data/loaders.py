@@ -5,20 +5,22 @@ import math
 import os
 import time
 from dataclasses import dataclass
+from multiprocessing.pool import ThreadPool
 from pathlib import Path
-from threading import Thread
+from threading import Thread, local
 from urllib.parse import urlparse
 
 import cv2
 import numpy as np
 import requests
 import torch
+from osgeo import gdal
 from PIL import Image
 
 from ultralytics.data.utils import FORMATS_HELP_MSG, IMG_FORMATS, VID_FORMATS
-from ultralytics.utils import IS_COLAB, IS_KAGGLE, LOGGER, ops
+from ultralytics.utils import IS_COLAB, IS_KAGGLE, LOGGER, NUM_THREADS, ops
 from ultralytics.utils.checks import check_requirements
-from ultralytics.data.utils import read_image
+from ultralytics.data.utils import read_image, readTif, tif_band_list
 
 
 @dataclass
@@ -300,6 +302,7 @@ class LoadImagesAndVideos:
         frames (int): Total number of frames in the video.
         count (int): Counter for iteration, initialized at 0 during __iter__().
         ni (int): Number of images.
+        band_lut (np.ndarray, optional): Per-band uint8 lookup table applied to GeoTIFF images.
 
     Methods:
         __init__: Initialize the LoadImagesAndVideos object.
@@ -357,6 +360,7 @@ class LoadImagesAndVideos:
         self.mode = "video" if ni == 0 else "image"  # default to video if no images
         self.vid_stride = vid_stride  # video frame-rate stride
         self.bs = batch
+        self.band_lut = None  # optional persistent band statistics lookup table, see BaseDataset.get_band_lut
         if any(videos):
             self._new_video(videos[0])  # new video
         else:
@@ -424,7 +428,7 @@ class LoadImagesAndVideos:
                     # im0 = cv2.imread(path)  # BGR
                     # 读取npy文件
                     # im0 = np.load(path.replace('.tif', '.npy'))
-                    im_width, im_height, im_bands, projection, geotrans, im0 = read_image(path, mode="tif")  # 读取tif文件
+                    im_width, im_height, im_bands, projection, geotrans, im0 = read_image(path, mode="tif", lut=self.band_lut)  # 读取tif文件
                 if im0 is None:
                     LOGGER.warning(f"WARNING ⚠️ Image Read Error {path}")
                 else:
@@ -451,6 +455,146 @@ class LoadImagesAndVideos:
         return math.ceil(self.nf / self.bs)  # number of batches
 
 
+class LoadRasterWindows:
+    """
+    Stream overlapping windows of a large GeoTIFF scene, optionally fused with a co-registered SAR scene.
+
+    Windows are read straight from the source rasters with `readTif`, so no intermediate tile dataset is written to disk.
+    Each reader thread opens the rasters once and keeps them open for all of its windows. The next batch is decoded by
+    a thread pool while the current one is being processed, and at most two batches are held in memory at once.
+
+    Attributes:
+        path (str): Optical (GF2) scene path.
+        sar (str | None): SAR (GF3) scene path on the same pixel grid, or None.
+        tile (int): Window size in pixels.
+        stride (int): Step between window origins in pixels.
+        width (int): Scene width in pixels.
+        height (int): Scene height in pixels.
+        projection (str): Scene projection WKT.
+        geotrans (tuple): Scene GDAL GeoTransform.
+        windows (list[tuple]): Window (xoff, yoff, xsize, ysize) in scene pixels, those outside the SAR scene dropped.
+        offsets (list[tuple]): Window (xoff, yoff) of each image in the last returned batch.
+        band_lut (np.ndarray, optional): Per-band uint8 lookup table, rows of the optical bands followed by those of
+            the SAR bands if it was computed on fused tiles.
+
+    Examples:
+        >>> loader = LoadRasterWindows("GF2_scene.tif", sar="GF3_scene.tif", tile=416, overlap=0.2, batch=8)
+        >>> for paths, imgs, info in loader:
+        ...     offsets = loader.offsets  # scene pixel origin of each window in imgs
+    """
+
+    def __init__(self, path, sar=None, tile=640, overlap=0.2, batch=1, bands=4, sar_bands=(0,), sar_repeat=3):
+        """Initialize the window grid of 'path', with windows of 'tile' pixels overlapping by 'overlap' (fraction)."""
+        assert 0 <= overlap < 1, f"overlap={overlap} must be in [0, 1)"
+        self.path, self.sar = str(path), sar and str(sar)
+        self.bands, self.sar_bands, self.sar_repeat = bands, list(sar_bands), sar_repeat
+        self.bs = batch
+        self.band_lut = None  # optional persistent band statistics lookup table, see BaseDataset.get_band_lut
+        self.source_type = SourceTypes(from_img=True)
+        self.mode = "image"
+        self.offsets = []
+        self._datasets = local()  # per-thread open (optical, SAR) datasets, GDAL handles are not thread-safe
+
+        dataset = gdal.Open(self.path, gdal.GA_ReadOnly)
+        if dataset is None:
+            raise FileNotFoundError(f"Unable to open {self.path}")
+        self.width, self.height = dataset.RasterXSize, dataset.RasterYSize
+        self.projection, self.geotrans = dataset.GetProjection(), dataset.GetGeoTransform()
+        self.n_bands = len(tif_band_list(dataset.RasterCount, bands))  # optical channels, SAR LUT rows follow them
+        dataset = None  # close
+        self.sar_offset, self.sar_size = self.get_sar_grid() if self.sar else ((0, 0), None)
+
+        # 窗口网格，最后一行/列窗口贴齐影像边缘，保证所有窗口尺寸一致
+        self.tile = tile
+        self.stride = max(int(tile * (1 - overlap)), 1)
+        xs, ys = (self.grid(n, tile, self.stride) for n in (self.width, self.height))
+        self.windows = [(x, y, min(tile, self.width), min(tile, self.height)) for y in ys for x in xs]
+        if self.sar:  # GF3 景可能只覆盖 GF2 景的一部分，丢弃完全不相交的窗口，部分相交的窗口读取时补零
+            n = len(self.windows)
+            self.windows = [w for w in self.windows if self.sar_window(w)[2:] != (0, 0)]
+            assert self.windows, f"{self.sar} does not overlap {self.path}"
+            if len(self.windows) < n:
+                LOGGER.info(f"Skipping {n - len(self.windows)}/{n} windows outside {self.sar}")
+
+    @staticmethod
+    def grid(n, tile, stride):
+        """Return window origins covering 'n' pixels, the last window aligned to the far edge."""
+        if n <= tile:
+            return [0]
+        origins = list(range(0, n - tile, stride))
+        return origins + [n - tile]
+
+    def get_sar_grid(self):
+        """Return the (x, y) pixel offset of the optical origin in the SAR scene on the same grid and the SAR (w, h)."""
+        dataset = gdal.Open(self.sar, gdal.GA_ReadOnly)
+        if dataset is None:
+            raise FileNotFoundError(f"Unable to open {self.sar}")
+        gt, size = dataset.GetGeoTransform(), (dataset.RasterXSize, dataset.RasterYSize)
+        dataset = None  # close
+        assert np.allclose(gt[1:3] + gt[4:6], self.geotrans[1:3] + self.geotrans[4:6]), (
+            f"{self.sar} pixel size {gt[1], gt[5]} differs from {self.path} {self.geotrans[1], self.geotrans[5]}, "
+            f"resample it first (see improcess_images/resample_1m_2m.py)"
+        )
+        return (round((self.geotrans[0] - gt[0]) / gt[1]), round((self.geotrans[3] - gt[3]) / gt[5])), size
+
+    def sar_window(self, window):
+        """Return the part of optical 'window' covered by the SAR scene as (xoff, yoff, xsize, ysize) in SAR pixels."""
+        x, y, w, h = window
+        x0, y0 = max(x + self.sar_offset[0], 0), max(y + self.sar_offset[1], 0)
+        x1 = min(x + self.sar_offset[0] + w, self.sar_size[0])
+        y1 = min(y + self.sar_offset[1] + h, self.sar_size[1])
+        return x0, y0, max(x1 - x0, 0), max(y1 - y0, 0)
+
+    def datasets(self):
+        """Return the (optical, SAR) datasets of the calling thread, opening them on its first window."""
+        ds = getattr(self._datasets, "ds", None)
+        if ds is None:
+            ds = tuple(p and gdal.Open(p, gdal.GA_ReadOnly) for p in (self.path, self.sar))
+            for p, d in zip((self.path, self.sar), ds):
+                if p and d is None:
+                    raise FileNotFoundError(f"Unable to open {p}")
+            self._datasets.ds = ds  # 线程结束时随线程局部存储一并关闭
+        return ds
+
+    def read_window(self, window):
+        """Read one window as an HWC uint8 image, GF2 bands followed by the repeated SAR bands, or None if blank."""
+        ds, sar_ds = self.datasets()
+        im = readTif(ds, self.bands, window=window, lut=self.band_lut)[-1]
+        if self.sar:
+            x, y, w, h = window
+            lut = None if self.band_lut is None else self.band_lut[self.n_bands :]  # SAR rows of a fused-tile LUT
+            sx, sy, sw, sh = self.sar_window(window)
+            sar = readTif(sar_ds, self.sar_bands, window=(sx, sy, sw, sh), lut=lut)[-1]
+            if (sw, sh) != (w, h):  # 窗口超出 SAR 覆盖范围，未覆盖部分补零
+                pad = np.zeros((h, w, sar.shape[2]), dtype=sar.dtype)
+                px, py = sx - x - self.sar_offset[0], sy - y - self.sar_offset[1]
+                pad[py : py + sh, px : px + sw] = sar
+                sar = pad
+            im = np.concatenate((im, *([sar] * self.sar_repeat)), axis=-1)  # (im1, im2, im2, im2)
+        return None if im.min() == im.max() else im  # 无效值/空白窗口
+
+    def __iter__(self):
+        """Yield batches of (paths, images, info), with the scene origin of each image in `self.offsets`."""
+        batches = [self.windows[i : i + self.bs] for i in range(0, len(self.windows), self.bs)]
+        with ThreadPool(NUM_THREADS) as pool:
+            pending = pool.map_async(self.read_window, batches[0])
+            for k, windows in enumerate(batches):
+                ims = pending.get()
+                if k + 1 < len(batches):
+                    pending = pool.map_async(self.read_window, batches[k + 1])  # 预读下一批
+                keep = [i for i, im in enumerate(ims) if im is not None]
+                if not keep:
+                    continue
+                self.offsets = [windows[i][:2] for i in keep]
+                n = len(self.windows)
+                info = [f"window {k * self.bs + i + 1}/{n} {self.path} {windows[i][:2]}: " for i in keep]
+                yield [self.path] * len(keep), [ims[i] for i in keep], info
+
+    def __len__(self):
+        """Returns the number of window batches."""
+        return math.ceil(len(self.windows) / self.bs)
+
+
 class LoadPilAndNumpy:
     """
     Load images from PIL and Numpy arrays for batch processing.
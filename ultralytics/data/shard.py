@@ -0,0 +1,175 @@
+# Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
+
+from itertools import repeat
+from multiprocessing.pool import ThreadPool
+from pathlib import Path
+
+import numpy as np
+from osgeo import gdal
+
+from ultralytics.data.utils import band_lut_hash, band_stats_lut, load_dataset_cache_file, readTif, tif_band_list
+from ultralytics.utils import LOGGER, NUM_THREADS, TQDM
+
+SHARD_VERSION = "1.2.0"  # *.shard.npy / *.shard.npz version
+
+
+def shard_paths(path):
+    """Return the (data, index) file paths of the shard stored next to image directory or shard file 'path'."""
+    path = Path(path)
+    stem = path.parent / path.name.split(".shard")[0]
+    return stem.with_name(f"{stem.name}.shard.npy"), stem.with_name(f"{stem.name}.shard.npz")
+
+
+class TileShard:
+    """
+    Read-only store of many HWC uint8 tiles packed into one contiguous memory-mapped file.
+
+    The data file is a flat uint8 '*.shard.npy' array and the '*.shard.npz' index holds per-tile names, byte offsets and
+    stored shapes, an output channel map so that repeated bands (e.g. a single SAR band fed to a 3-channel branch) are
+    stored once and expanded on read, and the hash of the band lookup table the tiles were stretched with. The memory
+    map is opened lazily per process, so pickling a TileShard into dataloader workers never copies the data.
+
+    Attributes:
+        file (Path): Path of the '*.shard.npy' data file.
+        names (dict): Mapping from tile file name to tile index.
+        offsets (np.ndarray): Byte offset of each tile in the data file, shape (N,).
+        shapes (np.ndarray): Stored (h, w, c) shape of each tile, shape (N, 3).
+        channels (np.ndarray): Stored band index of each output channel.
+        lut_hash (str): `band_lut_hash` of the band lookup table used when packing, '' for per-tile min/max.
+        identity (bool): Whether the channel map is the identity, i.e. `load()` returns views without a gather.
+
+    Examples:
+        >>> shard = TileShard("datasets/train/images.shard.npy")
+        >>> im = shard.load(shard.names["tile_0_0.tif"])  # (h, w, len(shard.channels)) uint8
+    """
+
+    def __init__(self, path):
+        """Load the shard index for data file or image directory 'path'."""
+        self.file, index_file = shard_paths(path)
+        index = np.load(index_file)
+        assert str(index["version"]) == SHARD_VERSION, f"shard {index_file} version mismatch, please re-pack"
+        self.names = {str(n): i for i, n in enumerate(index["names"])}
+        self.offsets, self.shapes, self.channels = index["offsets"], index["shapes"], index["channels"]
+        self.lut_hash = str(index["lut_hash"])
+        n = len(self.channels)
+        self.identity = bool((self.channels == np.arange(n)).all() and (self.shapes[:, 2] == n).all())
+        self._data = None
+
+    def __getstate__(self):
+        """Drop the memory map when pickled, workers re-open it on first access."""
+        state = self.__dict__.copy()
+        state["_data"] = None
+        return state
+
+    def __len__(self):
+        """Return the number of tiles in the shard."""
+        return len(self.offsets)
+
+    def __contains__(self, name):
+        """Return True if a tile with file name 'name' is stored in the shard."""
+        return name in self.names
+
+    @property
+    def data(self):
+        """Flat read-only memory map of the data file."""
+        if self._data is None:
+            self._data = np.load(self.file, mmap_mode="r")
+        return self._data
+
+    def __getitem__(self, i):
+        """Return a zero-copy read-only (h, w, c) view of the stored bands of tile 'i'."""
+        h, w, c = self.shapes[i]
+        start = self.offsets[i]
+        return self.data[start : start + h * w * c].reshape(h, w, c)
+
+    def load(self, i):
+        """Return tile 'i' with its output channels, a view if no band is repeated else one gather copy."""
+        im = self[i]
+        return im if self.identity else im.take(self.channels, axis=2)
+
+
+def _read_pair(args):
+    """Read one GF2 tile and its paired GF3 tile, returning the stored HWC uint8 bands or None on failure."""
+    gf2_file, gf3_file, gf2_bands, sar_bands, lut = args
+    try:
+        im1 = readTif(str(gf2_file), gf2_bands, lut=lut)[-1]  # same stretch as BaseDataset GeoTIFF reads
+        im2 = readTif(str(gf3_file), sar_bands, lut=None if lut is None else lut[im1.shape[2] :])[-1]  # fused LUT rows
+        assert im1.shape[:2] == im2.shape[:2], f"GF2 {im1.shape[:2]} and GF3 {im2.shape[:2]} sizes differ"
+        return np.concatenate((im1, im2), axis=-1)
+    except Exception as e:
+        LOGGER.warning(f"WARNING ⚠️ {gf2_file}: skipping pair: {e}")
+        return None
+
+
+def pack_paired_shard(gf2_dir, gf3_dir, output=None, gf2_bands=4, sar_bands=(0,), sar_repeat=3, band_stats=None):
+    """
+    Pack paired GF2/GF3 GeoTIFF tiles into one memory-mapped shard readable by BaseDataset.
+
+    GF2 bands are stored followed by the SAR bands once, the index channel map repeats the SAR bands 'sar_repeat' times
+    on read, reproducing the (im1, im2, im2, im2) layout of the per-tile *.npy files without storing SAR three times.
+    Bands are stretched with the 'band_stats' lookup table if given, the SAR bands with its rows after the GF2 bands
+    when it was computed on fused tiles; BaseDataset only uses a shard whose stretch matches its own 'band_stats'.
+
+    Args:
+        gf2_dir (str | Path): Directory of GF2 tiles, also the training image directory.
+        gf3_dir (str | Path): Directory of GF3 tiles with the same file names as in 'gf2_dir'.
+        output (str | Path, optional): Shard data file, defaults to '<gf2_dir>.shard.npy'.
+        gf2_bands (int | list[int]): GF2 bands to read, see `tif_band_list`.
+        sar_bands (list[int]): 0-based GF3 band indices to store.
+        sar_repeat (int): Number of times the SAR bands are repeated in the output channels.
+        band_stats (str | Path, optional): '*.bandstats' sidecar of the training dataset, None for per-tile min/max.
+
+    Returns:
+        (Path): Path of the written shard data file.
+    """
+    gf2_dir, gf3_dir = Path(gf2_dir), Path(gf3_dir)
+    data_file, index_file = shard_paths(output or gf2_dir)
+    gf2_files = sorted(f for f in gf2_dir.glob("*.tif") if (gf3_dir / f.name).exists())
+    lut = band_stats_lut(load_dataset_cache_file(Path(band_stats))) if band_stats else None
+
+    # Pass 1: tile shapes from raster headers only, unreadable pairs are skipped
+    files, shapes = [], []
+    for f in gf2_files:
+        dataset, sar = (gdal.Open(str(p), gdal.GA_ReadOnly) for p in (f, gf3_dir / f.name))
+        if dataset is None or sar is None:
+            missing = f if dataset is None else gf3_dir / f.name
+            LOGGER.warning(f"WARNING ⚠️ {f}: skipping pair: unable to open {missing}")
+            continue
+        n1 = len(tif_band_list(dataset.RasterCount, gf2_bands))
+        files.append(f)
+        shapes.append((dataset.RasterYSize, dataset.RasterXSize, n1 + len(sar_bands)))  # tiles not matching are skipped
+        dataset = sar = None  # close
+    gf2_files = files
+    assert gf2_files, f"No paired *.tif tiles found in {gf2_dir} and {gf3_dir}"
+    shapes = np.array(shapes, dtype=np.int64)
+    sizes = shapes.prod(1)
+    offsets = np.concatenate(([0], sizes.cumsum()[:-1]))
+
+    # Pass 2: decode pairs straight into the contiguous memory map
+    data = np.lib.format.open_memmap(data_file, mode="w+", dtype=np.uint8, shape=(int(sizes.sum()),))
+    keep = np.zeros(len(gf2_files), dtype=bool)
+    with ThreadPool(NUM_THREADS) as pool:
+        gf3_files = (gf3_dir / f.name for f in gf2_files)
+        args = repeat(gf2_bands), repeat(list(sar_bands)), repeat(lut)
+        results = pool.imap(_read_pair, zip(gf2_files, gf3_files, *args))
+        for i, im in enumerate(TQDM(results, desc=f"Packing {data_file.name}", total=len(gf2_files))):
+            if im is not None and tuple(im.shape) == tuple(shapes[i]):
+                data[offsets[i] : offsets[i] + sizes[i]] = im.ravel()
+                keep[i] = True
+    data.flush()
+    del data
+
+    n_gf2 = int(shapes[0, 2]) - len(sar_bands)
+    channels = np.array(list(range(n_gf2)) + [n_gf2 + b for b in range(len(sar_bands))] * sar_repeat, dtype=np.int32)
+    np.savez(
+        index_file,
+        version=SHARD_VERSION,
+        names=np.array([f.name for f in gf2_files])[keep],
+        offsets=offsets[keep],
+        shapes=shapes[keep].astype(np.int32),
+        channels=channels,
+        lut_hash=band_lut_hash(lut),
+    )
+    gb = sizes[keep].sum() / (1 << 30)
+    LOGGER.info(f"Packed {keep.sum()}/{len(gf2_files)} tile pairs into {data_file} ({gb:.1f}GB)")
+    return data_file
@@ -2,12 +2,14 @@
 
 import hashlib
 import json
+import multiprocessing
 import os
 import random
 import subprocess
 import sys
 import time
 import zipfile
+from itertools import repeat
 from multiprocessing.pool import ThreadPool
 from pathlib import Path
 from tarfile import is_tarfile
@@ -40,7 +42,20 @@ HELP_URL = "See https://docs.ultralytics.com/datasets for dataset formatting gui
 IMG_FORMATS = {"bmp", "dng", "jpeg", "jpg", "mpo", "png", "tif", "tiff", "webp", "pfm", "heic"}  # image suffixes
 VID_FORMATS = {"asf", "avi", "gif", "m4v", "mkv", "mov", "mp4", "mpeg", "mpg", "ts", "wmv", "webm"}  # video suffixes
 PIN_MEMORY = str(os.getenv("PIN_MEMORY", True)).lower() == "true"  # global pin_memory for dataloaders
+BAND_STATS_VERSION = "1.0.0"  # *.bandstats sidecar version
+SCAN_PROCESSES = str(os.getenv("YOLO_SCAN_PROCESSES", False)).lower() == "true"  # opt-in process pool for label scans
+SCAN_PROCESS_MIN_FILES = 2000  # opted-in label scans of at least this many files verify on processes
 FORMATS_HELP_MSG = f"Supported formats are:\nimages: {IMG_FORMATS}\nvideos: {VID_FORMATS}"
+GDAL_NUMPY_DTYPES = {
+    "Byte": np.uint8,
+    "Int8": np.int8,
+    "UInt16": np.uint16,
+    "Int16": np.int16,
+    "UInt32": np.uint32,
+    "Int32": np.int32,
+    "Float32": np.float32,
+    "Float64": np.float64,
+}  # GDAL data type name -> numpy dtype
 
 
 def read_image(path, mode, **kwargs):
@@ -55,12 +70,16 @@ def read_image(path, mode, **kwargs):
         mode: 读取模式，tif/npy/img
         **kwargs: 其他参数
     '''
-    '''bands: 波段数默认为加载3波段图像'''
+    '''bands: 波段数(int)或波段索引列表(0-based)，默认为加载3波段图像'''
+    '''window: 读取窗口 (xoff, yoff, xsize, ysize)，默认为整幅影像'''
+    '''lut: 逐波段查找表，见 band_stats_lut'''
     bands = kwargs.get("bands", 3)
+    window = kwargs.get("window", None)
+    lut = kwargs.get("lut", None)
 
     if mode == "tif":
         if path.lower().endswith(".tif"):
-            im_width, im_height, im_bands, projection, geotrans, im0 = readTif(path, bands)
+            im_width, im_height, im_bands, projection, geotrans, im0 = readTif(path, bands, window, lut)
         return im_width, im_height, im_bands, projection, geotrans, im0
 
     elif mode == "npy":
@@ -76,13 +95,75 @@ def read_image(path, mode, **kwargs):
         raise ValueError(f"Unsupported mode: {mode}")
 
 
-def readTif(img_file_path, bands=3):
+def tif_band_list(im_bands, bands=3):
+    """
+    Resolve the GDAL band list (1-based) to read for a raster with `im_bands` bands.
+
+    Args:
+        im_bands (int): Number of bands in the raster.
+        bands (int | list[int]): Either a band count (3 -> first 3 bands, 4 -> first 4 bands, any other value -> all
+            bands) or an explicit list of 0-based band indices.
+
+    Returns:
+        (list[int]): 1-based band indices suitable for GDAL `band_list`.
+    """
+    if isinstance(bands, int):
+        if im_bands == 1:
+            return [1]
+        n = bands if bands in {3, 4} and im_bands >= bands else im_bands
+        return list(range(1, n + 1))
+    band_list = [int(b) + 1 for b in bands]
+    assert all(0 < b <= im_bands for b in band_list), f"band indices {list(bands)} out of range for {im_bands} bands"
+    return band_list
+
+
+def scale_to_uint8(img, lo=None, hi=None):
+    """
+    Linearly rescale an HWC raster buffer to uint8 in a single pass.
+
+    Uses `cv2.convertScaleAbs` (round-to-nearest with saturation), so no float64 intermediates are created. The
+    default range is the min/max over the whole buffer, matching the historical `readTif` normalization.
+
+    Args:
+        img (np.ndarray): HWC array of any integer or float dtype.
+        lo (float, optional): Value mapped to 0. Defaults to img.min().
+        hi (float, optional): Value mapped to 255. Defaults to img.max(). If both lo and hi are given, img is clipped
+            to [lo, hi] in place first.
+
+    Returns:
+        (np.ndarray): HWC uint8 array.
+    """
+    if lo is None or hi is None:
+        lo = float(img.min()) if lo is None else float(lo)
+        hi = float(img.max()) if hi is None else float(hi)
+    else:
+        lo, hi = float(lo), float(hi)
+        np.clip(img, lo, hi, out=img)  # explicit range, clip in place so convertScaleAbs never sees negatives
+    if img.dtype == np.uint8 and lo == 0 and hi == 255:
+        return img  # already in range, nothing to do
+    if img.dtype == np.uint32:
+        img = img.astype(np.float64)  # not an OpenCV depth
+    alpha = 255.0 / (hi - lo) if hi > lo else 0.0
+    h, w, c = img.shape
+    # convertScaleAbs supports up to CV_CN_MAX channels, flatten the band axis into width to be channel-agnostic
+    out = cv2.convertScaleAbs(img.reshape(h, w * c), alpha=alpha, beta=-lo * alpha)
+    return out.reshape(h, w, c)
+
+
+def readTif(img_file_path, bands=3, window=None, lut=None):
     """
     读取栅格数据，将其转换成对应数组
-    img_file_path: 栅格数据路径
+    img_file_path: 栅格数据路径，或已打开的 gdal.Dataset (由调用方负责关闭，便于逐窗口重复读取)
+    bands: 波段数(int)或波段索引列表(0-based)，见 tif_band_list
+    window: 读取窗口 (xoff, yoff, xsize, ysize)，默认为整幅影像
+    lut: 可选的逐波段查找表 (n_bands, n_bins)，见 band_stats_lut，替代逐幅影像的 min/max 拉伸
     :return: 返回投影，几何信息，和转换后的数组
+
+    Only the requested bands and window are read, directly into a pixel-interleaved (HWC) buffer of the raster's
+    native dtype, which is then rescaled to uint8 in one pass.
     """
-    dataset = gdal.Open(img_file_path)  # 读取栅格数据
+    opened = not isinstance(img_file_path, gdal.Dataset)
+    dataset = gdal.Open(img_file_path, gdal.GA_ReadOnly) if opened else img_file_path  # 读取栅格数据
     # 判断是否读取到数据
     if dataset is None:
         raise FileNotFoundError(f"Unable to open {img_file_path}")
@@ -91,30 +172,133 @@ def readTif(img_file_path, bands=3):
     im_width = dataset.RasterXSize  # 栅格矩阵的列数
     im_height = dataset.RasterYSize  # 栅格矩阵的行数
     im_bands = dataset.RasterCount  # 波段数
-    # print(im_bands)
-    # 直接读取dataset
-    img_array = dataset.ReadAsArray()
+    band_list = tif_band_list(im_bands, bands)
+    xoff, yoff, xsize, ysize = window or (0, 0, im_width, im_height)
+
+    # 按需读取波段与窗口，直接写入预分配的 HWC 缓冲区
+    dtype = gdal.GetDataTypeName(dataset.GetRasterBand(band_list[0]).DataType)
+    buf = np.empty((ysize, xsize, len(band_list)), dtype=GDAL_NUMPY_DTYPES.get(dtype, np.float32))
+    img_array = dataset.ReadAsArray(xoff, yoff, xsize, ysize, buf_obj=buf, band_list=band_list, interleave="pixel")
     if img_array is None:
-        raise ValueError(f"ReadAsArray failed for {img_file_path}")
-    # 归一化
-    if im_bands == 1:
-        img_array = np.tile(img_array, (3, 1, 1))
-    if bands == 3 and im_bands >= 3:
-        img_array = img_array[:3, :, :].copy()  # 取R G B三个波段
-        im_bands = 3
-    elif im_bands >= 4 and bands == 4:
-        img_array = img_array[:4, :, :]
-        im_bands = 4
-    '''校正后处理'''
-    imgScale = (img_array - np.min(img_array)) / (np.max(img_array) - np.min(img_array))
+        raise ValueError(f"ReadAsArray failed for {dataset.GetDescription()}")
+    if opened:
+        dataset = None  # close
 
-    img = np.round(imgScale * 255).astype(np.uint8)
-    # TIS GIU 使用
-    img = np.transpose(img, (1, 2, 0))
+    '''校正后处理'''
+    if lut is not None and buf.dtype in {np.dtype(np.uint8), np.dtype(np.uint16)} and lut.shape[0] >= im_bands:
+        img = apply_band_lut(buf, lut[np.asarray(band_list) - 1])  # 数据集统一的逐波段拉伸
+    else:
+        img = scale_to_uint8(buf)
+    if im_bands == 1 and isinstance(bands, int):
+        img = np.repeat(img, 3, axis=2)  # 单波段复制为3通道
+    im_bands = img.shape[2]
     # img = histEqualize(img)
     return im_width, im_height, im_bands, projection, geotrans, img
 
 
+def tif_band_histogram(args):
+    """Per-band value histogram (n_bands, n_bins) of one uint8/uint16 GeoTIFF, or None if it can not be read."""
+    im_file, nbins = args
+    dataset = gdal.Open(im_file, gdal.GA_ReadOnly)
+    if dataset is None:
+        return None
+    im = dataset.ReadAsArray()
+    dataset = None  # close
+    if im is None or im.dtype.itemsize > 2 or im.dtype.kind != "u":
+        return None
+    im = im.reshape(-1, im.shape[-2] * im.shape[-1])  # (n_bands, n_pixels)
+    return np.stack([np.bincount(b, minlength=nbins)[:nbins] for b in im])
+
+
+def compute_band_stats(im_files, prefix="", percentiles=(0.5, 99.5)):
+    """
+    Compute dataset-wide per-band histograms and percentile stretch limits of uint8/uint16 GeoTIFFs in one pass.
+
+    Args:
+        im_files (list[str]): GeoTIFF image files.
+        prefix (str, optional): Prefix for log messages.
+        percentiles (tuple[float, float], optional): Lower and upper percentiles mapped to 0 and 255.
+
+    Returns:
+        (dict | None): Statistics dict with 'hist' (n_bands, n_bins), 'lo', 'hi' (n_bands,) and 'percentiles', or None
+            if the images are not uint8/uint16 rasters.
+    """
+    dataset = gdal.Open(im_files[0], gdal.GA_ReadOnly)
+    if dataset is None:
+        raise FileNotFoundError(f"Unable to open {im_files[0]}")
+    nbins = {"Byte": 1 << 8, "UInt16": 1 << 16}.get(gdal.GetDataTypeName(dataset.GetRasterBand(1).DataType))
+    dataset = None  # close
+    if nbins is None:
+        return None
+
+    hist, nf, nc = None, 0, 0
+    desc = f"{prefix}Computing band statistics..."
+    with ThreadPool(NUM_THREADS) as pool:
+        results = pool.imap(tif_band_histogram, zip(im_files, repeat(nbins)))
+        pbar = TQDM(results, desc=desc, total=len(im_files))
+        for h in pbar:
+            if h is None or (hist is not None and h.shape != hist.shape):
+                nc += 1  # unreadable or band count mismatch
+            else:
+                hist = h.astype(np.int64) if hist is None else hist + h
+                nf += 1
+            pbar.desc = f"{desc} {nf} images, {nc} skipped"
+        pbar.close()
+    if hist is None:
+        return None
+
+    cdf = hist.cumsum(1)
+    lo, hi = (np.array([np.searchsorted(c, c[-1] * p / 100) for c in cdf]) for p in percentiles)
+    return {"hist": hist, "lo": lo, "hi": np.maximum(hi, lo + 1), "percentiles": tuple(percentiles)}
+
+
+def band_stats_lut(stats):
+    """Build a (n_bands, n_bins) uint8 lookup table that linearly stretches each band between its 'lo' and 'hi'."""
+    v = np.arange(stats["hist"].shape[1], dtype=np.float32)
+    lo, hi = stats["lo"][:, None].astype(np.float32), stats["hi"][:, None].astype(np.float32)
+    return np.clip(np.round((v - lo) * (255.0 / (hi - lo))), 0, 255).astype(np.uint8)
+
+
+def apply_band_lut(img, lut):
+    """Map an HWC uint8/uint16 image to uint8 with one table gather per band, lut has shape (n_bands, n_bins)."""
+    out = np.empty(img.shape, dtype=np.uint8)
+    for c in range(img.shape[2]):
+        out[..., c] = lut[c].take(img[..., c], mode="clip")
+    return out
+
+
+def band_lut_hash(lut):
+    """Return a short hash identifying band lookup table 'lut', or '' for the per-image min/max stretch (no table)."""
+    return "" if lut is None else hashlib.sha256(np.ascontiguousarray(lut).tobytes()).hexdigest()[:8]
+
+
+def channel_order(bands=None, n=3):
+    """
+    Return the channel indices gathered by the BGR to RGB flip of an n-channel image with band layout 'bands'.
+
+    Without a layout all channels are reversed, as for 3-channel BGR images and models trained before band layouts.
+    With a layout, e.g. `bands: [B, G, R, NIR, SAR, SAR, SAR]` in the data YAML, only the blue and red bands swap and
+    NIR and SAR bands keep their positions.
+
+    Args:
+        bands (list[str], optional): Names of the image channels in stored (HWC) order.
+        n (int): Number of image channels.
+
+    Returns:
+        (np.ndarray): Channel indices of shape (n,).
+    """
+    if not bands:
+        return np.arange(n - 1, -1, -1)
+    names = [str(b).upper() for b in bands]
+    assert len(names) == n, f"data 'bands' {bands} do not match the {n} image channels"
+    order = np.arange(n)
+    blue = [i for i, b in enumerate(names) if b in {"B", "BLUE"}]
+    red = [i for i, b in enumerate(names) if b in {"R", "RED"}]
+    if len(blue) == 1 and len(red) == 1:
+        order[[blue[0], red[0]]] = red[0], blue[0]
+    return order
+
+
 def img2label_paths(img_paths):
     """Define label paths as a function of image paths."""
     sa, sb = f"{os.sep}images{os.sep}", f"{os.sep}labels{os.sep}"  # /images/, /labels/ substrings
@@ -143,6 +327,48 @@ def exif_size(img: Image.Image):
     return s
 
 
+def read_image_header(im_file):
+    """
+    Read raster metadata without decoding any pixels.
+
+    GDAL only parses the file header on open; sibling files are not listed, so opening a tile in a directory of 200k
+    tiles costs one header read instead of a directory scan.
+
+    Args:
+        im_file (str): Image file path.
+
+    Returns:
+        (dict): Metadata with 'shape' (h, w), 'bands', 'dtype' (GDAL type name), 'nodata' and 'geotrans'.
+    """
+    # An empty sibling list is passed to GDAL as NULL, which lists the directory; name the file itself instead
+    dataset = gdal.OpenEx(im_file, gdal.OF_RASTER | gdal.OF_READONLY, sibling_files=[os.path.basename(im_file)])
+    if dataset is None:
+        raise FileNotFoundError(f"Unable to open {im_file}")
+    band = dataset.GetRasterBand(1)
+    meta = {
+        "shape": (dataset.RasterYSize, dataset.RasterXSize),
+        "bands": dataset.RasterCount,
+        "dtype": gdal.GetDataTypeName(band.DataType),
+        "nodata": band.GetNoDataValue(),
+        "geotrans": dataset.GetGeoTransform(),
+    }
+    dataset = None  # close
+    return meta
+
+
+def verify_image_pixels(im_file, meta):
+    """Decode all bands of 'im_file' and check them against header 'meta', returning a warning message or ''."""
+    dataset = gdal.Open(im_file, gdal.GA_ReadOnly)
+    im = dataset.ReadAsArray() if dataset is not None else None
+    dataset = None  # close
+    assert im is not None, "pixel data could not be decoded"
+    im = im.reshape(-1, *im.shape[-2:])
+    assert (len(im), *im.shape[1:]) == (meta["bands"], *meta["shape"]), f"decoded shape {im.shape} != header"
+    if im.dtype.kind == "f" and not np.isfinite(im).all():
+        return f"non-finite pixel values in {(~np.isfinite(im)).any((1, 2)).sum()} band(s)"
+    return ""
+
+
 def verify_image(args):
     """Verify one image."""
     (im_file, cls), prefix = args
@@ -150,9 +376,8 @@ def verify_image(args):
     nf, nc, msg = 0, 0, ""
     try:
         # im = Image.open(im_file)
-        im_width, im_height, im_bands, projection, geotrans, im = read_image(im_file, 'tif')
-        shape = exif_size(im)  # image size
-        shape = (shape[1], shape[0])  # hw
+        meta = read_image_header(im_file)  # 只读取影像头信息，不解码像素
+        shape = meta["shape"]  # hw
         # im.verify()  # PIL verify
         # shape = exif_size(im)  # image size
         # shape = (shape[1], shape[0])  # hw
@@ -173,14 +398,16 @@ def verify_image(args):
 
 def verify_image_label(args):
     """Verify one image-label pair."""
-    im_file, lb_file, prefix, keypoint, num_cls, nkpt, ndim = args
+    im_file, lb_file, prefix, keypoint, num_cls, nkpt, ndim, deep = args
     # Number (missing, found, empty, corrupt), message, segments, keypoints
     nm, nf, ne, nc, msg, segments, keypoints = 0, 0, 0, 0, "", [], None
     try:
         # Verify images
-        ''' 更改读取方式'''
-        im_width, im_height, im_bands, projection, geotrans, im = read_image(im_file, 'tif')
-        shape = (im_height, im_width)  # hw
+        ''' 更改读取方式: 只读取影像头信息 (尺寸/波段/类型/无效值/地理变换)，抽样的影像再完整解码校验'''
+        meta = read_image_header(im_file)
+        shape = meta["shape"]  # hw
+        if deep and (warning := verify_image_pixels(im_file, meta)):
+            msg = f"{prefix}WARNING ⚠️ {im_file}: {warning}"
         # im = Image.open(im_file)
         # im.verify()  # PIL verify
         # shape = exif_size(im)  # image size
@@ -238,11 +465,51 @@ def verify_image_label(args):
                 kpt_mask = np.where((keypoints[..., 0] < 0) | (keypoints[..., 1] < 0), 0.0, 1.0).astype(np.float32)
                 keypoints = np.concatenate([keypoints, kpt_mask[..., None]], axis=-1)  # (nl, nkpt, 3)
         lb = lb[:, :5]
-        return im_file, lb, shape, segments, keypoints, nm, nf, ne, nc, msg
+        return im_file, lb, shape, meta, segments, keypoints, nm, nf, ne, nc, msg
     except Exception as e:
         nc = 1
         msg = f"{prefix}WARNING ⚠️ {im_file}: ignoring corrupt image/label: {e}"
-        return [None, None, None, None, None, nm, nf, ne, nc, msg]
+        return [None, None, None, None, None, None, nm, nf, ne, nc, msg]
+
+
+def _init_scan_worker(cache_mb):
+    """Process pool initializer, a worker-local GDAL block cache and single-threaded decode per scan process."""
+    gdal.SetCacheMax(cache_mb << 20)
+    gdal.SetConfigOption("GDAL_NUM_THREADS", "1")  # parallelism comes from the processes
+
+
+def imap_scan(
+    func, iterable, total, workers=NUM_THREADS, processes=None, min_files=SCAN_PROCESS_MIN_FILES, cache_mb=64
+):
+    """
+    Lazily map a file verification function over 'iterable' in order, on a thread pool unless processes are opted in.
+
+    Label scans read image headers only, so threads scale well and are the default. Scans that fully decode images
+    can opt in to a process pool with 'processes=True' or YOLO_SCAN_PROCESSES=True; scans of at least 'min_files'
+    files then run on processes with about 8 chunks per worker. With the 'spawn' start method (Windows, macOS) workers
+    re-import '__main__', so the calling script must guard its entry point with `if __name__ == "__main__":`.
+
+    Args:
+        func (Callable): Picklable module-level function applied to each item, e.g. `verify_image_label`.
+        iterable (Iterable): Picklable arguments of 'func'.
+        total (int): Number of items in 'iterable'.
+        workers (int): Maximum number of pool workers.
+        processes (bool, optional): Use a process pool for large scans, defaults to SCAN_PROCESSES.
+        min_files (int): Minimum number of items to use a process pool.
+        cache_mb (int): GDAL block cache (MB) of each scan process.
+
+    Yields:
+        (Any): Results of 'func' in input order.
+    """
+    workers = max(1, min(workers, total))
+    processes = SCAN_PROCESSES if processes is None else processes
+    if not processes or total < min_files or workers == 1 or multiprocessing.current_process().daemon:
+        with ThreadPool(workers) as pool:
+            yield from pool.imap(func, iterable)
+        return
+    chunksize = max(1, min(64, total // (workers * 8)))  # few IPC round-trips, balanced tail
+    with multiprocessing.Pool(workers, initializer=_init_scan_worker, initargs=(cache_mb,)) as pool:
+        yield from pool.imap(func, iterable, chunksize=chunksize)
 
 
 def visualize_image_annotations(image_path, txt_path, label_map):
@@ -795,7 +1062,7 @@ def save_dataset_cache_file(prefix, path, x, version):
         if path.exists():
             path.unlink()  # remove *.cache file if exists
         np.save(str(path), x)  # save cache for next time
-        path.with_suffix(".cache.npy").rename(path)  # remove .npy suffix
+        path.with_suffix(path.suffix + ".npy").rename(path)  # remove .npy suffix
         LOGGER.info(f"{prefix}New cache created: {path}")
     else:
         LOGGER.warning(f"{prefix}WARNING ⚠️ Cache directory {path.parent} is not writeable, cache not saved.")
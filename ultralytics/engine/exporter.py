@@ -301,7 +301,7 @@ class Exporter:
             )
 
         # Input
-        im = torch.zeros(self.args.batch, 3, *self.imgsz).to(self.device)
+        im = torch.zeros(self.args.batch, getattr(model, "yaml", {}).get("ch", 3), *self.imgsz).to(self.device)
         file = Path(
             getattr(model, "pt_path", None) or getattr(model, "yaml_file", None) or model.yaml.get("yaml_file", "")
         )
@@ -380,6 +380,8 @@ class Exporter:
         }  # model metadata
         if model.task == "pose":
             self.metadata["kpt_shape"] = model.model[-1].kpt_shape
+        if getattr(model, "bands", None):
+            self.metadata["bands"] = model.bands  # band layout for the BGR to RGB flip
 
         LOGGER.info(
             f"\n{colorstr('PyTorch:')} starting from '{file}' with input shape {tuple(im.shape)} BCHW and "
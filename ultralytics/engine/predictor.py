@@ -42,6 +42,7 @@ import torch
 from ultralytics.cfg import get_cfg, get_save_dir
 from ultralytics.data import load_inference_source
 from ultralytics.data.augment import LetterBox, classify_transforms
+from ultralytics.data.utils import band_stats_lut, channel_order, load_dataset_cache_file
 from ultralytics.nn.autobackend import AutoBackend
 from ultralytics.utils import DEFAULT_CFG, LOGGER, MACOS, WINDOWS, callbacks, colorstr, ops
 from ultralytics.utils.checks import check_imgsz, check_imshow
@@ -123,9 +124,8 @@ class BasePredictor:
         not_tensor = not isinstance(im, torch.Tensor)
         if not_tensor:
             im = np.stack(self.pre_transform(im))
-            im = im[..., ::-1].transpose((0, 3, 1, 2))  # BGR to RGB, BHWC to BCHW, (n, 3, h, w)
-            im = np.ascontiguousarray(im)  # contiguous
-            im = torch.from_numpy(im)
+            order = torch.from_numpy(channel_order(getattr(self.model, "bands", None), im.shape[-1]))
+            im = torch.from_numpy(im).permute(0, 3, 1, 2).index_select(1, order)  # BGR to RGB, BHWC to BCHW
 
         im = im.to(self.device)
         im = im.half() if self.model.fp16 else im.float()  # uint8 to fp16/32
@@ -207,6 +207,8 @@ class BasePredictor:
             buffer=self.args.stream_buffer,
         )
         self.source_type = self.dataset.source_type
+        if hasattr(self.dataset, "band_lut"):
+            self.dataset.band_lut = self.get_band_lut()
         if not getattr(self, "stream", True) and (
             self.source_type.stream
             or self.source_type.screenshot
@@ -216,6 +218,23 @@ class BasePredictor:
             LOGGER.warning(STREAM_WARNING)
         self.vid_writer = {}
 
+    def get_band_lut(self):
+        """
+        Return the per-band uint8 lookup table to stretch GeoTIFF sources with, matching the training data.
+
+        A 'band_stats' path loads that '*.bandstats' sidecar. Otherwise the table saved with the model during training
+        is used; 'band_stats=True' without either warns and falls back to per-image min/max scaling.
+        """
+        if isinstance(self.args.band_stats, (str, Path)):
+            return band_stats_lut(load_dataset_cache_file(Path(self.args.band_stats)))
+        lut = getattr(self.model.model, "band_lut", None) if self.model.pt or self.model.nn_module else None
+        if lut is None and self.args.band_stats:
+            LOGGER.warning(
+                "WARNING ⚠️ band_stats=True but the model has no saved band statistics, using per-image min/max. "
+                "Pass band_stats='path/to/*.bandstats' to match the training scaling."
+            )
+        return lut
+
     @smart_inference_mode()
     def stream_inference(self, source=None, model=None, *args, **kwargs):
         """Streams real-time inference on camera feed and saves results to file."""
@@ -236,7 +255,9 @@ class BasePredictor:
 
             # Warmup model
             if not self.done_warmup:
-                self.model.warmup(imgsz=(1 if self.model.pt or self.model.triton else self.dataset.bs, 3, *self.imgsz))
+                self.model.warmup(
+                    imgsz=(1 if self.model.pt or self.model.triton else self.dataset.bs, self.model.ch, *self.imgsz)
+                )
                 self.done_warmup = True
 
             self.seen, self.windows, self.batch = 0, [], None
@@ -319,6 +340,8 @@ class BasePredictor:
         self.device = self.model.device  # update device
         self.args.half = self.model.fp16  # update half
         self.model.eval()
+        if self.model.pt or self.model.nn_module:
+            self.model.model.branch_parallel = self.args.branch_parallel  # concurrent input branches of fuse models
 
     def write_results(self, i, p, im, s):
         """Write inference results to a file or directory."""
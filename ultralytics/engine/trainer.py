@@ -12,7 +12,7 @@ import os
 import subprocess
 import time
 import warnings
-from copy import copy, deepcopy
+from copy import copy
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -43,10 +43,14 @@ from ultralytics.utils.dist import ddp_cleanup, generate_ddp_command
 from ultralytics.utils.files import get_latest_run
 from ultralytics.utils.torch_utils import (
     TORCH_2_4,
+    CheckpointWriter,
     EarlyStopping,
     ModelEMA,
+    StepTimer,
     autocast,
-    convert_optimizer_state_dict_to_fp16,
+    compile_layers,
+    cpu_threads,
+    de_parallel,
     init_seeds,
     one_cycle,
     select_device,
@@ -88,6 +92,9 @@ class BaseTrainer:
         tloss (float): Total loss value.
         loss_names (list): List of loss names.
         csv (Path): Path to results CSV file.
+        step_timer (StepTimer): Per-iteration stage timer of the training loop.
+        step_times (dict): Stage seconds, loader seconds and worker queue depth of the latest iteration.
+        step_stats (dict): Per-stage mean/p50/p95 milliseconds of the latest epoch, also saved to 'step_times.csv'.
     """
 
     def __init__(self, cfg=DEFAULT_CFG, overrides=None, _callbacks=None):
@@ -115,6 +122,8 @@ class BaseTrainer:
             self.args.save_dir = str(self.save_dir)
             yaml_save(self.save_dir / "args.yaml", vars(self.args))  # save run args
         self.last, self.best = self.wdir / "last.pt", self.wdir / "best.pt"  # checkpoint paths
+        self.ckpt_writer = CheckpointWriter()  # background checkpoint serialization
+        self.step_timer, self.step_times, self.step_stats = StepTimer(), {}, {}  # training loop instrumentation
         self.save_period = self.args.save_period
 
         self.batch_size = self.args.batch
@@ -144,6 +153,7 @@ class BaseTrainer:
         self.tloss = None
         self.loss_names = ["Loss"]
         self.csv = self.save_dir / "results.csv"
+        self.results = None  # results.csv columns kept in memory for checkpoints, loaded once on resume
         self.plot_idx = [0, 1, 2]
 
         # HUB
@@ -233,6 +243,8 @@ class BaseTrainer:
         self.run_callbacks("on_pretrain_routine_start")
         ckpt = self.setup_model()
         self.model = self.model.to(self.device)
+        if self.device.type == "cpu":
+            self.model = self.model.to(memory_format=torch.channels_last)  # NHWC convolutions run faster in oneDNN
         self.set_model_attributes()
 
         # Freeze layers
@@ -266,8 +278,10 @@ class BaseTrainer:
         if RANK > -1 and world_size > 1:  # DDP
             dist.broadcast(self.amp, src=0)  # broadcast the tensor from rank 0 to all other ranks (returns None)
         self.amp = bool(self.amp)  # as boolean
+        self.amp_device = "cpu" if self.device.type == "cpu" else "cuda"  # CPU AMP autocasts to bfloat16
+        scale = self.amp and self.amp_device == "cuda"  # bfloat16 has the FP32 exponent range, no loss scaling
         self.scaler = (
-            torch.amp.GradScaler("cuda", enabled=self.amp) if TORCH_2_4 else torch.cuda.amp.GradScaler(enabled=self.amp)
+            torch.amp.GradScaler("cuda", enabled=scale) if TORCH_2_4 else torch.cuda.amp.GradScaler(enabled=scale)
         )
         if world_size > 1:
             self.model = nn.parallel.DistributedDataParallel(self.model, device_ids=[RANK], find_unused_parameters=True)
@@ -285,6 +299,10 @@ class BaseTrainer:
         # Dataloaders
         batch_size = self.batch_size // max(world_size, 1)
         self.train_loader = self.get_dataloader(self.trainset, batch_size=batch_size, rank=LOCAL_RANK, mode="train")
+        # Saved with the model (and its EMA copy) so predict applies the same band stretch as training
+        de_parallel(self.model).band_lut = getattr(self.train_loader.dataset, "band_lut", None)
+        if self.args.band_stats is True and getattr(self.train_loader.dataset, "band_stats_file", None):
+            self.args.band_stats = str(self.train_loader.dataset.band_stats_file)  # val/test stretch with the train LUT
         if RANK in {-1, 0}:
             # Note: When training DOTA dataset, double batch size could get OOM on images with >2000 objects.
             self.test_loader = self.get_dataloader(
@@ -296,6 +314,11 @@ class BaseTrainer:
             self.ema = ModelEMA(self.model)
             if self.args.plots:
                 self.plot_training_labels()
+        if self.device.type == "cpu":
+            threads = cpu_threads(self.train_loader.num_workers)
+            LOGGER.info(f"Using {threads} torch threads for CPU training")
+        if self.args.compile and compile_layers(self.model):  # after ModelEMA() deepcopy, EMA stays eager
+            LOGGER.info("Compiled model layers with torch.compile")
 
         # Optimizer
         self.accumulate = max(round(self.args.nbs / self.batch_size), 1)  # accumulate loss before optimizing
@@ -360,7 +383,11 @@ class BaseTrainer:
                 LOGGER.info(self.progress_string())
                 pbar = TQDM(enumerate(self.train_loader), total=nb)
             self.tloss = None
+            timer = self.step_timer
+            timer.start()
             for i, batch in pbar:
+                timer.lap("data")
+                loader_times = batch.pop("times", None)
                 self.run_callbacks("on_train_batch_start")
                 # Warmup
                 ni = i + nb * epoch
@@ -376,22 +403,26 @@ class BaseTrainer:
                             x["momentum"] = np.interp(ni, xi, [self.args.warmup_momentum, self.args.momentum])
 
                 # Forward
-                with autocast(self.amp):
+                with autocast(self.amp, self.amp_device):
                     batch = self.preprocess_batch(batch)
+                    timer.lap("preprocess")
                     self.loss, self.loss_items = self.model(batch)
                     if RANK != -1:
                         self.loss *= world_size
                     self.tloss = (
                         (self.tloss * i + self.loss_items) / (i + 1) if self.tloss is not None else self.loss_items
                     )
+                timer.lap("forward")
 
                 # Backward
                 self.scaler.scale(self.loss).backward()
+                timer.lap("backward")
 
                 # Optimize - https://pytorch.org/docs/master/notes/amp_examples.html
                 if ni - last_opt_step >= self.accumulate:
                     self.optimizer_step()
                     last_opt_step = ni
+                    timer.lap("optimizer")
 
                     # Timed stopping
                     if self.args.time:
@@ -420,8 +451,10 @@ class BaseTrainer:
                     if self.args.plots and ni in self.plot_idx:
                         self.plot_training_samples(batch, ni)
 
+                self.step_times = timer.step(loader_times, self.train_loader.queue_depth())
                 self.run_callbacks("on_train_batch_end")
 
+            self.step_stats = timer.summary()
             self.lr = {f"lr/pg{ir}": x["lr"] for ir, x in enumerate(self.optimizer.param_groups)}  # for loggers
             self.run_callbacks("on_train_epoch_end")
             if RANK in {-1, 0}:
@@ -432,6 +465,7 @@ class BaseTrainer:
                 if self.args.val or final_epoch or self.stopper.possible_stop or self.stop:
                     self.metrics, self.fitness = self.validate()
                 self.save_metrics(metrics={**self.label_loss_items(self.tloss), **self.metrics, **self.lr})
+                self.save_step_stats()
                 self.stop |= self.stopper(epoch + 1, self.fitness) or final_epoch
                 if self.args.time:
                     self.stop |= (time.time() - self.train_time_start) > (self.args.time * 3600)
@@ -511,37 +545,31 @@ class BaseTrainer:
         return pd.read_csv(self.csv).to_dict(orient="list")
 
     def save_model(self):
-        """Save model training checkpoints with additional metadata."""
-        import io
-
-        # Serialize ckpt to a byte buffer once (faster than repeated torch.save() calls)
-        buffer = io.BytesIO()
-        torch.save(
-            {
-                "epoch": self.epoch,
-                "best_fitness": self.best_fitness,
-                "model": None,  # resume and final checkpoints derive from EMA
-                "ema": deepcopy(self.ema.ema).half(),
-                "updates": self.ema.updates,
-                "optimizer": convert_optimizer_state_dict_to_fp16(deepcopy(self.optimizer.state_dict())),
-                "train_args": vars(self.args),  # save as dict
-                "train_metrics": {**self.metrics, **{"fitness": self.fitness}},
-                "train_results": self.read_results_csv(),
-                "date": datetime.now().isoformat(),
-                "version": __version__,
-                "license": "AGPL-3.0 (https://ultralytics.com/license)",
-                "docs": "https://docs.ultralytics.com",
-            },
-            buffer,
-        )
-        serialized_ckpt = buffer.getvalue()  # get the serialized content to save
-
-        # Save checkpoints
-        self.last.write_bytes(serialized_ckpt)  # save last.pt
+        """Save model training checkpoints with additional metadata, written in the background by `ckpt_writer`."""
+        writer = self.ckpt_writer
+        ckpt = {
+            "epoch": self.epoch,
+            "best_fitness": self.best_fitness,
+            "model": None,  # resume and final checkpoints derive from EMA
+            "ema": writer.snapshot_model(self.ema.ema, include=["yaml", "nc", "args", "names", "stride", "bands"]),
+            "updates": self.ema.updates,
+            "optimizer": writer.snapshot_optimizer(self.optimizer),
+            "train_args": dict(vars(self.args)),  # save as dict
+            "train_metrics": {**self.metrics, **{"fitness": self.fitness}},
+            "train_results": {k: list(v) for k, v in (self.results or {}).items()},  # copy, appended while writing
+            "date": datetime.now().isoformat(),
+            "version": __version__,
+            "license": "AGPL-3.0 (https://ultralytics.com/license)",
+            "docs": "https://docs.ultralytics.com",
+        }
+
+        # Save checkpoints, last.pt is written once and the others are hardlinked to it
+        files = [self.last]
         if self.best_fitness == self.fitness:
-            self.best.write_bytes(serialized_ckpt)  # save best.pt
+            files.append(self.best)  # save best.pt
         if (self.save_period > 0) and (self.epoch % self.save_period == 0):
-            (self.wdir / f"epoch{self.epoch}.pt").write_bytes(serialized_ckpt)  # save epoch, i.e. 'epoch3.pt'
+            files.append(self.wdir / f"epoch{self.epoch}.pt")  # save epoch, i.e. 'epoch3.pt'
+        writer.submit(ckpt, files)
         # if self.args.close_mosaic and self.epoch == (self.epochs - self.args.close_mosaic - 1):
         #    (self.wdir / "last_mosaic.pt").write_bytes(serialized_ckpt)  # save mosaic checkpoint
 
@@ -656,14 +684,29 @@ class BaseTrainer:
         pass
 
     def save_metrics(self, metrics):
-        """Saves training metrics to a CSV file."""
+        """Saves training metrics to a CSV file, keeping its rows in `self.results` so checkpoints never re-read it."""
         keys, vals = list(metrics.keys()), list(metrics.values())
         n = len(metrics) + 2  # number of cols
         s = "" if self.csv.exists() else (("%s," * n % tuple(["epoch", "time"] + keys)).rstrip(",") + "\n")  # header
         t = time.time() - self.train_time_start
+        if self.results is None:
+            self.results = self.read_results_csv() if self.csv.exists() else {}  # rows of resumed epochs
+        for k, v in zip(["epoch", "time"] + keys, [self.epoch + 1, t] + vals):
+            self.results.setdefault(k, []).append(v if k == "epoch" else float("%.6g" % v))  # as read from the CSV
         with open(self.csv, "a") as f:
             f.write(s + ("%.6g," * n % tuple([self.epoch + 1, t] + vals)).rstrip(",") + "\n")
 
+    def save_step_stats(self):
+        """Saves the epoch's training loop stage timings to 'step_times.csv' next to results.csv."""
+        if not self.step_stats:
+            return
+        f = self.save_dir / "step_times.csv"
+        keys, vals = list(self.step_stats.keys()), list(self.step_stats.values())
+        n = len(keys) + 1  # number of cols
+        s = "" if f.exists() else (("%s," * n % tuple(["epoch"] + keys)).rstrip(",") + "\n")  # header
+        with open(f, "a") as file:
+            file.write(s + ("%.6g," * n % tuple([self.epoch + 1] + vals)).rstrip(",") + "\n")
+
     def plot_metrics(self):
         """Plot and display metrics visually."""
         pass
@@ -675,6 +718,7 @@ class BaseTrainer:
 
     def final_eval(self):
         """Performs final evaluation and validation for object detection YOLO model."""
+        self.ckpt_writer.wait()  # last.pt and best.pt on disk
         ckpt = {}
         for f in self.last, self.best:
             if f.exists():
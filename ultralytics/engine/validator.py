@@ -119,6 +119,7 @@ class BaseValidator:
             self.loss = torch.zeros_like(trainer.loss_items, device=trainer.device)
             self.args.plots &= trainer.stopper.possible_stop or (trainer.epoch == trainer.epochs - 1)
             model.eval()
+            de_parallel(model).branch_parallel = self.args.branch_parallel  # concurrent input branches of fuse models
         else:
             if str(self.args.model).endswith(".yaml") and model is None:
                 LOGGER.warning("WARNING ⚠️ validating an untrained model YAML will result in 0 mAP.")
@@ -156,7 +157,9 @@ class BaseValidator:
             self.dataloader = self.dataloader or self.get_dataloader(self.data.get(self.args.split), self.args.batch)
 
             model.eval()
-            model.warmup(imgsz=(1 if pt else self.args.batch, 3, imgsz, imgsz))  # warmup
+            if pt or model.nn_module:
+                model.model.branch_parallel = self.args.branch_parallel  # concurrent input branches of fuse models
+            model.warmup(imgsz=(1 if pt else self.args.batch, model.ch, imgsz, imgsz))  # warmup
 
         self.run_callbacks("on_val_start")
         dt = (
@@ -219,7 +222,7 @@ class BaseValidator:
                 LOGGER.info(f"Results saved to {colorstr('bold', self.save_dir)}")
             return stats
 
-    def match_predictions(self, pred_classes, true_classes, iou, use_scipy=False):
+    def match_predictions(self, pred_classes, true_classes, iou, use_scipy=False, single_pass=True, device=None):
         """
         Matches predictions to ground truth objects (pred_classes, true_classes) using IoU.
 
@@ -228,10 +231,15 @@ class BaseValidator:
             true_classes (torch.Tensor): Target class indices of shape(M,).
             iou (torch.Tensor): An NxM tensor containing the pairwise IoU values for predictions and ground of truth
             use_scipy (bool): Whether to use scipy for matching (more precise).
+            single_pass (bool): Resolve the greedy matching for all IoU thresholds at once with tensor ops instead of
+                looping over thresholds in NumPy, see `_match_predictions_single_pass`.
+            device (torch.device | str, optional): Device of the single-pass matcher, defaults to the device of `iou`.
 
         Returns:
             (torch.Tensor): Correct tensor of shape(N,10) for 10 IoU thresholds.
         """
+        if single_pass and not use_scipy:
+            return self._match_predictions_single_pass(pred_classes, true_classes, iou, device)
         # Dx10 matrix, where D - detections, 10 - IoU thresholds
         correct = np.zeros((pred_classes.shape[0], self.iouv.shape[0])).astype(bool)
         # LxD matrix where L - labels (rows), D - detections (columns)
@@ -261,6 +269,37 @@ class BaseValidator:
                     correct[matches[:, 1].astype(int), i] = True
         return torch.tensor(correct, dtype=torch.bool, device=pred_classes.device)
 
+    def _match_predictions_single_pass(self, pred_classes, true_classes, iou, device=None):
+        """
+        Greedy matching of `match_predictions` for all IoU thresholds in one pass.
+
+        For a threshold t the loop keeps, per detection, its highest-IoU label with IoU >= t and then, per label, the
+        detection with the lowest index. A detection's best label does not depend on t, so it is found once with a
+        column max; the lowest eligible detection per (label, threshold) is a single `scatter_reduce`. Results are
+        identical to the loop except on exact IoU ties between labels, where the loop's order is unspecified and this
+        picks the lowest label index.
+
+        Args:
+            pred_classes (torch.Tensor): Predicted class indices of shape(N,).
+            true_classes (torch.Tensor): Target class indices of shape(M,).
+            iou (torch.Tensor): An MxN tensor of pairwise IoU values between ground truth and predictions.
+            device (torch.device | str, optional): Device to match on, defaults to the device of `iou`.
+
+        Returns:
+            (torch.Tensor): Correct tensor of shape(N,10) for 10 IoU thresholds.
+        """
+        device = iou.device if device is None else torch.device(device)
+        n, m, iouv = pred_classes.shape[0], true_classes.shape[0], self.iouv.to(device)
+        if n == 0 or m == 0:
+            return torch.zeros(n, iouv.shape[0], dtype=torch.bool, device=pred_classes.device)
+        iou = (iou * (true_classes[:, None] == pred_classes)).to(device)  # zero out the wrong classes
+        best, label = iou.max(0)  # highest-IoU label of each detection
+        eligible = best[:, None] >= iouv  # NxT
+        idx = torch.where(eligible, torch.arange(n, device=device)[:, None], n)
+        first = torch.full((m, iouv.shape[0]), n, dtype=torch.long, device=device)
+        first = first.scatter_reduce(0, label[:, None].expand_as(idx), idx, "amin")  # lowest detection per label
+        return (eligible & (idx == first[label])).to(pred_classes.device)
+
     def add_callback(self, event: str, callback):
         """Appends the given callback."""
         self.callbacks[event].append(callback)
@@ -5,92 +5,30 @@ import os
 from tqdm import tqdm
 import time
 
-def split_image(input_image_path, output_folder, tile_size=416):
-    # 打开输入影像
-    input_dataset = gdal.Open(input_image_path)
-    if input_dataset is None:
-        print("无法打开输入影像.")
-        return
-
-    # 获取影像尺寸
-    width = input_dataset.RasterXSize
-    height = input_dataset.RasterYSize
-
-    # 计算每个维度上的切片数量
-    num_tiles_x = width // tile_size
-    num_tiles_y = height // tile_size
+from ultralytics.improcess_images.tiling import tile_scene
 
-    # 获取无效值
-    no_data_value = input_dataset.GetRasterBand(1).GetNoDataValue()
-
-    # 获取原始文件名（不包含扩展名）
-    file_name = os.path.splitext(os.path.basename(input_image_path))[0]
+def split_image(input_image_path, output_folder, tile_size=416, max_workers=8, resume=True, skip_nodata=False):
+    # 并行切片（替换无效值为0，保持原始数据类型，可断点续切；skip_nodata=True 时跳过全无效值瓦片），见 tiling.tile_scene
+    records = tile_scene(input_image_path, output_folder, tile_size=tile_size, fill_nodata=True,
+                         max_workers=max_workers, resume=resume, skip_nodata=skip_nodata)
 
-    # 如果输出文件夹不存在，则创建
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
+    input_dataset = gdal.Open(input_image_path)
+    projection = input_dataset.GetProjection()
+    input_dataset = None
 
     # 创建并打开文本文件记录经纬度
     # 获取 output_folder 的上级目录
+    file_name = os.path.splitext(os.path.basename(input_image_path))[0]
     parent_folder = os.path.dirname(output_folder)
     lat_lon_file_path = os.path.join(parent_folder, f"{file_name}.txt")
     with open(lat_lon_file_path, 'w') as lat_lon_file:
         lat_lon_file.write("Tile Filename: Latitude-Longitude Bounds\n")
-
-        # 循环处理每个切片
-        for y in range(num_tiles_y):
-            for x in range(num_tiles_x):
-                # 计算切片坐标
-                tile_x = x * tile_size
-                tile_y = y * tile_size
-
-                # 读取切片数据
-                tile_data = input_dataset.ReadAsArray(tile_x, tile_y, tile_size, tile_size)
-
-                # 处理无效值
-                if no_data_value is not None:
-                    tile_data[tile_data == no_data_value] = 0  # 替换无效值为0
-
-                # 将切片写入新的GeoTIFF文件
-                output_tile_path = os.path.join(output_folder, f"{file_name}_{x}_{y}.tif")
-                write_tile(tile_data, input_dataset, output_tile_path, tile_x, tile_y, tile_size, lat_lon_file)
-
-    # 关闭输入数据集
-    input_dataset = None
-
-
-def write_tile(tile_data, input_dataset, output_tile_path, tile_x, tile_y, tile_size, lat_lon_file):
-    # 创建新的GeoTIFF文件
-    driver = gdal.GetDriverByName('GTiff')
-    num_bands = input_dataset.RasterCount
-    output_dataset = driver.Create(output_tile_path, tile_size, tile_size, num_bands, gdal.GDT_Float32)
-
-    # 设置投影和地理转换
-    output_dataset.SetProjection(input_dataset.GetProjection())
-    geotransform = list(input_dataset.GetGeoTransform())
-    geotransform[0] = geotransform[0] + tile_x * geotransform[1]
-    geotransform[3] = geotransform[3] + tile_y * geotransform[5]
-    output_dataset.SetGeoTransform(geotransform)
-
-    # 写入切片数据
-    for band_index in range(num_bands):
-        band_data = tile_data[band_index, :, :]
-        output_band = output_dataset.GetRasterBand(band_index + 1)
-        output_band.WriteArray(band_data)
-
-        # 设置无效值
-        no_data_value = input_dataset.GetRasterBand(band_index + 1).GetNoDataValue()
-        if no_data_value is not None:
-            output_band.SetNoDataValue(no_data_value)
-
-    # 计算并记录每个切片的经纬度范围
-    lat_lon_range = get_tile_lat_lon_bounds(output_dataset.GetGeoTransform(), output_dataset.GetProjection(), tile_size)
-    lat_lon_info = f"{os.path.basename(output_tile_path)}: {lat_lon_range}\n"
-    print(lat_lon_info)
-    lat_lon_file.write(lat_lon_info)
-
-    # 关闭输出数据集
-    output_dataset = None
+        for record in records:
+            if record["tile"] is None:
+                continue  # 全无效值瓦片 (skip_nodata=True)
+            # 计算并记录每个切片的经纬度范围
+            lat_lon_range = get_tile_lat_lon_bounds(record["geotransform"], projection, tile_size)
+            lat_lon_file.write(f"{os.path.basename(record['tile'])}: {lat_lon_range}\n")
 
 
 def get_tile_lat_lon_bounds(geotransform, projection, tile_size):
@@ -0,0 +1,85 @@
+"""
+难例挖掘：查询验证时写出的 errors.jsonl (ConfusionMatrix.save_errors)，筛选并拷贝难例影像。
+
+errors.jsonl 每行对应一张影像：im_file、TP/CLS/FP/FN 计数，以及逐目标对齐的 boxes/conf/cls/iou/kind 列表。
+kind 含义：TP 检测正确，CLS 位置匹配但类别错误，FP 误检 (conf 为检测置信度)，FN 漏检 (conf 为 None)。
+"""
+
+import json
+import os
+import shutil
+
+KINDS = ("TP", "CLS", "FP", "FN")
+
+
+def load_errors(path):
+    """读取 errors.jsonl (或其所在的验证输出目录)，返回逐影像记录列表。"""
+    if os.path.isdir(path):
+        path = os.path.join(path, "errors.jsonl")
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def query_errors(records, kinds=("FP", "FN"), classes=None, min_conf=None, max_iou=None, min_count=1):
+    """
+    按错误类型、类别、置信度和 IoU 筛选目标，返回满足条件的目标数不少于 min_count 的影像。
+
+    Args:
+        records (list[dict] | str): load_errors 的结果，或 errors.jsonl 路径。
+        kinds (tuple[str]): 参与统计的目标类型，取自 KINDS。
+        classes (list[int], optional): 只统计这些类别。
+        min_conf (float, optional): 只统计置信度不低于该值的检测 (FN 目标不受影响)。
+        max_iou (float, optional): 只统计 IoU 不高于该值的目标，如筛选定位很差的误检。
+        min_count (int): 每张影像至少命中的目标数。
+
+    Returns:
+        (list[tuple[str, int]]): [(im_file, 命中目标数), ...]，按命中数降序排列。
+    """
+    if isinstance(records, str):
+        records = load_errors(records)
+    classes = None if classes is None else set(classes)
+    hits = []
+    for r in records:
+        n = 0
+        for kind, c, conf, iou in zip(r["kind"], r["cls"], r["conf"], r["iou"]):
+            if kind not in kinds or (classes is not None and c not in classes):
+                continue
+            if min_conf is not None and conf is not None and conf < min_conf:
+                continue
+            if max_iou is not None and iou > max_iou:
+                continue
+            n += 1
+        if n >= min_count:
+            hits.append((r["im_file"], n))
+    return sorted(hits, key=lambda x: -x[1])
+
+
+def copy_hard_examples(records, dst_dir, src_dir=None, suffix=None, **query):
+    """
+    将 query_errors 命中的影像拷贝到 dst_dir，取代手工的 find1in2to3 拷贝脚本。
+
+    Args:
+        records (list[dict] | str): load_errors 的结果，或 errors.jsonl 路径。
+        dst_dir (str): 输出目录。
+        src_dir (str, optional): 按文件名到该目录查找同名文件 (如预测结果或另一模态影像)，None 时直接拷贝 im_file。
+        suffix (str, optional): 在 src_dir 中查找时替换的文件后缀，如 ".tif"，None 表示沿用原后缀。
+        **query: 透传给 query_errors 的筛选条件。
+
+    Returns:
+        (list[str]): 已拷贝的目标路径。
+    """
+    os.makedirs(dst_dir, exist_ok=True)
+    copied, missing = [], []
+    for im_file, _ in query_errors(records, **query):
+        src = im_file
+        if src_dir is not None:
+            stem, ext = os.path.splitext(os.path.basename(im_file))
+            src = os.path.join(src_dir, stem + (suffix or ext))
+        if not os.path.isfile(src):
+            missing.append(src)
+            continue
+        dst = os.path.join(dst_dir, os.path.basename(src))
+        shutil.copy(src, dst)
+        copied.append(dst)
+    print(f"难例拷贝完成: {len(copied)} 个文件拷贝到 {dst_dir}, 未找到 {len(missing)} 个")
+    return copied
@@ -0,0 +1,244 @@
+"""
+切片引擎：将整景 GeoTIFF 切成 tile_size x tile_size 的 GeoTIFF 瓦片。
+
+- 每个工作进程只打开一次输入影像 (进程池 initializer)，不再逐瓦片 gdal.Open
+- 以整行条带为单位读取 (一次 ReadAsArray 覆盖一行中的多个瓦片)，与 GeoTIFF 块/条带对齐，解码一次
+- 可选 (skip_nodata=True) 跳过全无效值瓦片：存在金字塔 (overview) 时先在低分辨率上筛出候选，再以原始分辨率确认
+- 输出保持原始数据类型 (如 uint16)，整型数据使用 LZW + PREDICTOR=2 压缩
+- 逐瓦片记录 manifest.jsonl，中断后可断点续切，并输出吞吐统计
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from osgeo import gdal
+from tqdm import tqdm
+
+gdal.SetConfigOption("GTIFF_SRS_SOURCE", "EPSG")
+
+MANIFEST = "manifest.jsonl"
+STRIP_BYTES = 64 << 20  # 单次条带读取的最大字节数
+
+_DATASET = None  # 工作进程内常驻的输入影像句柄
+
+
+def _init_worker(input_image_path, cache_mb):
+    """进程池 initializer：每个工作进程打开一次输入影像并设置 GDAL 块缓存。"""
+    global _DATASET
+    gdal.SetCacheMax(cache_mb << 20)
+    _DATASET = gdal.Open(input_image_path, gdal.GA_ReadOnly)
+
+
+def overview_nodata_mask(dataset, tile_size, num_tiles_x, num_tiles_y, samples=8):
+    """
+    在金字塔 (overview) 上判断每个瓦片是否可能全部为无效值，返回 (num_tiles_y, num_tiles_x) 的 bool 数组。
+
+    每个瓦片只取 samples x samples 个低分辨率采样，边缘的少量有效像素可能漏检，结果只作为候选，须以原始分辨率确认。
+    无金字塔或瓦片数为 0 时返回 None (此时逐瓦片全分辨率判断)。
+    无效值取第1波段的 NoData，未设置时视 0 为无效值。
+    """
+    band = dataset.GetRasterBand(1)
+    if band.GetOverviewCount() == 0 or num_tiles_x == 0 or num_tiles_y == 0:
+        return None
+    nodata = band.GetNoDataValue()
+    nodata = 0 if nodata is None else nodata
+    # 输出缓冲区小于读取窗口时，GDAL 自动从最合适的 overview 层读取
+    arr = dataset.ReadAsArray(
+        0,
+        0,
+        num_tiles_x * tile_size,
+        num_tiles_y * tile_size,
+        buf_xsize=num_tiles_x * samples,
+        buf_ysize=num_tiles_y * samples,
+    )
+    arr = arr.reshape(-1, num_tiles_y, samples, num_tiles_x, samples)
+    return (arr == nodata).all(axis=(0, 2, 4))
+
+
+def _write_tile(tile_data, output_tile_path, projection, geotransform, data_type, nodata, compress):
+    """按原始数据类型写出单个瓦片。"""
+    num_bands, tile_h, tile_w = tile_data.shape
+    options = []
+    if compress:
+        options = ["COMPRESS=LZW", "TILED=YES"]
+        if np.issubdtype(tile_data.dtype, np.integer):
+            options.append("PREDICTOR=2")  # 整型水平差分预测，压缩率更高
+    driver = gdal.GetDriverByName("GTiff")
+    output_dataset = driver.Create(output_tile_path, tile_w, tile_h, num_bands, data_type, options=options)
+    output_dataset.SetProjection(projection)
+    output_dataset.SetGeoTransform(geotransform)
+    for band_index in range(num_bands):
+        output_band = output_dataset.GetRasterBand(band_index + 1)
+        output_band.WriteArray(tile_data[band_index])
+        if nodata[band_index] is not None:
+            output_band.SetNoDataValue(nodata[band_index])
+    output_dataset = None  # 关闭并写盘
+
+
+def _cut_strip(y, xs, tile_size, tile_folder, file_name, min_value, fill_nodata, compress, check=()):
+    """
+    工作进程任务：一次读取第 y 行中 xs 列瓦片所覆盖的条带，切分并写出瓦片。
+
+    check 中的列为全无效值候选瓦片，以原始分辨率确认全部为无效值后才跳过。
+
+    Returns:
+        (list, int): [(x, y, 瓦片路径或 None(被过滤)), ...] 与读取的字节数。
+    """
+    dataset = _DATASET
+    x0, x1 = xs[0] * tile_size, (xs[-1] + 1) * tile_size
+    strip = dataset.ReadAsArray(x0, y * tile_size, x1 - x0, tile_size)
+    strip = strip.reshape(-1, tile_size, x1 - x0)  # (bands, h, w)，单波段同样处理
+
+    projection = dataset.GetProjection()
+    geotransform = dataset.GetGeoTransform()
+    first_band = dataset.GetRasterBand(1)
+    data_type = first_band.DataType
+    nodata = [dataset.GetRasterBand(i + 1).GetNoDataValue() for i in range(dataset.RasterCount)]
+    nd = 0 if nodata[0] is None else nodata[0]  # 与 overview_nodata_mask 相同的无效值约定
+    empty = {x for x in check if (strip[:, :, x * tile_size - x0 : (x + 1) * tile_size - x0] == nd).all()}
+    if fill_nodata and nodata[0] is not None:
+        strip[strip == nodata[0]] = 0  # 替换无效值为0
+
+    results = []
+    for x in xs:
+        tile_data = strip[:, :, x * tile_size - x0 : (x + 1) * tile_size - x0]
+        # 全无效值瓦片 (已确认) 或所有波段最大值都低于阈值 (暗/无效瓦片)，跳过
+        if x in empty or (min_value is not None and tile_data.max() < min_value):
+            results.append((x, y, None))
+            continue
+        output_tile_path = os.path.join(tile_folder, f"{file_name}_{x}_{y}.tif")
+        tile_x, tile_y = x * tile_size, y * tile_size
+        gt = list(geotransform)
+        gt[0] += tile_x * gt[1] + tile_y * gt[2]
+        gt[3] += tile_x * gt[4] + tile_y * gt[5]
+        _write_tile(tile_data, output_tile_path, projection, gt, data_type, nodata, compress)
+        results.append((x, y, output_tile_path))
+    return results, strip.nbytes
+
+
+def load_manifest(manifest_path, input_image_path, tile_size):
+    """读取已有 manifest，返回 {(x, y): 瓦片路径或 None}；源影像或瓦片尺寸不一致时报错。"""
+    done = {}
+    if not os.path.exists(manifest_path):
+        return done
+    with open(manifest_path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if "source" in record:
+                if (record["source"], record["tile_size"]) != (os.path.abspath(input_image_path), tile_size):
+                    raise ValueError(f"{manifest_path} 属于其他影像或切片尺寸，请更换输出目录或设置 resume=False")
+            elif "tile" in record and (record["tile"] is None or os.path.exists(record["tile"])):
+                done[(record["x"], record["y"])] = record["tile"]
+    return done
+
+
+def tile_scene(
+    input_image_path,
+    tile_folder,
+    tile_size=416,
+    min_value=None,
+    fill_nodata=False,
+    compress=True,
+    max_workers=8,
+    cache_mb=256,
+    resume=True,
+    skip_nodata=False,
+):
+    """
+    并行、可断点续切地将整景影像切成 GeoTIFF 瓦片，输出保持原始数据类型。
+
+    Args:
+        input_image_path (str): 输入影像路径。
+        tile_folder (str): 瓦片输出目录，manifest.jsonl 也写在此目录。
+        tile_size (int): 瓦片边长 (像素)，不足一个瓦片的右/下边缘丢弃。
+        min_value (float, optional): 所有波段最大值低于该值的瓦片不输出，None 表示不过滤。
+        fill_nodata (bool): 是否将第1波段 NoData 值替换为 0。
+        compress (bool): 是否使用 LZW 压缩和内部分块。
+        max_workers (int): 工作进程数。
+        cache_mb (int): 每个工作进程的 GDAL 块缓存 (MB)。
+        resume (bool): 是否根据 manifest 跳过已完成的瓦片。
+        skip_nodata (bool): 是否跳过全无效值瓦片 (第1波段 NoData，未设置时为 0)，默认 False 即全部输出。
+
+    Returns:
+        (list[dict]): 每个瓦片的记录 {"tile": 路径或 None(被过滤), "x", "y", "geotransform"}，按 (y, x) 排序。
+    """
+    dataset = gdal.Open(input_image_path, gdal.GA_ReadOnly)
+    if dataset is None:
+        raise FileNotFoundError(f"无法打开输入影像 {input_image_path}")
+    width, height, num_bands = dataset.RasterXSize, dataset.RasterYSize, dataset.RasterCount
+    num_tiles_x, num_tiles_y = width // tile_size, height // tile_size
+    itemsize = gdal.GetDataTypeSize(dataset.GetRasterBand(1).DataType) // 8
+    geotransform = dataset.GetGeoTransform()
+    nodata_mask = overview_nodata_mask(dataset, tile_size, num_tiles_x, num_tiles_y) if skip_nodata else None
+    dataset = None
+
+    os.makedirs(tile_folder, exist_ok=True)
+    manifest_path = os.path.join(tile_folder, MANIFEST)
+    done = load_manifest(manifest_path, input_image_path, tile_size) if resume else {}
+    file_name = os.path.splitext(os.path.basename(input_image_path))[0]
+
+    # 任务划分：每行中待切的连续瓦片按条带字节上限分组；全无效值候选瓦片 (金字塔预筛，无金字塔时为全部) 随条带确认
+    cols_per_task = max(1, STRIP_BYTES // (tile_size * tile_size * num_bands * itemsize))
+    tasks = []
+    for y in range(num_tiles_y):
+        xs = []
+        for x in range(num_tiles_x):
+            if (x, y) in done:
+                continue
+            if xs and (x != xs[-1] + 1 or len(xs) == cols_per_task):
+                tasks.append((y, xs))
+                xs = []
+            xs.append(x)
+        if xs:
+            tasks.append((y, xs))
+    if skip_nodata:
+        tasks = [(y, xs, [x for x in xs if nodata_mask is None or nodata_mask[y, x]]) for y, xs in tasks]
+    else:
+        tasks = [(y, xs, []) for y, xs in tasks]
+
+    start_time, nbytes, written = time.time(), 0, 0
+    with open(manifest_path, "a" if done else "w", encoding="utf-8") as manifest:
+        if not done:
+            record = {"source": os.path.abspath(input_image_path), "tile_size": tile_size, "width": width}
+            manifest.write(json.dumps({**record, "height": height, "bands": num_bands}) + "\n")
+        total = sum(len(xs) for _, xs in tasks)
+        with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(input_image_path, cache_mb)) as pool:
+            args = tile_size, tile_folder, file_name, min_value, fill_nodata, compress
+            futures = [pool.submit(_cut_strip, y, xs, *args, check=c) for y, xs, c in tasks]
+            with tqdm(total=total, desc="切片进度", unit="tile") as pbar:
+                for fut in as_completed(futures):
+                    results, n = fut.result()
+                    nbytes += n
+                    for x, y, path in results:
+                        done[(x, y)] = path
+                        written += path is not None
+                        manifest.write(json.dumps({"tile": path, "x": x, "y": y}) + "\n")
+                    manifest.flush()  # 每个条带完成即落盘，便于断点续切
+                    pbar.update(len(results))
+
+        elapsed = time.time() - start_time
+        stats = {
+            "tiles": total,
+            "written": written,
+            "skipped": total - written,
+            "resumed": num_tiles_x * num_tiles_y - total,
+            "seconds": round(elapsed, 2),
+            "tiles_per_s": round(total / max(elapsed, 1e-6), 1),
+            "read_mb_per_s": round(nbytes / (1 << 20) / max(elapsed, 1e-6), 1),
+        }
+        manifest.write(json.dumps({"stats": stats}) + "\n")
+    print(
+        f"切片完成: 写出 {written}, 过滤 {stats['skipped']}, 续切跳过 {stats['resumed']}; "
+        f"{stats['tiles_per_s']} tile/s, 读取 {stats['read_mb_per_s']} MB/s, 耗时 {elapsed:.1f} 秒"
+    )
+
+    records = []
+    for (x, y), path in sorted(done.items(), key=lambda kv: kv[0][::-1]):
+        gt = list(geotransform)
+        gt[0] += x * tile_size * gt[1] + y * tile_size * gt[2]
+        gt[3] += x * tile_size * gt[4] + y * tile_size * gt[5]
+        records.append({"tile": path, "x": x, "y": y, "geotransform": gt})
+    return records
@@ -2,6 +2,7 @@
 
 from ultralytics.engine.predictor import BasePredictor
 from ultralytics.engine.results import Results
+from ultralytics.nn.modules import Detect
 from ultralytics.utils import ops
 
 
@@ -20,6 +21,27 @@ class DetectionPredictor(BasePredictor):
         ```
     """
 
+    batched_nms = False  # one NMS over the whole batch, see ops.batched_non_max_suppression
+    sparse_head = False  # decode only anchors above 'conf' in the Detect head, see Detect._inference_sparse
+
+    def inference(self, im, *args, **kwargs):
+        """
+        Runs inference, decoding only candidate anchors in the Detect head if `sparse_head` is True.
+
+        The head flags are set for this call only and restored afterwards, so a later `model.val()` on the same module
+        decodes all anchors again.
+        """
+        head = self.model.model.model[-1] if self.model.pt or self.model.nn_module else None
+        if type(head) is not Detect or head.end2end:  # Segment/Pose/OBB heads concatenate outputs of all anchors
+            return super().inference(im, *args, **kwargs)
+        state = head.sparse, head.conf
+        head.sparse = self.sparse_head and not self.args.augment  # TTA clips outputs per anchor grid
+        head.conf = self.args.conf
+        try:
+            return super().inference(im, *args, **kwargs)
+        finally:
+            head.sparse, head.conf = state
+
     def postprocess(self, preds, img, orig_imgs):
         """Post-processes predictions and returns a list of Results objects."""
         preds = ops.non_max_suppression(
@@ -29,6 +51,7 @@ class DetectionPredictor(BasePredictor):
             agnostic=self.args.agnostic_nms,
             max_det=self.args.max_det,
             classes=self.args.classes,
+            batched=self.batched_nms,
         )
 
         if not isinstance(orig_imgs, list):  # input images are a torch.Tensor, not a list
@@ -0,0 +1,162 @@
+# Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
+
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from ultralytics.data.loaders import LoadRasterWindows
+from ultralytics.models.yolo.detect.predict import DetectionPredictor
+from ultralytics.utils import LOGGER, TQDM, colorstr, ops
+from ultralytics.utils.checks import check_imgsz
+from ultralytics.utils.torch_utils import smart_inference_mode
+
+VECTOR_DRIVERS = {".geojson": "GeoJSON", ".json": "GeoJSON", ".gpkg": "GPKG"}  # output suffix -> OGR driver
+
+
+class ScenePredictor(DetectionPredictor):
+    """
+    A DetectionPredictor running sliced inference on whole GF2 (optionally GF2 + GF3) scenes.
+
+    Overlapping windows are streamed straight from the scene rasters, batched through the model, shifted back to scene
+    pixel coordinates and merged across windows with global NMS or weighted boxes fusion. Merged detections are mapped
+    to the scene CRS with its GeoTransform and written as GeoJSON or GeoPackage, so no tile dataset is cut to disk.
+
+    Example:
+        ```python
+        from ultralytics.models.yolo.detect import ScenePredictor
+
+        predictor = ScenePredictor(overrides=dict(model="best.pt", imgsz=416, conf=0.25, batch=16))
+        dets = predictor.predict_scene("GF2_scene.tif", sar="GF3_scene.tif", overlap=0.2, merge="wbf", save="dets.gpkg")
+        ```
+    """
+
+    batched_nms = True  # batches of many windows, a per-window NMS loop costs more than the model head
+    sparse_head = True  # sparse objects in large scenes, nearly all anchors are background
+
+    @smart_inference_mode()
+    def predict_scene(self, source, sar=None, overlap=0.2, merge="nms", save=None, model=None):
+        """
+        Detect objects in a whole scene and return the merged detections in scene pixel coordinates.
+
+        Args:
+            source (str | Path): Optical (GF2) scene GeoTIFF.
+            sar (str | Path, optional): SAR (GF3) scene on the same pixel grid, required by 7-channel fuse models.
+            overlap (float): Window overlap as a fraction of the window size 'imgsz'.
+            merge (str): Cross-window merge, 'nms' for global NMS or 'wbf' for weighted boxes fusion.
+            save (str | Path, optional): Output '*.geojson' or '*.gpkg' file, defaults to '<save_dir>/<scene>.geojson'
+                if `args.save` is set.
+            model (str | Path, optional): Model weights, defaults to `args.model`.
+
+        Returns:
+            (torch.Tensor): Detections (N, 6) as (x1, y1, x2, y2, conf, cls) in scene pixels.
+        """
+        assert merge in {"nms", "wbf"}, f"merge='{merge}' must be 'nms' or 'wbf'"
+        if not self.model:
+            self.setup_model(model)
+        self.imgsz = check_imgsz(self.args.imgsz, stride=self.model.stride, min_dim=2)
+        self.dataset = LoadRasterWindows(
+            source,
+            sar=sar,
+            tile=max(self.imgsz),
+            overlap=overlap,
+            batch=self.args.batch,
+            bands=self.model.ch - 3 if sar else self.model.ch,  # GF3 单波段复制为3通道
+        )
+        self.source_type = self.dataset.source_type
+        self.dataset.band_lut = self.get_band_lut()
+        if not self.done_warmup:
+            bs = 1 if self.model.pt or self.model.triton else self.args.batch
+            self.model.warmup(imgsz=(bs, self.model.ch, *self.imgsz))
+            self.done_warmup = True
+
+        dets = []
+        profiler = ops.Profile(device=self.device)
+        with profiler:
+            for self.batch in TQDM(self.dataset, desc=f"Predicting {Path(source).name}"):
+                paths, im0s, s = self.batch
+                im = self.preprocess(im0s)
+                preds = self.inference(im)
+                for r, (x, y) in zip(self.postprocess(preds, im, im0s), self.dataset.offsets):
+                    d = r.boxes.data
+                    d[:, [0, 2]] += x  # 窗口坐标 -> 影像坐标
+                    d[:, [1, 3]] += y
+                    dets.append(d)
+        dets = self.merge_detections(torch.cat(dets) if dets else torch.zeros((0, 6), device=self.device), merge)
+
+        if save is None and self.args.save:
+            self.save_dir.mkdir(parents=True, exist_ok=True)
+            save = self.save_dir / f"{Path(source).stem}.geojson"
+        if save:
+            self.save_vector(dets, save)
+        LOGGER.info(
+            f"{len(dets)} detections in {len(self.dataset.windows)} windows of {Path(source).name} "
+            f"({self.dataset.width}x{self.dataset.height}) in {profiler.t:.1f}s"
+            + (f", saved to {colorstr('bold', save)}" if save else "")
+        )
+        return dets
+
+    def merge_detections(self, dets, merge="nms"):
+        """Merge detections of overlapping windows with global class-aware (unless `agnostic_nms`) NMS or WBF."""
+        if not len(dets):
+            return dets
+        import torchvision  # scope for faster 'import ultralytics'
+
+        max_wh = dets[:, :4].max() + 1  # class offset larger than the scene
+        c = dets[:, 5:6] * (0 if self.args.agnostic_nms else max_wh)
+        boxes, scores = dets[:, :4] + c, dets[:, 4]
+        if merge == "wbf":
+            fused, i = ops.weighted_boxes_fusion(boxes, scores, self.args.iou)
+            dets = dets[i]
+            dets[:, :4] = fused - c[i]
+        else:
+            dets = dets[torchvision.ops.nms(boxes, scores, self.args.iou)]
+        return dets
+
+    def save_vector(self, dets, file):
+        """Write detections as CRS polygons with class, name, conf and pixel box fields to a GeoJSON/GPKG 'file'."""
+        from osgeo import ogr, osr
+
+        file = Path(file)
+        assert file.suffix.lower() in VECTOR_DRIVERS, f"{file} must be one of {tuple(VECTOR_DRIVERS)}"
+        driver = ogr.GetDriverByName(VECTOR_DRIVERS[file.suffix.lower()])
+        if file.exists():
+            driver.DeleteDataSource(str(file))
+        srs = None
+        if self.dataset.projection:
+            srs = osr.SpatialReference()
+            srs.ImportFromWkt(self.dataset.projection)
+            srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)  # GeoTransform 坐标顺序为 (x, y)
+
+        ds = driver.CreateDataSource(str(file))
+        layer = ds.CreateLayer(file.stem, srs, ogr.wkbPolygon)
+        for name, kind in (("class", ogr.OFTInteger), ("name", ogr.OFTString), ("conf", ogr.OFTReal)):
+            layer.CreateField(ogr.FieldDefn(name, kind))
+        for name in ("x1", "y1", "x2", "y2"):
+            layer.CreateField(ogr.FieldDefn(name, ogr.OFTReal))  # 影像像素坐标
+
+        # 像素坐标 -> 地理坐标: X = g0 + x*g1 + y*g2, Y = g3 + x*g4 + y*g5 (支持旋转的 GeoTransform)
+        d = dets.cpu().numpy().astype(np.float64)
+        g = self.dataset.geotrans
+        px = d[:, [0, 2, 2, 0, 0]]
+        py = d[:, [1, 1, 3, 3, 1]]
+        gx, gy = g[0] + px * g[1] + py * g[2], g[3] + px * g[4] + py * g[5]
+
+        defn = layer.GetLayerDefn()
+        layer.StartTransaction()
+        for det, xs, ys in zip(d, gx, gy):
+            ring = ogr.Geometry(ogr.wkbLinearRing)
+            for x, y in zip(xs, ys):
+                ring.AddPoint_2D(float(x), float(y))
+            polygon = ogr.Geometry(ogr.wkbPolygon)
+            polygon.AddGeometry(ring)
+            feature = ogr.Feature(defn)
+            feature.SetGeometry(polygon)
+            feature.SetField("class", int(det[5]))
+            feature.SetField("name", self.model.names[int(det[5])])
+            feature.SetField("conf", float(det[4]))
+            for name, v in zip(("x1", "y1", "x2", "y2"), det[:4]):
+                feature.SetField(name, float(v))
+            layer.CreateFeature(feature)
+        layer.CommitTransaction()
+        ds = None  # close and flush
@@ -56,7 +56,7 @@ class DetectionTrainer(BaseTrainer):
 
     def preprocess_batch(self, batch):
         """Preprocesses a batch of images by scaling and converting to float."""
-        batch["img"] = batch["img"].to(self.device, non_blocking=True).float() / 255
+        batch["img"] = batch["img"].to(self.device, non_blocking=True).float().div_(255)  # uint8 H2D, scale on device
         if self.args.multi_scale:
             imgs = batch["img"]
             sz = (
@@ -80,6 +80,7 @@ class DetectionTrainer(BaseTrainer):
         # self.args.cls *= (self.args.imgsz / 640) ** 2 * 3 / nl  # scale to image size and layers
         self.model.nc = self.data["nc"]  # attach number of classes to model
         self.model.names = self.data["names"]  # attach class names to model
+        self.model.bands = self.data.get("bands")  # attach band layout to model, see data.utils.channel_order
         self.model.args = self.args  # attach hyperparameters to model
         # TODO: self.model.class_weights = labels_to_class_weights(dataset.labels, nc).to(device) * nc
 
@@ -142,7 +142,9 @@ class DetectionValidator(BaseValidator):
                     for k in self.stats.keys():
                         self.stats[k].append(stat[k])
                     if self.args.plots:
-                        self.confusion_matrix.process_batch(detections=None, gt_bboxes=bbox, gt_cls=cls)
+                        self.confusion_matrix.process_batch(
+                            detections=None, gt_bboxes=bbox, gt_cls=cls, im_file=batch["im_file"][si]
+                        )
                 continue
 
             # Predictions
@@ -156,9 +158,7 @@ class DetectionValidator(BaseValidator):
             if nl:
                 stat["tp"] = self._process_batch(predn, bbox, cls)
             if self.args.plots:
-                '''修改代码  用于混淆举证'''
-                file_path = f'{Path(batch["im_file"][si]).stem}.txt'
-                self.confusion_matrix.process_batch(predn, bbox, cls, file_dir=self.save_dir, file_name=file_path)
+                self.confusion_matrix.process_batch(predn, bbox, cls, im_file=batch["im_file"][si])
             for k in self.stats.keys():
                 self.stats[k].append(stat[k])
 
@@ -177,6 +177,8 @@ class DetectionValidator(BaseValidator):
         """Set final values for metrics speed and confusion matrix."""
         self.metrics.speed = self.speed
         self.metrics.confusion_matrix = self.confusion_matrix
+        if self.args.plots and (f := self.confusion_matrix.save_errors(self.save_dir)):
+            LOGGER.info(f"Per-image error index saved to {f}")
 
     def get_stats(self):
         """Returns metrics statistics and results dictionary."""
@@ -74,6 +74,7 @@ from .conv import (
     Focus,
     GhostConv,
     Index,
+    Input,
     LightConv,
     RepConv,
     SpatialAttention,
@@ -167,5 +168,6 @@ __all__ = (
     "PSA",
     "TorchVision",
     "Index",
+    "Input",
     "A2C2f"
 )
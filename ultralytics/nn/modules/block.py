@@ -66,30 +66,50 @@ class SA_C1(nn.Module):
         return x
 
 class SA(nn.Module):
-    def __init__(self, c2):
+    """
+    Spectral attention branch: NDSI indices of the first 4 channels, ECASA channel attention, 1x1 conv and 8x max-pool.
+
+    ECASA's positive per-channel weights are folded into the 1x1 conv weights, so the attended NDSI map is never
+    materialized. With s > 1 the input is average-pooled by 's' before the index math and the remaining max-pool
+    stride is reduced accordingly, giving the same output shape at roughly 1/s^2 of the memory traffic.
+
+    Attributes:
+        s (int): Input reduction factor, one of 1, 2, 4 or 8; s=1 reproduces the full-resolution result.
+    """
+
+    def __init__(self, c2, s=1):
         super(SA, self).__init__()
         # c1 = 3
         # 6通道
         c1 = 6
+        assert s in {1, 2, 4, 8}, f"SA reduction s={s} must be one of 1, 2, 4, 8"
+        self.s = s
         self.ndsi_layer = NDSI_Layer()
         self.ecasa = ECASA(c1)
         self.conv1x1 = nn.Conv2d(c1, c2, kernel_size=1)
         self.down1 = nn.MaxPool2d(kernel_size=3, stride=2, padding=1)
         self.down2 = nn.MaxPool2d(kernel_size=3, stride=2, padding=1)
         self.down3 = nn.MaxPool2d(kernel_size=3, stride=2, padding=1)
-        self.down4 = nn.MaxPool2d(kernel_size=3, stride=2, padding=1)
-        self.down5 = nn.MaxPool2d(kernel_size=3, stride=2, padding=1)
 
     def forward(self, x):
-        B, C, _, _ = x.size()
+        s = getattr(self, "s", 1)  # 兼容旧的 pickled 模型
+        if s > 1:
+            x = F.avg_pool2d(x[:, :4], s, ceil_mode=True)
         ndsi_out = self.ndsi_layer(x)
-        ecasa_out = self.ecasa(ndsi_out)
-        conv1x1_out = self.conv1x1(ecasa_out)
-        out1 = self.down3(self.down2(self.down1(conv1x1_out)))
-        return out1
+        # conv1x1(ndsi * y) == conv1x1 的权重按通道乘以 y，省去一次全分辨率乘法
+        y = self.ecasa.weights(ndsi_out)  # (b, c1)
+        w = self.conv1x1.weight.flatten(1) * y[:, None]  # (b, c2, c1)
+        b, _, h, w_ = ndsi_out.shape
+        out = torch.baddbmm(self.conv1x1.bias[:, None], w, ndsi_out.flatten(2)).view(b, -1, h, w_)
+        # 降采样 s 倍时少做 log2(s) 次最大池化，输出尺寸不变
+        for down in (self.down1, self.down2, self.down3)[int(math.log2(s)) :]:
+            out = down(out)
+        return out
 
 
 class ECASA(nn.Module):
+    """Efficient channel attention on the sum of 1D-conv'd global average and max pooled descriptors."""
+
     def __init__(self, channel, gamma=2, b=1):
         super(ECASA, self).__init__()
         t = int(abs((math.log(channel, 2) + b) / gamma))  # 自适应计算卷积核大小
@@ -100,15 +120,17 @@ class ECASA(nn.Module):
         self.conv = nn.Conv1d(1, 1, kernel_size=k_size, padding=(k_size - 1) // 2, bias=False)
         self.sig = nn.Sigmoid()
 
+    def weights(self, x):
+        """Return the (b, c) channel attention weights of 'x'."""
+        b, c = x.shape[:2]
+        x = x.flatten(2)
+        # 平均与最大池化描述子拼成一个 batch，一次 1D 卷积 (conv 无偏置，线性)
+        pooled = torch.cat((x.mean(2), x.amax(2)), 0).unsqueeze(1)  # (2b, 1, c)
+        avgweight, maxweight = self.conv(pooled).view(2, b, c)
+        return self.sig(avgweight + maxweight)
+
     def forward(self, x):
-        b, c, h, w = x.size()  # (1,6,416,416)
-        avg_out = self.avg(x)
-        max_out = self.max(x)
-        avgweight = self.conv(avg_out.squeeze(-1).transpose(-1, -2)).transpose(-1, -2).unsqueeze(-1)
-        maxweight = self.conv(max_out.squeeze(-1).transpose(-1, -2)).transpose(-1, -2).unsqueeze(-1)
-        y = self.sig(avgweight+maxweight).view([b, c, 1, 1])
-        out = x * y
-        return out
+        return x * self.weights(x)[..., None, None]
 
 
 class DFL(nn.Module):
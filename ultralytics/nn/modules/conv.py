@@ -22,6 +22,7 @@ __all__ = (
     "Concat",
     "RepConv",
     "Index",
+    "Input",
 )
 
 
@@ -348,3 +349,16 @@ class Index(nn.Module):
         Expects a list of tensors as input.
         """
         return x[self.index]
+
+
+class Input(nn.Module):
+    """Marks where a named model input enters the graph, e.g. the GF3 image of a dual-input fuse model."""
+
+    def __init__(self, name):
+        """Named input placeholder, the input tensor is routed to this layer by the model forward pass."""
+        super().__init__()
+        self.name = name
+
+    def forward(self, x):
+        """Return the named input tensor unchanged."""
+        return x
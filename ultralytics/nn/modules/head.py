@@ -30,6 +30,9 @@ class Detect(nn.Module):
     anchors = torch.empty(0)  # init
     strides = torch.empty(0)  # init
     legacy = False  # backward compatibility for v3/v5/v8/v9 models
+    sparse = False  # threshold-first inference decoding only candidate anchors, see _inference_sparse()
+    conf = 0.25  # class score threshold of sparse inference
+    max_candidates = 1000  # max candidate anchors per image and level in sparse inference
 
     def __init__(self, nc=80, ch=()):
         """Initializes the YOLO detection layer with specified number of classes and channels."""
@@ -99,6 +102,9 @@ class Detect(nn.Module):
 
     def _inference(self, x):
         """Decode predicted bounding boxes and class probabilities based on multiple-level feature maps."""
+        if self.sparse and not self.export:
+            return self._inference_sparse(x)
+
         # Inference path
         shape = x[0].shape  # BCHW
         x_cat = torch.cat([xi.view(shape[0], self.no, -1) for xi in x], 2)
@@ -130,6 +136,44 @@ class Detect(nn.Module):
 
         return torch.cat((dbox, cls.sigmoid()), 1)
 
+    def _inference_sparse(self, x):
+        """
+        Decode only the anchors whose best class score exceeds `conf`, for scenes where nearly all anchors are empty.
+
+        Scores are thresholded before the sigmoid by comparing class logits with logit(conf). On each level the top-k
+        anchors by best class logit are taken, with k the largest number of anchors above the threshold in one image
+        (at most `max_candidates`), and only their box logits go through DFL and decoding. Anchors of the top-k that
+        are below the threshold in their image get zero scores, which NMS drops with the same 'conf'.
+
+        Args:
+            x (List[torch.Tensor]): Per-level head outputs of shape (batch_size, 4 * reg_max + nc, H, W).
+
+        Returns:
+            (torch.Tensor): Candidates of shape (batch_size, 4 + nc, K) in the layout of `_inference`, K <= num anchors.
+        """
+        shape = x[0].shape  # BCHW
+        if self.dynamic or self.shape != shape:
+            self.anchors, self.strides = (a.transpose(0, 1) for a in make_anchors(x, self.stride, 0.5))
+            self.shape = shape
+        c = min(max(self.conf, 1e-6), 1 - 1e-6)
+        thr = math.log(c / (1 - c))  # sigmoid(z) > conf <=> z > logit(conf)
+
+        y, start = [], 0
+        for xi, stride in zip(x, self.stride):
+            n = xi.shape[2] * xi.shape[3]
+            anchors, start = self.anchors[:, start : start + n], start + n
+            box, cls = xi.flatten(2).split((self.reg_max * 4, self.nc), 1)
+            score = cls.amax(1)  # (B, HW) best class logit
+            k = min(int((score > thr).sum(1).max()), self.max_candidates)
+            if not k:
+                continue
+            score, i = score.topk(k, 1)
+            box = box.gather(2, i[:, None].expand(-1, box.shape[1], -1))
+            cls = cls.gather(2, i[:, None].expand(-1, self.nc, -1)).sigmoid() * (score > thr)[:, None]
+            dbox = self.decode_bboxes(self.dfl(box), anchors[:, i].transpose(0, 1)) * stride
+            y.append(torch.cat((dbox, cls), 1))
+        return torch.cat(y, 2) if y else x[0].new_zeros((shape[0], 4 + self.nc, 0))
+
     def bias_init(self):
         """Initialize Detect() biases, WARNING: requires stride availability."""
         m = self  # self.model[-1]  # Detect() module
@@ -54,6 +54,7 @@ from ultralytics.nn.modules import (
     HGStem,
     ImagePoolingAttn,
     Index,
+    Input,
     Pose,
     RepC3,
     RepConv,
@@ -81,6 +82,7 @@ from ultralytics.utils.loss import (
 from ultralytics.utils.ops import make_divisible
 from ultralytics.utils.plotting import feature_visualization
 from ultralytics.utils.torch_utils import (
+    autocast_dtype,
     fuse_conv_and_bn,
     fuse_deconv_and_bn,
     initialize_weights,
@@ -94,6 +96,8 @@ from ultralytics.utils.torch_utils import (
 class BaseModel(nn.Module):
     """The BaseModel class serves as a base class for all the models in the Ultralytics YOLO family."""
 
+    branch_parallel = False  # run the input branches of fuse models concurrently, set from the 'branch_parallel' arg
+
     def forward(self, x, *args, **kwargs):
         """
         Perform forward pass of the model for either training or inference.
@@ -143,6 +147,8 @@ class BaseModel(nn.Module):
         Returns:
             (torch.Tensor): The last output of the model.
         """
+        if getattr(self, "yaml", {}).get("inputs"):  # named inputs, route by precomputed execution plan
+            return self._predict_plan(x, profile, visualize, embed)
         '''修改网络向前传播代码'''
         # 将batch['img']分为image1和image2
         # （目前是相反的)
@@ -156,10 +162,13 @@ class BaseModel(nn.Module):
         if x.shape[1] > 4:
             x2 = x[:, 4:7, ...]
             x = x[:, :4, ...]
+            if self.branch_parallel and not (visualize or embed):
+                return self._predict_branches({"image1": x, "image2": x2}, profile)
+            fi = fuse_input_layer(self.yaml)  # image2 输入层
             y, dt, embeddings = [], [], []  # outputs
             for m in self.model:
-                # 当第10层的时候输入images2
-                if m.i == 12:
+                # 在 image2 分支的第一层输入images2
+                if m.i == fi:
                     x = m(x2)
                 else:
                     if m.f != -1:  # if not from previous layer
@@ -195,6 +204,166 @@ class BaseModel(nn.Module):
                         return torch.unbind(torch.cat(embeddings, 1), dim=0)
         return x
 
+    def _input_layers(self):
+        """Return {layer index: input name} of the layers where each model input enters the graph."""
+        inputs = getattr(self, "yaml", {}).get("inputs")
+        if not inputs:  # legacy fuse yaml, image2 enters at the fuse input layer
+            return {0: "image1", fuse_input_layer(self.yaml): "image2"}
+        roots = {i: k for k, (_, i) in model_inputs(self.yaml).items() if i is not None}  # declared entry layers
+        roots.update({m.i: m.name for m in self.model if isinstance(m, Input)})
+        if 0 not in roots:
+            roots[0] = next(iter(inputs))  # first input feeds layer 0 unless it has its own Input layer
+        return roots
+
+    def _plan(self):
+        """
+        Precompute the execution plan of a named-input model as (module, kind, source) per layer.
+
+        kind is 0 for the previous output, 1 for a single earlier layer, 2 for a list of sources (None meaning previous
+        output) and 3 for a named model input.
+        """
+        if getattr(self, "_exec_plan", None) is None:
+            roots, plan = self._input_layers(), []
+            for m in self.model:
+                if m.i in roots:
+                    plan.append((m, 3, roots[m.i]))
+                elif isinstance(m.f, int):
+                    plan.append((m, 0, None) if m.f == -1 else (m, 1, m.f))
+                else:
+                    plan.append((m, 2, [None if j == -1 else j for j in m.f]))
+            self._exec_plan = plan
+        return self._exec_plan
+
+    def _predict_plan(self, x, profile=False, visualize=False, embed=None):
+        """
+        Forward pass of a model with named inputs ('inputs: {gf2: [4, 0], gf3: [3, 9]}' in the yaml).
+
+        The input tensor is split along channels in the declared input order and each part is routed to its entry
+        layer following the precomputed execution plan, without per-layer type or index checks.
+
+        Args:
+            x (torch.Tensor | dict): Channel-stacked input tensor or dict of named input tensors.
+            profile (bool):  Print the computation time of each layer if True, defaults to False.
+            visualize (bool): Save the feature maps of the model if True, defaults to False.
+            embed (list, optional): A list of feature vectors/embeddings to return.
+
+        Returns:
+            (torch.Tensor): The last output of the model.
+        """
+        inputs = model_inputs(self.yaml)
+        xs = x if isinstance(x, dict) else dict(zip(inputs, x.split([c for c, _ in inputs.values()], 1)))
+        if self.branch_parallel and len(xs) == 2 and not (visualize or embed):
+            return self._predict_branches(xs, profile)
+        y, dt, embeddings = [None] * len(self.model), [], []  # outputs
+        save = self.save
+        for m, kind, f in self._plan():
+            if kind == 1:
+                x = y[f]
+            elif kind == 2:
+                x = [x if j is None else y[j] for j in f]
+            elif kind == 3:
+                x = xs[f]
+            if profile:
+                self._profile_one_layer(m, x, dt)
+            x = m(x)  # run
+            if m.i in save:
+                y[m.i] = x  # save output
+            if visualize:
+                feature_visualization(x, m.type, m.i, save_dir=visualize)
+            if embed and m.i in embed:
+                embeddings.append(nn.functional.adaptive_avg_pool2d(x, (1, 1)).squeeze(-1).squeeze(-1))  # flatten
+                if m.i == max(embed):
+                    return torch.unbind(torch.cat(embeddings, 1), dim=0)
+        return x
+
+    def _branch_plan(self):
+        """
+        Derive the two independent input branches of a dual-input fuse model from its layer graph.
+
+        Every layer is labelled with the set of inputs it depends on, starting from the layers where each input enters.
+        Layers before the first layer depending on both inputs form the two branches, the rest is the trunk.
+
+        Returns:
+            (tuple): Input name and layer indices of each branch, and the index of the first trunk layer.
+        """
+        if getattr(self, "_branches", None) is None:
+            roots = self._input_layers()
+            deps = []  # inputs each layer depends on
+            for m in self.model:
+                if m.i in roots:
+                    deps.append({roots[m.i]})
+                else:
+                    f = [m.f] if isinstance(m.f, int) else m.f
+                    deps.append(set().union(*(deps[m.i + j if j < 0 else j] for j in f)))
+            t = next(i for i, d in enumerate(deps) if len(d) > 1)  # first trunk layer
+            names = list(dict.fromkeys(roots[i] for i in sorted(roots)))
+            self._branches = tuple((n, [i for i in range(t) if deps[i] == {n}]) for n in names) + (t,)
+        return self._branches
+
+    def _run_branch(self, layers, x, y, threads=0, amp=None):
+        """
+        Run the layers with indices 'layers' starting from input 'x', filling 'y', and return (output, seconds).
+
+        'amp' is the caller's autocast dtype for the device of 'x', re-entered here because autocast is thread-local.
+        """
+        nt = torch.get_num_threads()
+        if threads:
+            torch.set_num_threads(threads)  # intra-op threads of this branch
+        t = time_sync()
+        try:
+            with torch.autocast(x.device.type, dtype=amp) if amp else contextlib.nullcontext():
+                for i in layers:
+                    m = self.model[i]
+                    if i != layers[0]:  # the first layer takes the branch input, -1 always means layer i - 1
+                        f = m.f if isinstance(m.f, int) else None
+                        x = y[i - 1 if f == -1 else f] if f is not None else [y[i - 1 if j == -1 else j] for j in m.f]
+                    x = m(x)  # run
+                    y[i] = x
+        finally:
+            if threads:
+                torch.set_num_threads(nt)  # restore this thread, pooled worker threads are reused
+        return x, time_sync() - t
+
+    def _predict_branches(self, xs, profile=False):
+        """
+        Forward pass of a dual-input fuse model running both input branches concurrently.
+
+        The second input branch runs on a worker thread while the first runs on the calling thread, each with half of
+        the intra-op threads on CPU, then the shared trunk runs sequentially. Per-branch wall times are stored in
+        `self.branch_times` and logged if 'profile' is True.
+
+        Args:
+            xs (dict): Input tensors by name, 'image1'/'image2' for legacy fuse yamls.
+            profile (bool): Log per-branch computation times if True.
+
+        Returns:
+            (torch.Tensor): The last output of the model.
+        """
+        (n1, b1), (n2, b2), t = self._branch_plan()
+        y = [None] * len(self.model)
+        nt = torch.get_num_threads()
+        threads = max(nt // 2, 1) if xs[n1].device.type == "cpu" else 0
+        amp = autocast_dtype(xs[n2].device.type)  # mixed precision of the calling thread, for the worker thread
+        future = _branch_executor().submit(self._run_branch, b2, xs[n2], y, threads, amp)
+        try:
+            x1, dt1 = self._run_branch(b1, xs[n1], y, threads)
+        finally:
+            x2, dt2 = future.result()
+        x = x1 if b1[-1] == t - 1 else x2  # output of the layer preceding the trunk
+        for i in (*b1, *b2):
+            if i not in self.save:
+                y[i] = None  # release unsaved branch outputs
+        t0 = time_sync()
+        for m in self.model[t:]:
+            if m.f != -1:  # if not from previous layer
+                x = y[m.f] if isinstance(m.f, int) else [x if j == -1 else y[j] for j in m.f]  # from earlier layers
+            x = m(x)  # run
+            y[m.i] = x if m.i in self.save else None  # save output
+        self.branch_times = {n1: dt1, n2: dt2, "trunk": time_sync() - t0}
+        if profile:
+            LOGGER.info("  ".join(f"{k} {v * 1e3:.2f}ms" for k, v in self.branch_times.items()))
+        return x
+
     def _predict_augment(self, x):
         """Perform augmentations on input image x and return augmented inference."""
         LOGGER.warning(
@@ -349,7 +518,8 @@ class DetectionModel(BaseModel):
             self.yaml["backbone"][0][2] = "nn.Identity"
 
         # Define model
-        ch = self.yaml["ch"] = self.yaml.get("ch", ch)  # input channels
+        inputs = model_inputs(self.yaml)  # named inputs are channel-stacked
+        ch = self.yaml["ch"] = sum(c for c, _ in inputs.values()) if inputs else self.yaml.get("ch", ch)  # input ch
         if nc and nc != self.yaml["nc"]:
             LOGGER.info(f"Overriding model.yaml nc={self.yaml['nc']} with nc={nc}")
             self.yaml["nc"] = nc  # override YAML value
@@ -968,6 +1138,44 @@ def attempt_load_one_weight(weight, device=None, inplace=True, fuse=False):
     return model, ckpt
 
 
+def model_inputs(d):
+    """
+    Return the named inputs of a model yaml as {name: (channels, entry layer or None)}.
+
+    Inputs are declared as 'inputs: {gf2: [4, 0], gf3: [3, 9]}' (channels and the index of the layer the input feeds)
+    or as plain channel counts with the entry point marked by an Input layer. Declaring the entry layer keeps the layer
+    numbering, and so the state-dict keys, of yamls written before named inputs existed.
+    """
+    return {k: tuple(v) if isinstance(v, (list, tuple)) else (v, None) for k, v in (d.get("inputs") or {}).items()}
+
+
+def fuse_input_layer(d):
+    """
+    Return the index of the layer where the second image (GF3) enters a fuse model, or None for single-input models.
+
+    Set with the 'fuse_input' yaml key, legacy fuse yamls with more than 20 backbone layers default to layer 12. Models
+    declaring named 'inputs' use Input layers instead.
+    """
+    if d.get("inputs"):
+        return None
+    if "fuse_input" in d:
+        return d["fuse_input"]
+    return 12 if len(d["backbone"]) > 20 else None
+
+
+_BRANCH_EXECUTOR = None
+
+
+def _branch_executor():
+    """Return the process-wide single worker thread pool used to run the second input branch of fuse models."""
+    global _BRANCH_EXECUTOR
+    if _BRANCH_EXECUTOR is None:
+        from concurrent.futures import ThreadPoolExecutor
+
+        _BRANCH_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="branch")
+    return _BRANCH_EXECUTOR
+
+
 def parse_model(d, ch, verbose=True):  # model_dict, input_channels(3)
     """Parse a YOLO model.yaml dictionary into a PyTorch model."""
     import ast
@@ -991,6 +1199,10 @@ def parse_model(d, ch, verbose=True):  # model_dict, input_channels(3)
 
     if verbose:
         LOGGER.info(f"\n{'':>3}{'from':>20}{'n':>3}{'params':>10}  {'module':<45}{'arguments':<30}")
+    inputs = model_inputs(d)  # named inputs {name: (channels, entry layer)}, channel-stacked in this order
+    entries = {i: c for c, i in inputs.values() if i}  # layers > 0 fed directly by a model input
+    if inputs:
+        ch = next((c for c, i in inputs.values() if i == 0), next(iter(inputs.values()))[0])  # layer 0 input
     ch = [ch]
     layers, save, c2 = [], [], ch[-1]  # layers, savelist, ch out
     '''--------修改代码--------'''
@@ -1110,13 +1322,17 @@ def parse_model(d, ch, verbose=True):  # model_dict, input_channels(3)
             c2 = ch[f]
         elif m in {SA}:
             c2 = args[0]
+        elif m is Input:
+            assert inputs and args[0] in inputs, f"Input '{args[0]}' is not declared in the yaml 'inputs' {inputs}"
+            c2 = inputs[args[0]][0]
         else:
             c2 = ch[f]
         '''当输入的数据为GF、SAR的融合图象时，yaml文件所调用的数据'''
-        # 在第10层输入为images2，通道数为3
-        if d.get('backbone').__len__() > 20:
-            if i == 12:
-                args[0] = 3
+        # 在 image2 分支第一层输入为images2，通道数为3
+        if i == fuse_input_layer(d):
+            args[0] = 3
+        elif i in entries:
+            args[0] = entries[i]  # entry layer takes the declared input channels (c1 is the first arg, e.g. Conv)
         m_ = nn.Sequential(*(m(*args) for _ in range(n))) if n > 1 else m(*args)  # module
         t = str(m)[8:-2].replace("__main__.", "")  # module type
         m_.np = sum(x.numel() for x in m_.parameters())  # number params
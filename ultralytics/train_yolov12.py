@@ -13,21 +13,23 @@ import warnings
 warnings.filterwarnings("ignore", category=UserWarning, module="albumentations.check_version")
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
-#  Load a COCO-pretrained YOLO12n model
-model = YOLO("yolo12m.pt")
-# data=r"F:\my_code\yolov12\ultralytics\cfg\datasets\TransmissionTower.yaml",
-# Train the model on the COCO8 example dataset for 100 epochs
-results = model.train(data=r'D:\Git\yolov12_fuse_SA\ultralytics\cfg\datasets\TransmissionTower.yaml',
-                      epochs=1,
-                      patience=10,
-                      imgsz=416,
-                      workers=0,
-                      device="cpu",
-                      batch=16,
-                      name="TransmissionTower_3bands_M_1epoch_test",
-                      amp=False,
-                      pretrained=False,  # 不加载官方权重
-                      )
+if __name__ == "__main__":  # Windows 下多进程以 spawn 方式启动，会重新导入本脚本
+    #  Load a COCO-pretrained YOLO12n model
+    model = YOLO("yolo12m.pt")
+    # data=r"F:\my_code\yolov12\ultralytics\cfg\datasets\TransmissionTower.yaml",
+    # Train the model on the COCO8 example dataset for 100 epochs
+    results = model.train(data=r'D:\Git\yolov12_fuse_SA\ultralytics\cfg\datasets\TransmissionTower.yaml',
+                          epochs=1,
+                          patience=10,
+                          imgsz=416,
+                          workers=0,
+                          device="cpu",
+                          batch=16,
+                          name="TransmissionTower_3bands_M_1epoch_test",
+                          amp=True,  # CPU 训练时在支持 bf16 的处理器上自动使用 bf16 autocast，否则为 FP32
+                          # compile=True,  # 可选：torch.compile 编译各层 (torch>=2.2)
+                          pretrained=False,  # 不加载官方权重
+                          )
 
 
 # from ultralytics.data.utils import read_image
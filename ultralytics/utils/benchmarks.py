@@ -6,6 +6,9 @@ Usage:
     from ultralytics.utils.benchmarks import ProfileModels, benchmark
     ProfileModels(['yolov8n.yaml', 'yolov8s.yaml']).profile()
     benchmark(model='yolov8n.pt', imgsz=160)
+    benchmark_cpu_training(model='yolov12_fuse.yaml', imgsz=416)  # CPU training fast path vs FP32
+    benchmark_nms(batch_sizes=(16, 64, 256))  # per-image NMS loop vs batched NMS
+    benchmark_match_predictions(num_targets=(100, 500))  # per-threshold matching loop vs single pass
 
 Format                  | `format=argument`         | Model
 ---                     | ---                       | ---
@@ -581,3 +584,187 @@ class ProfileModels:
         print(separator)
         for row in table_rows:
             print(row)
+
+
+def benchmark_cpu_training(model="yolov12_fuse.yaml", imgsz=416, batch=8, steps=10, warmup=3, compile=False):
+    """
+    Benchmark CPU training step time of the FP32 path against the CPU fast path on synthetic batches.
+
+    Each mode trains a fresh copy of the model for 'warmup' untimed and 'steps' timed iterations of forward, loss,
+    backward and SGD step. The fast path uses channels_last and, on CPUs with native bfloat16 support, bfloat16
+    autocast, with per-layer `torch.compile` added as a third mode if 'compile' is True.
+
+    Args:
+        model (str): Model yaml, i.e. the dual-input fuse model.
+        imgsz (int): Square input image size.
+        batch (int): Images per training step.
+        steps (int): Number of timed steps per mode.
+        warmup (int): Number of untimed steps per mode (compilation happens here).
+        compile (bool): Also benchmark the fast path with compiled layers.
+
+    Returns:
+        (dict): Mean seconds per step for each mode.
+
+    Examples:
+        >>> from ultralytics.utils.benchmarks import benchmark_cpu_training
+        >>> benchmark_cpu_training("yolov12_fuse.yaml", imgsz=416, batch=8)
+    """
+    from copy import deepcopy
+
+    from ultralytics.cfg import get_cfg
+    from ultralytics.nn.tasks import DetectionModel
+    from ultralytics.utils import DEFAULT_CFG
+    from ultralytics.utils.torch_utils import autocast, compile_layers, cpu_bf16_supported, cpu_threads
+
+    threads = cpu_threads()
+    base = DetectionModel(model, verbose=False)
+    base.args = get_cfg(DEFAULT_CFG)  # loss hyperparameters
+    n = 4  # boxes per image
+    data = {
+        "img": torch.rand(batch, base.yaml["ch"], imgsz, imgsz),
+        "cls": torch.zeros(batch * n, 1),
+        "bboxes": torch.rand(batch * n, 4) * 0.4 + torch.tensor([0.3, 0.3, 0.1, 0.1]),  # xywh normalized
+        "batch_idx": torch.arange(batch, dtype=torch.float32).repeat_interleave(n),
+    }
+    bf16 = cpu_bf16_supported()
+    fast = f"{'bf16' if bf16 else 'fp32'}+channels_last"
+    modes = {"fp32": (False, False, False), fast: (bf16, True, False)}
+    if compile:
+        modes[f"{fast}+compile"] = (bf16, True, True)
+
+    results = {}
+    for name, (amp, channels_last, compiled) in modes.items():
+        m = deepcopy(base).train()
+        img = data["img"]
+        if channels_last:
+            m, img = m.to(memory_format=torch.channels_last), img.contiguous(memory_format=torch.channels_last)
+        if compiled and not compile_layers(m):
+            continue
+        optimizer = torch.optim.SGD(m.parameters(), lr=1e-4, momentum=0.9)
+        for i in range(warmup + steps):
+            if i == warmup:
+                t = time.perf_counter()
+            with autocast(amp, "cpu"):
+                loss, _ = m({**data, "img": img})
+            loss.sum().backward()
+            optimizer.step()
+            optimizer.zero_grad()
+        results[name] = (time.perf_counter() - t) / steps
+
+    LOGGER.info(f"CPU training benchmark: {model} imgsz={imgsz} batch={batch}, {threads} threads, {get_cpu_info()}")
+    for name, dt in results.items():
+        LOGGER.info(f"{name:>30}: {dt:.3f} s/step, {batch / dt:.1f} img/s, {results['fp32'] / dt:.2f}x")
+    return results
+
+
+def benchmark_nms(batch_sizes=(1, 16, 64, 256), nc=1, imgsz=416, conf=0.25, iou=0.7, n=10, device="cpu"):
+    """
+    Micro-benchmark the per-image `non_max_suppression` loop against `batched_non_max_suppression`.
+
+    Synthetic predictions have the anchor count of a P3-P5 model at 'imgsz', random boxes and mostly low scores, so
+    several hundred overlapping candidates per image reach NMS. The detection counts of both paths are logged, they
+    agree up to equal-score ties.
+
+    Args:
+        batch_sizes (tuple): Batch sizes to time.
+        nc (int): Number of classes.
+        imgsz (int): Square image size, sets the number of anchors.
+        conf (float): Confidence threshold.
+        iou (float): NMS IoU threshold.
+        n (int): Number of timed calls per path and batch size.
+        device (str): Device of the predictions.
+
+    Returns:
+        (dict): Mean milliseconds per call of the 'loop' and 'batched' paths for each batch size.
+
+    Examples:
+        >>> from ultralytics.utils.benchmarks import benchmark_nms
+        >>> benchmark_nms(batch_sizes=(16, 256), nc=1)
+    """
+    from ultralytics.utils.ops import batched_non_max_suppression, non_max_suppression
+
+    anchors = sum((imgsz // s) ** 2 for s in (8, 16, 32))
+    results = {}
+    for bs in batch_sizes:
+        g = torch.Generator().manual_seed(0)
+        xy = torch.rand(bs, 2, anchors, generator=g) * imgsz
+        wh = torch.rand(bs, 2, anchors, generator=g) * 40 + 8
+        scores = torch.rand(bs, nc, anchors, generator=g) ** 8  # mostly background, ~16% above 0.25
+        pred = torch.cat((xy, wh, scores), 1).to(device)
+        times = {}
+        for name, fn in ("loop", non_max_suppression), ("batched", batched_non_max_suppression):
+            out = fn(pred.clone(), conf, iou)  # warmup
+            t = time.perf_counter()
+            for _ in range(n):
+                fn(pred.clone(), conf, iou)
+            if "cuda" in str(device):
+                torch.cuda.synchronize()
+            times[name] = (time.perf_counter() - t) / n * 1e3
+            times[f"{name}_dets"] = sum(len(x) for x in out)
+        results[bs] = times
+        LOGGER.info(
+            f"NMS batch={bs:<4} loop {times['loop']:8.2f} ms  batched {times['batched']:8.2f} ms  "
+            f"{times['loop'] / times['batched']:.1f}x  detections {times['loop_dets']}/{times['batched_dets']}"
+        )
+    return results
+
+
+def benchmark_match_predictions(num_targets=(10, 100, 500), nc=1, imgsz=416, n=20, device="cpu"):
+    """
+    Micro-benchmark the per-threshold NumPy loop of `BaseValidator.match_predictions` against the single-pass matcher.
+
+    Dense synthetic scenes hold 'num_targets' small ground truth boxes and three jittered detections per target plus
+    as many random false positives, the worst case for the greedy matcher. Both paths run on the same IoU matrix and
+    the number of differing (detection, threshold) entries is logged.
+
+    Args:
+        num_targets (tuple): Ground truth boxes per scene to time.
+        nc (int): Number of classes.
+        imgsz (int): Square image size the boxes are drawn in.
+        n (int): Number of timed calls per path and scene size.
+        device (str): Device of the IoU matrix and of the single-pass matcher.
+
+    Returns:
+        (dict): Mean milliseconds per call of the 'loop' and 'single_pass' paths and the 'mismatch' count for each
+            scene size.
+
+    Examples:
+        >>> from ultralytics.utils.benchmarks import benchmark_match_predictions
+        >>> benchmark_match_predictions(num_targets=(100, 1000))
+    """
+    import tempfile
+
+    from ultralytics.engine.validator import BaseValidator
+    from ultralytics.utils.metrics import box_iou
+    from ultralytics.utils.ops import xywh2xyxy
+
+    with tempfile.TemporaryDirectory() as tmp:
+        validator = BaseValidator(save_dir=Path(tmp))
+    validator.iouv = torch.linspace(0.5, 0.95, 10, device=device)
+    results = {}
+    for m in num_targets:
+        g = torch.Generator().manual_seed(0)
+        gt = torch.cat((torch.rand(m, 2, generator=g) * imgsz, torch.rand(m, 2, generator=g) * 24 + 8), 1)
+        det = gt.repeat(3, 1) + torch.randn(3 * m, 4, generator=g) * 2  # jittered duplicates of every target
+        fp = torch.cat((torch.rand(m, 2, generator=g) * imgsz, torch.rand(m, 2, generator=g) * 24 + 8), 1)
+        det = torch.cat((det, fp))
+        gt_cls = torch.randint(nc, (m,), generator=g).float().to(device)
+        det_cls = torch.cat((gt_cls.cpu().repeat(3), torch.randint(nc, (m,), generator=g).float())).to(device)
+        iou = box_iou(xywh2xyxy(gt), xywh2xyxy(det)).to(device)
+        times, out = {}, {}
+        for name, single_pass in ("loop", False), ("single_pass", True):
+            out[name] = validator.match_predictions(det_cls, gt_cls, iou, single_pass=single_pass)  # warmup
+            t = time.perf_counter()
+            for _ in range(n):
+                validator.match_predictions(det_cls, gt_cls, iou, single_pass=single_pass)
+            if "cuda" in str(device):
+                torch.cuda.synchronize()
+            times[name] = (time.perf_counter() - t) / n * 1e3
+        times["mismatch"] = int((out["loop"] != out["single_pass"]).sum())
+        results[m] = times
+        LOGGER.info(
+            f"match_predictions targets={m:<5} detections={len(det):<5} loop {times['loop']:8.2f} ms  "
+            f"single_pass {times['single_pass']:8.2f} ms  {times['loop'] / times['single_pass']:.1f}x  "
+            f"mismatch {times['mismatch']}"
+        )
+    return results
@@ -670,8 +670,15 @@ def check_amp(model):
 
     device = next(model.parameters()).device  # get model device
     prefix = colorstr("AMP: ")
-    if device.type in {"cpu", "mps"}:
-        return False  # AMP only used on CUDA devices
+    if device.type == "cpu":
+        from ultralytics.utils.torch_utils import cpu_bf16_supported
+
+        if cpu_bf16_supported():
+            LOGGER.info(f"{prefix}using bfloat16 autocast on CPU ✅")
+            return True
+        return False  # bfloat16 is emulated without native CPU support, slower than FP32
+    elif device.type == "mps":
+        return False  # AMP only used on CUDA and bfloat16 CPUs
     else:
         # GPUs that have issues with AMP
         pattern = re.compile(
@@ -183,17 +183,22 @@ class v8DetectionLoss:
         if nl == 0:
             out = torch.zeros(batch_size, 0, ne - 1, device=self.device)
         else:
-            i = targets[:, 0]  # image index
-            _, counts = i.unique(return_counts=True)
-            counts = counts.to(dtype=torch.int32)
-            out = torch.zeros(batch_size, counts.max(), ne - 1, device=self.device)
-            for j in range(batch_size):
-                matches = i == j
-                if n := matches.sum():
-                    out[j, :n] = targets[matches, 1:]
+            out = self.pad_targets(targets, batch_size)
             out[..., 1:5] = xywh2xyxy(out[..., 1:5].mul_(scale_tensor))
         return out
 
+    @staticmethod
+    def pad_targets(targets, batch_size):
+        """Scatter (n, 1 + k) image-indexed targets, in order, into a zero-padded (batch_size, max_n, k) tensor."""
+        i = targets[:, 0].long()  # image index
+        counts = torch.bincount(i, minlength=batch_size)
+        out = targets.new_zeros(batch_size, int(counts.max()), targets.shape[1] - 1)
+        order = i.argsort(stable=True)  # group by image, keeping the order within each image
+        i = i[order]
+        j = torch.arange(len(i), device=i.device) - (counts.cumsum(0) - counts)[i]  # position within its image
+        out[i, j] = targets[order, 1:]
+        return out
+
     def bbox_decode(self, anchor_points, pred_dist):
         """Decode predicted object bounding box coordinates from anchor points and distribution."""
         if self.use_dfl:
@@ -623,16 +628,8 @@ class v8OBBLoss(v8DetectionLoss):
         if targets.shape[0] == 0:
             out = torch.zeros(batch_size, 0, 6, device=self.device)
         else:
-            i = targets[:, 0]  # image index
-            _, counts = i.unique(return_counts=True)
-            counts = counts.to(dtype=torch.int32)
-            out = torch.zeros(batch_size, counts.max(), 6, device=self.device)
-            for j in range(batch_size):
-                matches = i == j
-                if n := matches.sum():
-                    bboxes = targets[matches, 2:]
-                    bboxes[..., :4].mul_(scale_tensor)
-                    out[j, :n] = torch.cat([targets[matches, 1:2], bboxes], dim=-1)
+            out = self.pad_targets(targets, batch_size)
+            out[..., 1:5].mul_(scale_tensor)  # xywh, angle unscaled
         return out
 
     def __call__(self, preds, batch):
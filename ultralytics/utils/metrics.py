@@ -1,8 +1,8 @@
 # Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
 """Model validation metrics."""
 
+import json
 import math
-import os
 import warnings
 from pathlib import Path
 
@@ -302,8 +302,11 @@ class ConfusionMatrix:
         nc (int): The number of classes.
         conf (float): The confidence threshold for detections.
         iou_thres (float): The Intersection over Union threshold.
+        errors (list[dict]): Buffered per-image TP/CLS/FP/FN records, written by `save_errors()`.
     """
 
+    ERROR_KINDS = ("TP", "CLS", "FP", "FN")
+
     def __init__(self, nc, conf=0.25, iou_thres=0.45, task="detect"):
         """Initialize attributes for the YOLO model."""
         self.task = task
@@ -311,6 +314,7 @@ class ConfusionMatrix:
         self.nc = nc  # number of classes
         self.conf = 0.25 if conf in {None, 0.001} else conf  # apply 0.25 if default val conf is passed
         self.iou_thres = iou_thres
+        self.errors = []  # per-image detection records, see process_batch(im_file=...)
 
     def process_cls_preds(self, preds, targets):
         """
@@ -324,7 +328,7 @@ class ConfusionMatrix:
         for p, t in zip(preds.cpu().numpy(), targets.cpu().numpy()):
             self.matrix[p][t] += 1
 
-    def process_batch(self, detections, gt_bboxes, gt_cls, **kwargs):
+    def process_batch(self, detections, gt_bboxes, gt_cls, im_file=None):
         """
         Update confusion matrix for object detection task.
 
@@ -334,35 +338,25 @@ class ConfusionMatrix:
                                       or with an additional element `angle` when it's obb.
             gt_bboxes (Array[M, 4]| Array[N, 5]): Ground truth bounding boxes with xyxy/xyxyr format.
             gt_cls (Array[M]): The class labels.
+            im_file (str, optional): Image path; when given, the image's TP/CLS/FP/FN rows are buffered in
+                `self.errors` and written once by `save_errors()`.
         """
-        file_dir = kwargs["file_dir"]
-        file_name = kwargs["file_name"]
-        if gt_cls.shape[0] == 0:  # Check if labels is empty
-            if detections is not None:
-                detections = detections[detections[:, 4] > self.conf]
-                detection_classes = detections[:, 5].int()
-                for dc in detection_classes:
-                    self.matrix[dc, self.nc] += 1  # false positives
-                if file_dir is not None and file_name is not None:
-                    if not os.path.exists(file_dir / 'errorfile' / 'FP'):
-                        os.makedirs(file_dir / 'errorfile' / 'FP')
-                    with open(file_dir / 'errorfile' / 'FP' / file_name, 'a') as f:
-                        f.write(f'{file_name}: 预测错误，没有目标但预测出来了！')
-            return
+        gt_classes = gt_cls.int().cpu().numpy()
         if detections is None:
-            gt_classes = gt_cls.int()
-            for gc in gt_classes:
-                self.matrix[self.nc, gc] += 1  # background FN
-            if file_dir is not None and file_name is not None:
-                if not os.path.exists(file_dir / 'errorfile' / 'FN'):
-                    os.makedirs(file_dir / 'errorfile' / 'FN')
-                with open(file_dir / 'errorfile' / 'FN' / file_name, 'a') as f:
-                    f.write(f'{file_name}: 预测错误，有目标但没预测出来！')
+            np.add.at(self.matrix, (self.nc, gt_classes), 1)  # background FN
+            if im_file is not None:
+                self._add_errors(im_file, None, None, None, None, gt_bboxes, gt_classes, np.zeros(len(gt_classes)))
             return
 
         detections = detections[detections[:, 4] > self.conf]
-        gt_classes = gt_cls.int()
-        detection_classes = detections[:, 5].int()
+        detection_classes = detections[:, 5].int().cpu().numpy()
+        if gt_cls.shape[0] == 0:  # Check if labels is empty
+            np.add.at(self.matrix, (detection_classes, self.nc), 1)  # false positives
+            if im_file is not None:
+                kind = np.full(len(detections), 2)
+                self._add_errors(im_file, detections, detection_classes, np.zeros(len(detections)), kind)
+            return
+
         is_obb = detections.shape[1] == 7 and gt_bboxes.shape[1] == 5  # with additional `angle` dimension
         iou = (
             batch_probiou(gt_bboxes, torch.cat([detections[:, :4], detections[:, -1:]], dim=-1))
@@ -381,30 +375,63 @@ class ConfusionMatrix:
         else:
             matches = np.zeros((0, 3))
 
-        n = matches.shape[0] > 0
-        m0, m1, _ = matches.transpose().astype(int)
-        for i, gc in enumerate(gt_classes):
-            j = m0 == i
-            if n and sum(j) == 1:
-                self.matrix[detection_classes[m1[j]], gc] += 1  # correct
-            else:
-                self.matrix[self.nc, gc] += 1  # true background
-                if file_dir is not None and file_name is not None:
-                    if not os.path.exists(file_dir / 'errorfile' / 'FN'):
-                        os.makedirs(file_dir / 'errorfile' / 'FN')
-                    with open(file_dir / 'errorfile' / 'FN' / file_name, 'a') as f:
-                        f.write(f'{file_name}: 有目标但没预测出来！')
-
-
-        for i, dc in enumerate(detection_classes):
-            if not any(m1 == i):
-                self.matrix[dc, self.nc] += 1  # predicted background
-                if file_dir is not None and file_name is not None:
-                    if not os.path.exists(file_dir / 'errorfile' / 'FP'):
-                        os.makedirs(file_dir / 'errorfile' / 'FP')
-                    with open(file_dir / 'errorfile' / 'FP' / file_name, 'a') as f:
-                        f.write(f'{file_name}: 没有目标但预测出来了！')
+        m0, m1, _ = matches.transpose().astype(int)  # each gt and each detection appears at most once
+        gt_hit, det_hit = np.zeros(len(gt_classes), dtype=bool), np.zeros(len(detection_classes), dtype=bool)
+        gt_hit[m0], det_hit[m1] = True, True
+        np.add.at(self.matrix, (detection_classes[m1], gt_classes[m0]), 1)  # correct
+        np.add.at(self.matrix, (self.nc, gt_classes[~gt_hit]), 1)  # true background
+        np.add.at(self.matrix, (detection_classes[~det_hit], self.nc), 1)  # predicted background
+
+        if im_file is not None:
+            iou = iou.cpu().numpy()
+            det_iou = iou.max(0)
+            det_iou[m1] = matches[:, 2]  # IoU with the matched gt, else best IoU with any gt
+            kind = np.full(len(detection_classes), 2)  # FP
+            kind[m1] = np.where(detection_classes[m1] == gt_classes[m0], 0, 1)  # TP or CLS
+            gt_iou = iou.max(1) if len(detection_classes) else np.zeros(len(gt_classes))
+            miss = ~gt_hit
+            gt_miss = gt_bboxes[torch.from_numpy(miss).to(gt_bboxes.device)]
+            gt_rows = (gt_miss, gt_classes[miss], gt_iou[miss])
+            self._add_errors(im_file, detections, detection_classes, det_iou, kind, *gt_rows)
+
+    def _add_errors(self, im_file, det, det_cls, det_iou, det_kind, gt=None, gt_cls=None, gt_iou=None):
+        """Buffer one image's rows (boxes, conf, class, IoU, kind) in `self.errors`; FN rows have conf None."""
+        boxes, conf, cls, iou, kind = [], [], [], [], []
+        if det is not None and len(det):
+            det = det.cpu().numpy()
+            boxes += np.concatenate([det[:, :4], det[:, 6:]], 1).round(2).tolist()  # keep obb angle
+            conf += det[:, 4].round(4).tolist()
+            cls += det_cls.tolist()
+            iou += det_iou.round(4).tolist()
+            kind += [self.ERROR_KINDS[k] for k in det_kind]
+        if gt is not None and len(gt):
+            boxes += gt.cpu().numpy().round(2).tolist()
+            conf += [None] * len(gt)
+            cls += gt_cls.tolist()
+            iou += gt_iou.round(4).tolist()
+            kind += ["FN"] * len(gt)
+        counts = {k: kind.count(k) for k in self.ERROR_KINDS}
+        record = {"im_file": str(im_file), **counts, "boxes": boxes, "conf": conf, "cls": cls, "iou": iou}
+        self.errors.append({**record, "kind": kind})
+
+    def save_errors(self, save_dir):
+        """
+        Write the buffered per-image records to `save_dir/errors.jsonl` in a single pass.
+
+        Each line holds one image: `im_file`, the TP/CLS/FP/FN counts and row-aligned `boxes`, `conf`, `cls`,
+        `iou` and `kind` lists. TP/CLS rows are detections matched to a gt of the same/another class, FP rows are
+        unmatched detections and FN rows are missed gt boxes. Query it with
+        `ultralytics.improcess_images.hard_examples`.
 
+        Returns:
+            (Path | None): The written file, or None when nothing was recorded.
+        """
+        if not self.errors:
+            return None
+        f = Path(save_dir) / "errors.jsonl"
+        with open(f, "w", encoding="utf-8") as fh:
+            fh.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in self.errors)
+        return f
 
     def matrix(self):
         """Returns the confusion matrix."""
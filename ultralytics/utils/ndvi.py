@@ -3,38 +3,28 @@ import torch.nn as nn
 
 
 class NDSI_Layer(nn.Module):
-    def __init__(self, dimension=1):
+    """
+    Normalized difference spectral indices (x_i - x_j) / (x_i + x_j) of every band pair of the first 'bands' channels.
+
+    All pairs are computed in one broadcasted op over precomputed pair indices instead of one sub/add/div per pair, the
+    output channel order is the pair order of `itertools.combinations`, i.e. (r-g, r-b, r-nir, g-b, g-nir, b-nir).
+    """
+
+    def __init__(self, dimension=1, bands=4):
         super(NDSI_Layer, self).__init__()
         self.d = dimension
-        # self.Channel_all = 3
-        self.Channel_all = 6
+        # 4个波段两两组合 -> 6通道
+        self.bands = bands
+        self.Channel_all = bands * (bands - 1) // 2
         self.w = nn.Parameter(torch.ones(self.Channel_all, dtype=torch.float32), requires_grad=True)
         self.epsilon = 0.0001
 
     def forward(self, x):
-        ndsi = []
-        # 提取红光、近红外、绿光、短波红外波段
-        red = x[:, 0, :, :]
-        green = x[:, 1, :, :]
-        blue = x[:, 2, :, :]
-        nir = x[:, 3, :, :]
-        # 计算NDSI
-        ndsi1 = (red - green) / (red + green + 1e-8)
-        ndsi1 = ndsi1.unsqueeze(1)
-        ndsi.append(ndsi1)
-        ndsi2 = (red - blue) / (red + blue + 1e-8)
-        ndsi2 = ndsi2.unsqueeze(1)
-        ndsi.append(ndsi2)
-        ndsi3 = (red - nir) / (red + nir + 1e-8)
-        ndsi3 = ndsi3.unsqueeze(1)
-        ndsi.append(ndsi3)
-        ndsi4 = (green - blue) / (green + blue + 1e-8)
-        ndsi4 = ndsi4.unsqueeze(1)
-        ndsi.append(ndsi4)
-        ndsi5 = (green - nir) / (green + nir + 1e-8)
-        ndsi5 = ndsi5.unsqueeze(1)
-        ndsi.append(ndsi5)
-        ndsi6 = (blue - nir) / (blue + nir + 1e-8)
-        ndsi6 = ndsi6.unsqueeze(1)
-        ndsi.append(ndsi6)
-        return torch.cat(ndsi, self.d)
+        # 一次索引取出所有波段对 (i, j)，再统一计算归一化差值
+        pairs = getattr(self, "pairs", None)
+        if pairs is None or pairs.device != x.device:
+            pairs = torch.combinations(torch.arange(getattr(self, "bands", 4)), 2).t().flatten()  # (i..., j...)
+            self.pairs = pairs = pairs.to(x.device)
+        a, b = x.index_select(1, pairs).chunk(2, 1)
+        ndsi = (a - b) / (a + b + 1e-8)
+        return ndsi if self.d == 1 else ndsi.movedim(1, self.d)
@@ -11,7 +11,7 @@ import torch
 import torch.nn.functional as F
 
 from ultralytics.utils import LOGGER
-from ultralytics.utils.metrics import batch_probiou
+from ultralytics.utils.metrics import batch_probiou, box_iou
 
 
 class Profile(contextlib.ContextDecorator):
@@ -179,6 +179,7 @@ def non_max_suppression(
     max_wh=7680,
     in_place=True,
     rotated=False,
+    batched=False,
 ):
     """
     Perform non-maximum suppression (NMS) on a set of boxes, with support for masks and multiple labels per box.
@@ -205,6 +206,8 @@ def non_max_suppression(
         max_wh (int): The maximum box width and height in pixels.
         in_place (bool): If True, the input prediction tensor will be modified in place.
         rotated (bool): If Oriented Bounding Boxes (OBB) are being passed for NMS.
+        batched (bool): If True, run one NMS over all images with `batched_non_max_suppression` instead of a loop over
+            images, without time limit. Ignored for rotated boxes and apriori labels.
 
     Returns:
         (List[torch.Tensor]): A list of length batch_size, where each element is a tensor of
@@ -227,6 +230,11 @@ def non_max_suppression(
             output = [pred[(pred[:, 5:6] == classes).any(1)] for pred in output]
         return output
 
+    if batched and not rotated and not labels:
+        return batched_non_max_suppression(
+            prediction, conf_thres, iou_thres, classes, agnostic, multi_label, max_det, nc, max_nms
+        )
+
     bs = prediction.shape[0]  # batch size (BCN, i.e. 1,84,6300)
     nc = nc or (prediction.shape[1] - 4)  # number of classes
     nm = prediction.shape[1] - nc - 4  # number of masks
@@ -316,6 +324,116 @@ def non_max_suppression(
     return output
 
 
+def batched_non_max_suppression(
+    prediction,
+    conf_thres=0.25,
+    iou_thres=0.45,
+    classes=None,
+    agnostic=False,
+    multi_label=False,
+    max_det=300,
+    nc=0,
+    max_nms=30000,
+):
+    """
+    Perform non-maximum suppression on a batch of predictions with a single NMS call and no per-image Python loop.
+
+    The top 'max_nms' boxes of each image are selected with one `topk` over the (batch_size, num_boxes) best class
+    scores, candidates above 'conf_thres' of all images are gathered with one `torch.where`, and all images and classes
+    run through one `torchvision.ops.nms` with boxes offset by image along x and by class along y. The offset is derived
+    from the candidate coordinates, not a fixed `max_wh`, to keep float32 boxes exact for large batches. The kept boxes
+    are cut to 'max_det' per image and split by image. Results match `non_max_suppression` up to equal-score ties.
+
+    Args:
+        prediction (torch.Tensor): A tensor of shape (batch_size, 4 + num_classes + num_masks, num_boxes).
+        conf_thres (float): The confidence threshold below which boxes will be filtered out.
+        iou_thres (float): The IoU threshold above which overlapping boxes of the same image and class are suppressed.
+        classes (List[int]): A list of class indices to consider. If None, all classes will be considered.
+        agnostic (bool): If True, boxes of different classes suppress each other.
+        multi_label (bool): If True, each box may have multiple labels.
+        max_det (int): The maximum number of boxes to keep per image after NMS.
+        nc (int, optional): The number of classes output by the model. Any indices after this will be considered masks.
+        max_nms (int): The maximum number of boxes per image into NMS.
+
+    Returns:
+        (List[torch.Tensor]): A list of length batch_size, where each element is a tensor of
+            shape (num_boxes, 6 + num_masks) with columns (x1, y1, x2, y2, confidence, class, mask1, mask2, ...).
+    """
+    import torchvision  # scope for faster 'import ultralytics'
+
+    if isinstance(prediction, (list, tuple)):  # YOLOv8 model in validation model, output = (inference_out, loss_out)
+        prediction = prediction[0]  # select only inference output
+    bs, _, n = prediction.shape
+    nc = nc or (prediction.shape[1] - 4)  # number of classes
+    nm = prediction.shape[1] - nc - 4  # number of masks
+    multi_label &= nc > 1
+
+    prediction = prediction.transpose(-1, -2)  # shape(B,4+nc+nm,N) to shape(B,N,4+nc+nm), a view
+    if n > max_nms:  # keep the top max_nms boxes of each image
+        k = prediction[..., 4 : 4 + nc].amax(-1).topk(max_nms, dim=1).indices
+        prediction = prediction.gather(1, k[..., None].expand(-1, -1, prediction.shape[-1]))
+    box, cls = prediction[..., :4], prediction[..., 4 : 4 + nc]
+    if multi_label:
+        b, i, j = torch.where(cls > conf_thres)
+        conf = cls[b, i, j]
+    else:  # best class only
+        conf, j = cls.max(-1)
+        b, i = torch.where(conf > conf_thres)
+        conf, j = conf[b, i], j[b, i]
+    if classes is not None:
+        keep = (j[:, None] == torch.tensor(classes, device=j.device)).any(1)
+        b, i, j, conf = b[keep], i[keep], j[keep], conf[keep]
+    if not len(b):
+        return [torch.zeros((0, 6 + nm), device=prediction.device)] * bs
+
+    x = torch.cat((xywh2xyxy(box[b, i]), conf[:, None], j[:, None].float(), prediction[b, i, 4 + nc :]), 1)
+    offset = x[:, :4].abs().amax() * 2 + 1  # wider than any box range, separates images (x) and classes (y)
+    boxes = x[:, :4] + torch.stack((b, j * (not agnostic)), 1).repeat(1, 2).to(x.dtype) * offset
+    keep = torchvision.ops.nms(boxes, x[:, 4], iou_thres)  # sorted by decreasing score
+
+    # Group kept boxes by image, keeping score order, and limit detections per image
+    keep = keep[torch.sort(b[keep], stable=True).indices]
+    counts = torch.bincount(b[keep], minlength=bs)
+    rank = torch.arange(len(keep), device=keep.device) - (counts.cumsum(0) - counts).repeat_interleave(counts)
+    keep = keep[rank < max_det]
+    return list(x[keep].split(counts.clamp(max=max_det).tolist()))
+
+
+def weighted_boxes_fusion(boxes, scores, iou_thres=0.55, chunk=1024):
+    """
+    Fuse overlapping boxes into their score-weighted mean, e.g. to merge detections of overlapping inference windows.
+
+    Clusters are those of greedy NMS: every box joins the highest-scoring kept box it overlaps by more than 'iou_thres'.
+    IoUs are evaluated against the kept boxes only, in chunks of 'chunk' boxes, so memory stays O(chunk * kept).
+
+    Args:
+        boxes (torch.Tensor): Boxes in xyxy format, shape (N, 4), offset by class for class-aware fusion.
+        scores (torch.Tensor): Confidence scores, shape (N,).
+        iou_thres (float, optional): IoU threshold of a box joining a cluster. Defaults to 0.55.
+        chunk (int, optional): Number of boxes per IoU evaluation chunk. Defaults to 1024.
+
+    Returns:
+        (tuple[torch.Tensor, torch.Tensor]): Fused boxes, shape (K, 4), and indices of the K cluster heads, whose scores
+            and classes are kept.
+    """
+    import torchvision  # scope for faster 'import ultralytics'
+
+    keep = torchvision.ops.nms(boxes, scores, iou_thres)  # cluster heads, sorted by score
+    if len(keep) == len(boxes):
+        return boxes[keep], keep
+    cluster = []
+    for b in boxes.split(chunk):
+        iou = box_iou(b, boxes[keep])
+        match = iou > iou_thres
+        cluster.append(torch.where(match.any(1), match.byte().argmax(1), iou.argmax(1)))  # first head it overlaps
+    cluster = torch.cat(cluster)
+    cluster[keep] = torch.arange(len(keep), device=boxes.device)  # heads, incl. zero-area boxes, are their own cluster
+    w = scores.float()[:, None]
+    fused = torch.zeros((len(keep), 4), device=boxes.device).index_add_(0, cluster, boxes.float() * w)
+    fused /= torch.zeros((len(keep), 1), device=boxes.device).index_add_(0, cluster, w)
+    return fused.to(boxes.dtype), keep
+
+
 def clip_boxes(boxes, shape):
     """
     Takes a list of bounding boxes and a shape (height, width) and clips the bounding boxes to the shape.
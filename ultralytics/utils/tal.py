@@ -24,8 +24,12 @@ class TaskAlignedAssigner(nn.Module):
         alpha (float): The alpha parameter for the classification component of the task-aligned metric.
         beta (float): The beta parameter for the localization component of the task-aligned metric.
         eps (float): A small value to prevent division by zero.
+        max_elements (int): Largest (batch, gt boxes, anchors) metric size computed at once, larger assignments run in
+            chunks of gt boxes with identical results, see `_forward_chunked`.
     """
 
+    max_elements = 1 << 23
+
     def __init__(self, topk=13, num_classes=80, alpha=1.0, beta=6.0, eps=1e-9):
         """Initialize a TaskAlignedAssigner object with customizable hyperparameters."""
         super().__init__()
@@ -70,14 +74,23 @@ class TaskAlignedAssigner(nn.Module):
                 torch.zeros_like(pd_scores[..., 0]),
             )
 
+        args = pd_scores, pd_bboxes, anc_points, gt_labels, gt_bboxes, mask_gt
+        chunk = max(self.max_elements // (self.bs * pd_scores.shape[1]), 1)  # gt boxes per chunk
         try:
-            return self._forward(pd_scores, pd_bboxes, anc_points, gt_labels, gt_bboxes, mask_gt)
+            if chunk >= self.n_max_boxes:
+                return self._forward(*args)
+            return self._forward_chunked(*args, chunk=chunk)
         except torch.OutOfMemoryError:
-            # Move tensors to CPU, compute, then move back to original device
-            LOGGER.warning("WARNING: CUDA OutOfMemoryError in TaskAlignedAssigner, using CPU")
-            cpu_tensors = [t.cpu() for t in (pd_scores, pd_bboxes, anc_points, gt_labels, gt_bboxes, mask_gt)]
-            result = self._forward(*cpu_tensors)
-            return tuple(t.to(device) for t in result)
+            chunk = max(min(chunk, self.n_max_boxes) // 8, 1)
+            LOGGER.warning(f"WARNING ⚠️ CUDA OutOfMemoryError in TaskAlignedAssigner, retrying with {chunk} gt/chunk")
+            torch.cuda.empty_cache()
+            try:
+                return self._forward_chunked(*args, chunk=chunk)
+            except torch.OutOfMemoryError:
+                # Move tensors to CPU, compute, then move back to original device
+                LOGGER.warning("WARNING ⚠️ CUDA OutOfMemoryError in TaskAlignedAssigner, using CPU")
+                result = self._forward_chunked(*(t.cpu() for t in args), chunk=chunk)
+                return tuple(t.to(device) for t in result)
 
     def _forward(self, pd_scores, pd_bboxes, anc_points, gt_labels, gt_bboxes, mask_gt):
         """
@@ -117,6 +130,76 @@ class TaskAlignedAssigner(nn.Module):
 
         return target_labels, target_bboxes, target_scores, fg_mask.bool(), target_gt_idx
 
+    def _forward_chunked(self, pd_scores, pd_bboxes, anc_points, gt_labels, gt_bboxes, mask_gt, chunk=64):
+        """
+        Compute the task-aligned assignment of `_forward` over chunks of 'chunk' gt boxes, with identical results.
+
+        Candidate masks, alignment metrics and IoUs are computed per chunk and reduced per anchor on the fly: the number
+        of positive gt boxes, the first positive gt box and the gt box of highest IoU (first one on ties, as argmax),
+        with their metric and IoU. An anchor positive for several gt boxes is assigned to the highest IoU one, exactly
+        as in `select_highest_overlaps`, and the per-gt normalization maxima are scattered from the assigned anchors.
+        Peak memory is O(batch * chunk * anchors) instead of O(batch * max_boxes * anchors).
+
+        Args:
+            pd_scores (Tensor): shape(bs, num_total_anchors, num_classes)
+            pd_bboxes (Tensor): shape(bs, num_total_anchors, 4)
+            anc_points (Tensor): shape(num_total_anchors, 2)
+            gt_labels (Tensor): shape(bs, n_max_boxes, 1)
+            gt_bboxes (Tensor): shape(bs, n_max_boxes, 4)
+            mask_gt (Tensor): shape(bs, n_max_boxes, 1)
+            chunk (int): Number of gt boxes per chunk.
+
+        Returns:
+            (tuple): target_labels, target_bboxes, target_scores, fg_mask and target_gt_idx as in `_forward`.
+        """
+        bs, na = pd_scores.shape[:2]
+        dtype, device = pd_bboxes.dtype, pd_bboxes.device
+        count = torch.zeros(bs, na, dtype=dtype, device=device)  # positive gt boxes per anchor
+        first_idx = torch.full((bs, na), -1, dtype=torch.long, device=device)  # first positive gt box
+        first_metric, first_iou = torch.zeros(bs, na, dtype=dtype, device=device), torch.zeros_like(count)
+        best_idx = torch.zeros(bs, na, dtype=torch.long, device=device)  # gt box of highest IoU
+        best_metric, best_iou = torch.zeros_like(count), torch.full_like(count, -1)
+
+        for s in range(0, self.n_max_boxes, chunk):
+            c = slice(s, s + chunk)
+            mask_pos, align_metric, overlaps = self.get_pos_mask(
+                pd_scores, pd_bboxes, gt_labels[:, c], gt_bboxes[:, c], anc_points, mask_gt[:, c]
+            )
+            count += mask_pos.sum(1)
+            i = mask_pos.argmax(1, keepdim=True)  # first positive gt box of the chunk
+            new = (mask_pos.gather(1, i) > 0).squeeze(1) & (first_idx < 0)
+            first_idx = torch.where(new, i.squeeze(1) + s, first_idx)
+            first_metric = torch.where(new, align_metric.gather(1, i).squeeze(1), first_metric)
+            first_iou = torch.where(new, overlaps.gather(1, i).squeeze(1), first_iou)
+            i = overlaps.argmax(1, keepdim=True)  # highest IoU gt box of the chunk
+            iou = overlaps.gather(1, i).squeeze(1)
+            better = iou > best_iou  # strict, keeps the first gt box on ties like argmax over all gt boxes
+            best_idx = torch.where(better, i.squeeze(1) + s, best_idx)
+            best_metric = torch.where(better, align_metric.gather(1, i).squeeze(1), best_metric)
+            best_iou = torch.where(better, iou, best_iou)
+            del mask_pos, align_metric, overlaps
+
+        # Resolve anchors assigned to multiple gt_bboxes to the highest IoU one, see select_highest_overlaps()
+        multi = count > 1
+        fg_mask = (count > 0).to(dtype)
+        target_gt_idx = torch.where(multi, best_idx, first_idx.clamp(min=0))
+        metric = torch.where(multi, best_metric, first_metric) * fg_mask
+        iou = torch.where(multi, best_iou, first_iou) * fg_mask
+
+        # Assigned target
+        target_labels, target_bboxes, target_scores = self.get_targets(gt_labels, gt_bboxes, target_gt_idx, fg_mask)
+
+        # Normalize, per-gt maxima over the anchors assigned to it
+        zeros = torch.zeros(bs, self.n_max_boxes, dtype=dtype, device=device)
+        pos_align_metrics = zeros.scatter_reduce(1, target_gt_idx, metric, "amax")
+        pos_overlaps = zeros.scatter_reduce(1, target_gt_idx, iou, "amax")
+        norm_align_metric = (
+            metric * pos_overlaps.gather(1, target_gt_idx) / (pos_align_metrics.gather(1, target_gt_idx) + self.eps)
+        )
+        target_scores = target_scores * norm_align_metric.unsqueeze(-1)
+
+        return target_labels, target_bboxes, target_scores, fg_mask.bool(), target_gt_idx
+
     def get_pos_mask(self, pd_scores, pd_bboxes, gt_labels, gt_bboxes, anc_points, mask_gt):
         """Get in_gts mask, (b, max_num_obj, h*w)."""
         mask_in_gts = self.select_candidates_in_gts(anc_points, gt_bboxes)
@@ -132,18 +215,19 @@ class TaskAlignedAssigner(nn.Module):
     def get_box_metrics(self, pd_scores, pd_bboxes, gt_labels, gt_bboxes, mask_gt):
         """Compute alignment metric given predicted and ground truth bounding boxes."""
         na = pd_bboxes.shape[-2]
+        nb = gt_bboxes.shape[1]  # max_num_obj, or the gt boxes of one chunk
         mask_gt = mask_gt.bool()  # b, max_num_obj, h*w
-        overlaps = torch.zeros([self.bs, self.n_max_boxes, na], dtype=pd_bboxes.dtype, device=pd_bboxes.device)
-        bbox_scores = torch.zeros([self.bs, self.n_max_boxes, na], dtype=pd_scores.dtype, device=pd_scores.device)
+        overlaps = torch.zeros([self.bs, nb, na], dtype=pd_bboxes.dtype, device=pd_bboxes.device)
+        bbox_scores = torch.zeros([self.bs, nb, na], dtype=pd_scores.dtype, device=pd_scores.device)
 
-        ind = torch.zeros([2, self.bs, self.n_max_boxes], dtype=torch.long)  # 2, b, max_num_obj
-        ind[0] = torch.arange(end=self.bs).view(-1, 1).expand(-1, self.n_max_boxes)  # b, max_num_obj
+        ind = torch.zeros([2, self.bs, nb], dtype=torch.long)  # 2, b, max_num_obj
+        ind[0] = torch.arange(end=self.bs).view(-1, 1).expand(-1, nb)  # b, max_num_obj
         ind[1] = gt_labels.squeeze(-1)  # b, max_num_obj
         # Get the scores of each grid for each gt cls
         bbox_scores[mask_gt] = pd_scores[ind[0], :, ind[1]][mask_gt]  # b, max_num_obj, h*w
 
         # (b, max_num_obj, 1, 4), (b, 1, h*w, 4)
-        pd_boxes = pd_bboxes.unsqueeze(1).expand(-1, self.n_max_boxes, -1, -1)[mask_gt]
+        pd_boxes = pd_bboxes.unsqueeze(1).expand(-1, nb, -1, -1)[mask_gt]
         gt_boxes = gt_bboxes.unsqueeze(2).expand(-1, -1, na, -1)[mask_gt]
         overlaps[mask_gt] = self.iou_calculation(gt_boxes, pd_boxes)
 
@@ -4,6 +4,8 @@ import gc
 import math
 import os
 import random
+import shutil
+import threading
 import time
 from contextlib import contextmanager
 from copy import deepcopy
@@ -103,6 +105,15 @@ def autocast(enabled: bool, device: str = "cuda"):
         return torch.cuda.amp.autocast(enabled)
 
 
+def autocast_dtype(device: str = "cuda"):
+    """Return the autocast dtype active for 'device' on the calling thread, or None if autocast is disabled."""
+    if TORCH_2_4:
+        return torch.get_autocast_dtype(device) if torch.is_autocast_enabled(device) else None
+    if device == "cpu":
+        return torch.get_autocast_cpu_dtype() if torch.is_autocast_cpu_enabled() else None
+    return torch.get_autocast_gpu_dtype() if device == "cuda" and torch.is_autocast_enabled() else None
+
+
 def get_cpu_info():
     """Return a string with system CPU information, i.e. 'Apple M2'."""
     from ultralytics.utils import PERSISTENT_CACHE  # avoid circular import error
@@ -126,6 +137,40 @@ def get_gpu_info(index):
     return f"{properties.name}, {properties.total_memory / (1 << 20):.0f}MiB"
 
 
+def cpu_bf16_supported():
+    """Return True if the CPU has native bfloat16 instructions (AMX, AVX512-BF16 or Arm BF16), where CPU AMP is fast."""
+    if not TORCH_2_0:
+        return False
+    if any(getattr(torch.cpu, f, lambda: False)() for f in ("_is_amx_tile_supported", "_is_avx512_bf16_supported")):
+        return True
+    try:
+        flags = Path("/proc/cpuinfo").read_text().split()
+    except OSError:  # not Linux
+        return False
+    return any(f in flags for f in ("amx_bf16", "avx512_bf16", "bf16"))
+
+
+def cpu_threads(workers=0):
+    """
+    Split the physical CPU cores between DataLoader workers and PyTorch intra-op threads.
+
+    Hyper-threads share the execution units the intra-op GEMM/convolution kernels saturate, so only physical cores are
+    counted. Each DataLoader worker process keeps one core and PyTorch computes on the remaining ones.
+
+    Args:
+        workers (int): Number of DataLoader worker processes, 0 when loading in the main process.
+
+    Returns:
+        (int): The number of intra-op threads set with `torch.set_num_threads`.
+    """
+    import psutil  # scope for faster 'import ultralytics'
+
+    cores = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+    threads = max(cores - workers, 1)
+    torch.set_num_threads(threads)
+    return threads
+
+
 def select_device(device="", batch=0, newline=False, verbose=True):
     """
     Selects the appropriate PyTorch device based on the provided arguments.
@@ -466,6 +511,22 @@ def de_parallel(model):
     return model.module if is_parallel(model) else model
 
 
+def compile_layers(model):
+    """
+    Compile each layer of a YOLO model in place with `torch.compile`, returns True if compiled.
+
+    Layers are compiled individually so the Python routing of the model (named inputs, concurrent fuse branches) keeps
+    running eagerly and needs no graph breaks. Compiling in place with `nn.Module.compile` (torch>=2.2) keeps the
+    state_dict keys unchanged, so EMA updates and checkpoints are unaffected.
+    """
+    if not hasattr(nn.Module, "compile"):
+        LOGGER.warning(f"WARNING ⚠️ compile=True requires torch>=2.2, current torch=={torch.__version__} runs eagerly.")
+        return False
+    for m in de_parallel(model).model:
+        m.compile()
+    return True
+
+
 def one_cycle(y1=0.0, y2=1.0, steps=100):
     """Returns a lambda function for sinusoidal ramp from y1 to y2 https://arxiv.org/pdf/1812.01187.pdf."""
     return lambda x: max((1 - math.cos(x * math.pi / steps)) / 2, 0) * (y2 - y1) + y1
@@ -590,7 +651,9 @@ def strip_optimizer(f: Union[str, Path] = "best.pt", s: str = "", updates: dict
 
     # Save
     combined = {**metadata, **x, **(updates or {})}
-    torch.save(combined, s or f)  # combine dicts (prefer to the right)
+    tmp = Path(s or f).with_name(f"{Path(s or f).name}.tmp")
+    torch.save(combined, tmp)  # combine dicts (prefer to the right)
+    os.replace(tmp, s or f)  # atomic, never rewrites checkpoints hardlinked by CheckpointWriter in place
     mb = os.path.getsize(s or f) / 1e6  # file size
     LOGGER.info(f"Optimizer stripped from {f},{f' saved as {s},' if s else ''} {mb:.1f}MB")
     return combined
@@ -610,6 +673,167 @@ def convert_optimizer_state_dict_to_fp16(state_dict):
     return state_dict
 
 
+class CheckpointWriter:
+    """
+    Background writer of training checkpoints.
+
+    The training thread only snapshots tensors: EMA weights are copied into a reused CPU FP16 model template and the
+    optimizer state is copied to CPU FP16, instead of deep-copying both on the device every epoch. Serialization and
+    file writes run on a separate thread, each file is written to a temporary name and atomically renamed, and
+    additional targets such as 'best.pt' are hardlinks of the first file (a copy where links are unsupported). One
+    write is in flight at a time, `wait` blocks until it is on disk and re-raises its error if it failed.
+
+    Examples:
+        >>> writer = CheckpointWriter()
+        >>> ckpt = {"ema": writer.snapshot_model(ema.ema), "optimizer": writer.snapshot_optimizer(optimizer)}
+        >>> writer.submit(ckpt, [Path("last.pt"), Path("best.pt")])
+        >>> writer.wait()
+    """
+
+    def __init__(self):
+        """Initialize an idle writer without a model template."""
+        self.thread = None
+        self.error = None
+        self.template = None  # CPU FP16 model structure, tensors refreshed in place by snapshot_model()
+
+    def snapshot_model(self, model, include=()):
+        """Return a CPU FP16 copy of 'model' and its 'include' attributes, reusing the template if the keys match."""
+        self.wait()  # the previous write may still be pickling the template
+        sd = model.state_dict()
+        tsd = self.template.state_dict() if self.template is not None else {}
+        if list(tsd) != list(sd):
+            self.template = deepcopy(model).cpu().half()
+        else:
+            with torch.no_grad():
+                for t, v in zip(tsd.values(), sd.values()):
+                    t.copy_(v)
+        copy_attr(self.template, model, include)
+        return self.template
+
+    @staticmethod
+    def snapshot_optimizer(optimizer):
+        """Return the optimizer state_dict with its state tensors copied to CPU, FP32 tensors except 'step' in FP16."""
+        sd = optimizer.state_dict()  # fresh dicts referencing the live state tensors
+        sd["state"] = {
+            i: {
+                k: v.detach().to("cpu", torch.half if k != "step" and v.dtype is torch.float32 else None, copy=True)
+                if isinstance(v, torch.Tensor)
+                else v
+                for k, v in state.items()
+            }
+            for i, state in sd["state"].items()
+        }
+        return sd
+
+    def submit(self, ckpt, files):
+        """Serialize 'ckpt' to files[0] and link it to the other 'files' in the background."""
+        self.wait()
+        self.thread = threading.Thread(target=self._write, args=(ckpt, [Path(f) for f in files]), daemon=False)
+        self.thread.start()
+
+    def _write(self, ckpt, files):
+        """Write thread, atomically writes the first file and replaces the others with hardlinks or copies of it."""
+        try:
+            first = files[0]
+            tmp = first.with_name(f"{first.name}.tmp")
+            torch.save(ckpt, tmp)
+            os.replace(tmp, first)
+            for f in files[1:]:
+                tmp = f.with_name(f"{f.name}.tmp")
+                tmp.unlink(missing_ok=True)
+                try:
+                    os.link(first, tmp)  # no second write, 'first' is replaced, never modified, on the next save
+                except OSError:
+                    shutil.copyfile(first, tmp)
+                os.replace(tmp, f)
+        except Exception as e:
+            self.error = e
+
+    def wait(self):
+        """Block until the in-flight write has finished, raising its error if it failed."""
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.error is not None:
+            e, self.error = self.error, None
+            raise RuntimeError(f"checkpoint write failed: {e}") from e
+
+
+class StepTimer:
+    """
+    Low-overhead per-iteration timing of the training loop.
+
+    Each iteration is split into consecutive host-side stages with `lap`: 'data' is the time spent waiting for the next
+    batch, followed by 'preprocess' (host to device copy and normalization), 'forward', 'backward', 'optimizer'
+    (optimizer and EMA step) and 'other' (logging, plotting and callbacks). `step` closes the iteration and adds the
+    loader-side 'read' (image decode), 'augment' and 'collate' seconds reported with the batch, summed over its samples,
+    and the number of batches already waiting in the DataLoader worker queue. Without workers 'read + augment + collate'
+    is contained in 'data', with workers 'data' is the stall the workers could not hide.
+
+    CUDA kernels run asynchronously and are not synchronized here, so on GPU the compute stages show host time and the
+    device time surfaces in whichever stage next waits for it. CPU timings are exact.
+
+    Attributes:
+        records (dict): Per-iteration seconds (and queue depths) of the current epoch, keyed by stage.
+
+    Examples:
+        >>> timer = StepTimer()
+        >>> timer.start()
+        >>> for batch in loader:
+        ...     timer.lap("data")
+        ...     train_step(batch)
+        ...     timer.lap("forward")
+        ...     times = timer.step(batch.pop("times", None), queue=0)
+        >>> stats = timer.summary()
+    """
+
+    STAGES = "data", "preprocess", "forward", "backward", "optimizer", "other"
+    LOADER = "read", "augment", "collate"
+
+    def __init__(self):
+        """Initialize the timer with empty records."""
+        self.records = {k: [] for k in (*self.STAGES, *self.LOADER, "queue")}
+        self.current = dict.fromkeys(self.STAGES, 0.0)
+        self.t = time.perf_counter()
+
+    def start(self):
+        """Clear the records and start timing the first iteration, call right before iterating the DataLoader."""
+        for v in self.records.values():
+            v.clear()
+        self.current = dict.fromkeys(self.STAGES, 0.0)
+        self.t = time.perf_counter()
+
+    def lap(self, stage):
+        """Attribute the time since the previous lap to 'stage'."""
+        t = time.perf_counter()
+        self.current[stage] += t - self.t
+        self.t = t
+
+    def step(self, loader_times=None, queue=0):
+        """Close the iteration, returning its stage seconds, loader seconds and queue depth as a dict."""
+        self.lap("other")
+        times = {**self.current, **dict(zip(self.LOADER, loader_times or (0.0, 0.0, 0.0))), "queue": queue}
+        for k, v in times.items():
+            self.records[k].append(v)
+        self.current = dict.fromkeys(self.STAGES, 0.0)
+        return times
+
+    def summary(self):
+        """Return mean, p50 and p95 milliseconds per stage, mean queue depth and the data-wait fraction of the epoch."""
+        if not self.records["data"]:
+            return {}
+        stats = {}
+        for k, v in self.records.items():
+            v = np.asarray(v, dtype=np.float64)
+            if k == "queue":
+                stats["queue_mean"], stats["queue_min"] = v.mean(), v.min()
+                continue
+            stats[f"{k}_mean"], stats[f"{k}_p50"], stats[f"{k}_p95"] = v.mean() * 1e3, *np.percentile(v, (50, 95)) * 1e3
+        total = sum(stats[f"{k}_mean"] for k in self.STAGES)
+        stats["data_frac"] = stats["data_mean"] / max(total, 1e-9)
+        return stats
+
+
 @contextmanager
 def cuda_memory_usage(device=None):
     """